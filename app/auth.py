@@ -1,10 +1,13 @@
+import uuid
 from datetime import datetime, timedelta
-from jose import JWTError, jwt
-from passlib.context import CryptContext
 from app.config import get_settings
 from app.models import User
-from app.crud import get_user_by_email
-from sqlalchemy.orm import Session
+from app.crud import get_user_credentials, update_user_password
+from app.database import AsyncSessionLocal, on_replica
+from app.passwords import password_hasher
+from app.utils.cache import MISSING, TTLCache
+from app.utils.metrics import registry
+from sqlalchemy.ext.asyncio import AsyncSession
 
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
@@ -13,19 +16,40 @@ settings = get_settings()
 SECRET_KEY = settings.secret_key
 ALGORITHM = settings.algorithm
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+# Emails sin cuenta vistos en /login; evita consultar la BD en ataques de credential stuffing
+unknown_emails = TTLCache(settings.unknown_email_cache_size, settings.unknown_email_cache_ttl)
+registry.cache("unknown_email", unknown_emails.stats)
 
 def create_access_token(data: dict):
+    from jose import jwt  # se importa con el primer login, no al arrancar
+
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+    # jti identifica el token en la lista de revocación
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
-def authenticate_user(db, email: str, password: str):
-    user = get_user_by_email(db, email)
-    if user and verify_password(password, user.password):
-        return user
-    return None
+async def authenticate_user(db: AsyncSession, email: str, password: str):
+    """Devuelve (id, password) del usuario si las credenciales son válidas, o None."""
+    if unknown_emails.get(email) is not MISSING:
+        return None
+    credentials = await get_user_credentials(db, email)
+    if not credentials and on_replica(db):
+        # La réplica puede no tener todavía un registro reciente (hecho en otro worker): se confirma
+        # en el primario antes de guardar el email como desconocido
+        async with AsyncSessionLocal() as primary:
+            credentials = await get_user_credentials(primary, email)
+    if not credentials:
+        unknown_emails.set(email, True)
+        return None
+    # Se libera la conexión del pool mientras corre bcrypt
+    await db.close()
+    valid, new_hash = await password_hasher.verify_and_update(password, credentials.password)
+    if not valid:
+        return None
+    if new_hash:
+        # El hash se generó con otro costo de bcrypt; se reemplaza de forma transparente (en el
+        # primario: `db` puede ser una réplica)
+        async with AsyncSessionLocal() as primary:
+            await update_user_password(primary, credentials.id, new_hash)
+    return credentials
@@ -1,6 +1,7 @@
 import os
 import logging
 from functools import lru_cache
+from typing import Dict, List, Optional
 
 from pydantic_settings import BaseSettings
 
@@ -21,6 +22,158 @@ class Settings(BaseSettings):
     weather_key: str
     sports_key: str
 
+    # URL completa de la BD (ej. sqlite:///./local.db); si se define reemplaza a db_user/db_host/...
+    database_url: Optional[str] = None
+
+    # Pool de conexiones del engine asíncrono
+    db_pool_size: int = 10
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+
+    # Réplicas de lectura (ej. DB_REPLICA_URLS='["postgresql+psycopg2://u:p@replica1:5432/db"]'): /next y
+    # las búsquedas del login leen de una réplica sana (health check cada DB_REPLICA_CHECK_INTERVAL
+    # segundos; con DB_REPLICA_MAX_LAG_SECONDS > 0 también se descarta una réplica de Postgres atrasada)
+    # y, si no hay ninguna, del primario. Tras una escritura el cliente lee del primario durante
+    # DB_READ_YOUR_WRITES_SECONDS
+    db_replica_urls: List[str] = []
+    db_replica_check_interval: float = 5.0
+    db_replica_check_timeout: float = 2.0
+    db_replica_max_lag_seconds: float = 0.0
+    db_read_your_writes_seconds: float = 5.0
+
+    # Límites de concurrencia para el enriquecimiento de eventos
+    league_concurrency: int = 4
+    event_concurrency: int = 8
+    sports_concurrency: int = 4
+    weather_concurrency: int = 8
+    llm_concurrency: int = 4
+
+    # Servicios externos y pool de conexiones HTTP compartido
+    sports_base_url: str = "https://www.thesportsdb.com/api/v1/json"
+    weather_base_url: str = "http://api_clima:3000"
+    http_max_connections: int = 20
+    http_max_keepalive_connections: int = 10
+    http_keepalive_expiry: float = 30.0
+    http_connect_timeout: float = 3.0
+    http_read_timeout: float = 10.0
+    http2_enabled: bool = False
+
+    # Resiliencia de thesportsdb y api_clima: plazo total por llamada (incluye reintentos por hedge),
+    # circuit breaker por tasa de errores en una ventana y hedging opcional (ej. HEDGE_UPSTREAMS='["sports"]')
+    sports_timeout: float = 8.0
+    weather_timeout: float = 5.0
+    breaker_error_rate: float = 0.5
+    breaker_min_calls: int = 10
+    breaker_window_seconds: float = 30.0
+    breaker_reset_seconds: float = 15.0
+    hedge_upstreams: List[str] = []
+    hedge_min_delay: float = 0.05
+
+    # Limitador de tasa adaptativo por servicio (una API key cada uno): tasa inicial en peticiones/s
+    # (0 lo desactiva), fichas acumulables, reintentos de un 429 y Retry-After máximo que se espera
+    sports_rate_limit: float = 20.0
+    weather_rate_limit: float = 50.0
+    rate_limit_burst: int = 10
+    rate_limit_retries: int = 3
+    rate_limit_max_wait: float = 30.0
+
+    # Caché de ubicaciones de estadios/equipos (memoria + tabla locations)
+    location_cache_size: int = 2048
+    location_cache_ttl: int = 7 * 24 * 3600
+
+    # Caché de clima: malla de coordenadas (grados) y duración de cada franja (segundos)
+    weather_cache_size: int = 1024
+    weather_cache_grid: float = 0.1
+    weather_cache_bucket_seconds: int = 3600
+
+    # Reutilización de pronósticos: tamaño de franja del clima en el hash y antigüedad máxima (0 = sin límite)
+    prediction_temperature_step: float = 2.0
+    prediction_wind_step: float = 2.0
+    prediction_max_age: int = 3 * 24 * 3600
+
+    # Cliente OpenAI asíncrono: base_url permite apuntar a un servidor local de pruebas
+    openai_base_url: Optional[str] = None
+    openai_model: str = "gpt-3.5-turbo"
+    llm_timeout: float = 30.0
+    llm_max_retries: int = 3
+    llm_backoff_base: float = 0.5
+    llm_backoff_max: float = 8.0
+
+    # Pronósticos por lote: ligas que piden una sola completion por grupo de partidos
+    # (ej. LLM_BATCH_LEAGUES='["4335"]') y partidos por completion
+    llm_batch_leagues: List[str] = []
+    llm_batch_size: int = 10
+
+    # Registro de ligas de thesportsdb: id -> segundos entre actualizaciones programadas
+    # (0 usa refresh_interval_seconds), ej. LEAGUES='{"4335": 3600, "4351": 0}'
+    leagues: Dict[str, int] = {"4335": 0, "4351": 0}
+
+    # Actualización programada de eventos (0 desactiva el scheduler) y llave del advisory lock de Postgres
+    refresh_interval_seconds: int = 6 * 3600
+    refresh_initial_delay_seconds: int = 60
+    refresh_lock_key: int = 43354351
+    # Plazo de una actualización completa (0 = sin límite): las ligas que no terminan a tiempo conservan sus eventos guardados
+    refresh_deadline_seconds: float = 600.0
+    refresh_stream_buffer: int = 1000
+    refresh_stream_heartbeat: float = 15.0
+    # Partidos sin cambios de fecha, estadio ni equipos: clima y pronóstico se reutilizan hasta esta antigüedad (segundos)
+    refresh_unchanged_max_age: int = 24 * 3600
+
+    # Respuesta precalculada de /next: revalidación (segundos) y max-age para los clientes
+    next_cache_ttl: int = 60
+    next_cache_max_age: int = 60
+    # Tamaño de página por defecto y máximo de /next con filtros
+    next_page_size: int = 100
+    next_max_page_size: int = 500
+
+    # Hash de contraseñas: costo de bcrypt y executor dedicado ("thread" o "process")
+    bcrypt_rounds: int = 12
+    password_executor: str = "thread"
+    password_workers: int = 2
+    password_max_queue: int = 64
+
+    # Validación de tokens: caché de tokens verificados y lista de revocación
+    token_cache_size: int = 10000
+    token_revocation_refresh_seconds: float = 5.0
+    events_require_auth: bool = True
+
+    # Emails inexistentes en /login; TTL corto porque otra réplica pudo registrarlos
+    unknown_email_cache_size: int = 100000
+    unknown_email_cache_ttl: float = 30.0
+
+    # Logs estructurados (loguru): nivel, una línea JSON por registro, fracción de los logs de detalle
+    # del camino crítico que se escriben y archivo opcional con rotación (ej. logs/api.log)
+    log_level: str = "INFO"
+    log_json: bool = False
+    log_sample_rate: float = 0.01
+    log_file: Optional[str] = None
+
+    # Métricas en formato Prometheus en GET /metrics. Con varios workers cada uno copia sus
+    # estadísticas de cachés, breakers, etc. a los archivos compartidos cada METRICS_SYNC_SECONDS
+    metrics_enabled: bool = True
+    metrics_sync_seconds: float = 5.0
+
+    # Servidor de producción (python -m app.server): gunicorn con workers de uvicorn. Un worker por
+    # defecto: los jobs de /update-events, sus JobStream y el programador de actualizaciones viven en
+    # el proceso que los creó, así que WEB_WORKERS=0 (un worker por núcleo disponible) o mayor que 1
+    # no es seguro mientras sea así. Con preload la app se importa una vez en el proceso maestro
+    web_host: str = "0.0.0.0"
+    web_port: int = 8000
+    web_workers: int = 1
+    web_preload: bool = True
+    web_graceful_timeout: int = 30
+    web_keepalive: int = 5
+    web_max_requests: int = 0
+    web_max_requests_jitter: int = 0
+
+    # Calentamiento al arrancar cada worker: conexiones abiertas del pool de BD (0 lo desactiva),
+    # una conexión keep-alive por servicio externo y plazo total
+    warmup_db_connections: int = 2
+    warmup_http: bool = True
+    warmup_timeout: float = 5.0
+
     class Config:
         env_file = ".dev_env" if os.getenv("ENVIRONMENT") != "production" else None
 
@@ -1,15 +1,167 @@
-from sqlalchemy.orm import Session
-from app.models import User
+from datetime import date, datetime, timezone
+from sqlalchemy import all_, delete, func, literal, or_, select, tuple_, type_coerce, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import User, LocationModel, EventModel, RevokedToken
 from app.schemas import UserCreate
-from passlib.hash import bcrypt
-
-def get_user_by_email(db: Session, email: str):
-    return db.query(User).filter(User.email == email).first()
-
-def create_user(db: Session, user: UserCreate):
-    password = bcrypt.hash(user.password)
-    db_user = User(email=user.email, password=password)
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    return {"result": "success"}
+from app.passwords import password_hasher
+
+async def get_user_credentials(db: AsyncSession, email: str):
+    """Solo id y password del usuario, para login; None si el email no existe."""
+    result = await db.execute(select(User.id, User.password).where(User.email == email))
+    return result.first()
+
+async def create_user(db: AsyncSession, user: UserCreate):
+    """
+    Registra el usuario con INSERT ... ON CONFLICT (email) DO NOTHING RETURNING id, en un solo
+    round-trip y sin carrera entre consultar e insertar. Devuelve el id, o None si el email ya existía.
+    """
+    password = await password_hasher.hash(user.password)
+    dialect = postgresql if db.bind.dialect.name == "postgresql" else sqlite
+    stmt = (
+        dialect.insert(User)
+        .values(email=user.email, password=password)
+        .on_conflict_do_nothing(index_elements=[User.email])
+        .returning(User.id)
+    )
+    user_id = (await db.execute(stmt)).scalar()
+    await db.commit()
+    return user_id
+
+async def update_user_password(db: AsyncSession, user_id: int, password: str):
+    await db.execute(update(User).where(User.id == user_id).values(password=password))
+    await db.commit()
+
+
+async def revoke_token(db: AsyncSession, jti: str, expires_at: datetime):
+    """Guarda la revocación y de paso borra las de tokens que ya expiraron."""
+    dialect = postgresql if db.bind.dialect.name == "postgresql" else sqlite
+    stmt = dialect.insert(RevokedToken).values(jti=jti, expires_at=expires_at)
+    await db.execute(stmt.on_conflict_do_nothing(index_elements=[RevokedToken.jti]))
+    await db.execute(delete(RevokedToken).where(RevokedToken.expires_at <= datetime.now(timezone.utc)))
+    await db.commit()
+
+async def list_revoked_tokens(db: AsyncSession, now: datetime) -> list:
+    result = await db.execute(select(RevokedToken.jti).where(RevokedToken.expires_at > now))
+    return result.all()
+
+
+async def get_location(db: AsyncSession, kind: str, ref_id: str, min_updated_at: datetime):
+    result = await db.execute(select(LocationModel).where(
+        LocationModel.kind == kind,
+        LocationModel.ref_id == ref_id,
+        LocationModel.updated_at >= min_updated_at,
+    ))
+    return result.scalars().first()
+
+async def save_location(db: AsyncSession, kind: str, ref_id: str, location):
+    """INSERT ... ON CONFLICT (kind, ref_id) DO UPDATE: un round-trip y sin carrera entre peticiones."""
+    dialect = postgresql if db.bind.dialect.name == "postgresql" else sqlite
+    stmt = dialect.insert(LocationModel).values(
+        kind=kind, ref_id=ref_id, location=location, updated_at=datetime.now(timezone.utc)
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[LocationModel.kind, LocationModel.ref_id],
+        set_={"location": stmt.excluded.location, "updated_at": stmt.excluded.updated_at},
+    )
+    await db.execute(stmt)
+    await db.commit()
+
+async def delete_locations(db: AsyncSession, kind: str = None, ref_id: str = None) -> int:
+    stmt = delete(LocationModel)
+    if kind:
+        stmt = stmt.where(LocationModel.kind == kind)
+    if ref_id:
+        stmt = stmt.where(LocationModel.ref_id == ref_id)
+    deleted = (await db.execute(stmt)).rowcount
+    await db.commit()
+    return deleted
+
+
+# Filas por sentencia INSERT; mantiene las consultas por debajo del límite de parámetros de SQLite
+UPSERT_CHUNK_SIZE = 500
+
+async def upsert_events(db: AsyncSession, rows: list):
+    """
+    Inserta o actualiza eventos con INSERT ... ON CONFLICT (id_event) DO UPDATE.
+    `rows` son dicts con las columnas de EventModel; no hace commit.
+    """
+    if not rows:
+        return
+    dialect = postgresql if db.bind.dialect.name == "postgresql" else sqlite
+    for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+        stmt = dialect.insert(EventModel).values(rows[start:start + UPSERT_CHUNK_SIZE])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[EventModel.id_event],
+            set_={
+                "id_league": stmt.excluded.id_league,
+                "date_event": stmt.excluded.date_event,
+                "event_data": stmt.excluded.event_data,
+                "prediction_hash": stmt.excluded.prediction_hash,
+                "predicted_at": stmt.excluded.predicted_at,
+                "enriched_at": stmt.excluded.enriched_at,
+                "updated_at": func.now(),
+            },
+        )
+        await db.execute(stmt)
+
+async def delete_stale_events(db: AsyncSession, id_league: str, current_event_ids: list) -> int:
+    """Borra en una sola sentencia los eventos de la liga que ya no están en el API; no hace commit."""
+    stmt = delete(EventModel).where(EventModel.id_league == id_league)
+    if db.bind.dialect.name == "postgresql":
+        # id_event <> ALL(:ids) usa un único parámetro de tipo arreglo
+        ids = literal(current_event_ids, postgresql.ARRAY(EventModel.id_event.type))
+        stmt = stmt.where(EventModel.id_event != all_(ids))
+    else:
+        stmt = stmt.where(EventModel.id_event.not_in(current_event_ids))
+    return (await db.execute(stmt)).rowcount
+
+
+async def get_stored_events(db: AsyncSession, league_ids: list) -> list:
+    result = await db.execute(
+        select(
+            EventModel.id_event, EventModel.prediction_hash, EventModel.predicted_at, EventModel.enriched_at,
+            EventModel.event_data,
+        )
+        .where(EventModel.id_league.in_(league_ids))
+    )
+    return result.all()
+
+
+def events_query(dialect_name: str, id_league: str = None, date_from: date = None, date_to: date = None,
+                 team: str = None, after: tuple = None, limit: int = None):
+    """
+    Consulta de eventos ordenados por (date_event, id_event) con filtros opcionales.
+    `after` es el cursor (date_event, id_event) del último evento de la página anterior.
+    Las filas tienen event_data, date_event e id_event.
+    """
+    query = select(EventModel.event_data, EventModel.date_event, EventModel.id_event)
+    if id_league:
+        query = query.where(EventModel.id_league == id_league)
+    if date_from:
+        query = query.where(EventModel.date_event >= date_from)
+    if date_to:
+        query = query.where(EventModel.date_event <= date_to)
+    if team:
+        if dialect_name == "postgresql":
+            # @> sobre JSONB usa el índice GIN ix_events_event_data_gin
+            event_data = type_coerce(EventModel.event_data, postgresql.JSONB)
+            query = query.where(or_(
+                event_data.contains({"idHomeTeam": team}),
+                event_data.contains({"idAwayTeam": team}),
+            ))
+        else:
+            query = query.where(or_(
+                EventModel.event_data["idHomeTeam"].as_string() == team,
+                EventModel.event_data["idAwayTeam"].as_string() == team,
+            ))
+    if after:
+        query = query.where(tuple_(EventModel.date_event, EventModel.id_event) > tuple_(*after))
+    query = query.order_by(EventModel.date_event, EventModel.id_event)
+    if limit:
+        query = query.limit(limit)
+    return query
+
+async def list_events(db: AsyncSession, **filters) -> list:
+    result = await db.execute(events_query(db.bind.dialect.name, **filters))
+    return result.all()
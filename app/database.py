@@ -1,9 +1,19 @@
-from sqlalchemy import create_engine
+import asyncio
+import time
+
+from fastapi import Request, Response
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 # import os
 # from dotenv import load_dotenv
 from app.config import get_settings
+from app.utils.cache import MISSING, TTLCache
+from app.utils.logging import logger
+from app.utils.metrics import instrument_engine, registry
 
 settings = get_settings()
 
@@ -13,19 +23,242 @@ DB_HOST = settings.db_host
 DB_PORT = settings.db_port
 DB_NAME = settings.db_name
 
+# Drivers asíncronos equivalentes a cada driver síncrono
+ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
 # Crear cadena de conexión para PostgreSQL
-connection_string = f"postgresql+psycopg2://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+connection_string = settings.database_url or f"postgresql+psycopg2://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+
+
+def async_url(url: str):
+    """Convierte una URL síncrona (psycopg2, sqlite) en la del driver asíncrono (asyncpg, aiosqlite)."""
+    parsed = make_url(url)
+    return parsed.set(drivername=ASYNC_DRIVERS.get(parsed.get_backend_name(), parsed.drivername))
+
+
+def pool_options(url: str) -> dict:
+    options = {}
+    if url.startswith("sqlite"):
+        # SQLite en memoria no admite pool; aiosqlite con archivo usa NullPool si no se indica uno
+        if make_url(url).database in (None, "", ":memory:"):
+            return {}
+        options["poolclass"] = AsyncAdaptedQueuePool
+    return options | {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
 
-# Crear el engine para la base de datos PostgreSQL
-engine = create_engine(connection_string)
+# SQLite (usado como sustituto local) necesita compartir conexiones entre hilos
+connect_args = {"check_same_thread": False} if connection_string.startswith("sqlite") else {}
 
+# Engine síncrono: solo para scripts y creación de tablas
+engine = create_engine(connection_string, connect_args=connect_args)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Engine asíncrono usado por la API
+async_engine = create_async_engine(async_url(connection_string), **pool_options(connection_string))
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+# Duración y errores de cada sentencia SQL en /metrics
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
+
 Base = declarative_base()
 
-#Dependency para obtener la sesión de la BD
-def get_db():
-    db = SessionLocal()
-    try:
+db_reads = registry.counter("db_reads_total", "Sesiones de lectura por destino (primario o réplica)", ("target",))
+
+# Atraso de una réplica de Postgres; 0 si ya aplicó todo lo recibido (un primario sin escrituras
+# recientes no aparece atrasado) y NULL si no es una réplica
+REPLICA_LAG_SQL = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+
+class Replica:
+    def __init__(self, name: str, url: str):
+        self.name = name
+        self.url = make_url(url).render_as_string(hide_password=True)
+        self.engine = create_async_engine(async_url(url), **pool_options(url))
+        self.healthy = False
+        self.error = None
+        self.lag = None
+        self.checked_at = None
+        instrument_engine(self.engine.sync_engine)
+
+        @event.listens_for(self.engine.sync_engine, "handle_error")
+        def handle_error(exception_context):
+            # Una conexión caída en una lectura saca la réplica de la rotación hasta el próximo check
+            if exception_context.is_disconnect and self.healthy:
+                self.mark(False, "conexión perdida")
+
+    def mark(self, healthy: bool, error: str = None):
+        if healthy != self.healthy or self.checked_at is None:
+            logger.warning("Réplica {name} {state}{detail}", name=self.name,
+                           state="disponible" if healthy else "fuera de rotación", detail=f": {error}" if error else "")
+        self.healthy = healthy
+        self.error = error
+
+    def stats(self) -> dict:
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "error": self.error,
+            "lag_seconds": self.lag,
+            "checked_seconds_ago": round(time.monotonic() - self.checked_at, 1) if self.checked_at else None,
+        }
+
+
+class ReadReplicas:
+    """
+    Réplicas de lectura (DB_REPLICA_URLS) con health check en segundo plano: SELECT 1 con
+    DB_REPLICA_CHECK_TIMEOUT y, en Postgres con DB_REPLICA_MAX_LAG_SECONDS > 0, el atraso de
+    replicación. Las lecturas se reparten en round-robin entre las réplicas sanas; sin ninguna
+    van al primario. Una réplica empieza fuera de rotación hasta pasar su primer check.
+    """
+
+    def __init__(self, urls: list, check_interval: float, check_timeout: float, max_lag: float):
+        self.replicas = [Replica(f"replica{index}", url) for index, url in enumerate(urls)]
+        self.check_interval = check_interval
+        self.check_timeout = check_timeout
+        self.max_lag = max_lag
+        self._next = 0
+        self._task = None
+
+    def pick(self):
+        """Siguiente réplica sana, o None si no hay ninguna."""
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        self._next = (self._next + 1) % len(healthy)
+        return healthy[self._next]
+
+    async def check_one(self, replica: Replica):
+        try:
+            async with asyncio.timeout(self.check_timeout):
+                async with replica.engine.connect() as connection:
+                    await connection.execute(text("SELECT 1"))
+                    if self.max_lag and connection.dialect.name == "postgresql":
+                        replica.lag = float(await connection.scalar(REPLICA_LAG_SQL) or 0)
+        except Exception as e:
+            replica.mark(False, (str(e) or type(e).__name__).splitlines()[0])
+        else:
+            if self.max_lag and replica.lag is not None and replica.lag > self.max_lag:
+                replica.mark(False, f"atraso de {replica.lag:.1f}s")
+            else:
+                replica.mark(True)
+        replica.checked_at = time.monotonic()
+
+    async def check(self):
+        await asyncio.gather(*(self.check_one(replica) for replica in self.replicas))
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.check_interval)
+            await self.check()
+
+    async def start(self):
+        if not self.replicas:
+            return
+        await self.check()
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+    def stats(self) -> dict:
+        return {replica.name: replica.stats() for replica in self.replicas}
+
+
+read_replicas = ReadReplicas(
+    settings.db_replica_urls,
+    settings.db_replica_check_interval,
+    settings.db_replica_check_timeout,
+    settings.db_replica_max_lag_seconds,
+)
+
+
+@registry.collector
+def replica_metrics():
+    yield "db_replica_healthy", "gauge", "Réplica de lectura en rotación (1) o fuera (0)", [
+        ({"replica": replica.name}, int(replica.healthy)) for replica in read_replicas.replicas
+    ]
+
+
+# Read-your-writes: tras una escritura las lecturas van al primario durante
+# DB_READ_YOUR_WRITES_SECONDS, por cookie (el cliente que escribió, en cualquier worker) o por
+# clave en este proceso (ej. "events" tras una actualización, el email tras un registro)
+PRIMARY_COOKIE = "db_primary"
+recent_writes = TTLCache(10_000, settings.db_read_your_writes_seconds)
+
+
+def pin(key: str):
+    if read_replicas.replicas and settings.db_read_your_writes_seconds > 0:
+        recent_writes.set(key, True)
+
+
+def pinned(key: str) -> bool:
+    return recent_writes.get(key) is not MISSING
+
+
+def on_replica(db: AsyncSession) -> bool:
+    return db.bind is not async_engine
+
+
+def read_session(primary: bool = False) -> AsyncSession:
+    """Sesión para lecturas: una réplica sana o, con `primary` o sin réplicas sanas, el primario."""
+    replica = None if primary else read_replicas.pick()
+    db_reads.inc(target=replica.name if replica else "primary")
+    return AsyncSessionLocal(bind=replica.engine) if replica else AsyncSessionLocal()
+
+
+def read_your_writes(request: Request, *keys) -> bool:
+    return PRIMARY_COOKIE in request.cookies or any(pinned(key) for key in keys)
+
+
+def read_db(*keys):
+    """Dependency de solo lectura; va al primario si hubo una escritura reciente del cliente o de `keys`."""
+    async def dependency(request: Request):
+        async with read_session(read_your_writes(request, *keys)) as db:
+            yield db
+
+    return dependency
+
+
+async def get_write_db(response: Response):
+    """Dependency para escrituras (primario); cada commit fija la cookie de read-your-writes."""
+    async with AsyncSessionLocal() as db:
+        if read_replicas.replicas and settings.db_read_your_writes_seconds > 0:
+            max_age = max(1, int(settings.db_read_your_writes_seconds))
+            event.listen(
+                db.sync_session, "after_commit",
+                lambda session: response.set_cookie(PRIMARY_COOKIE, "1", max_age=max_age, httponly=True),
+            )
         yield db
-    finally:
-        db.close()
+
+
+async def warm_up_pool(connections: int) -> int:
+    """
+    Abre `connections` conexiones del pool (hasta DB_POOL_SIZE) con un SELECT 1 para que las
+    primeras peticiones no paguen la conexión ni la autenticación. Devuelve las conexiones abiertas.
+    """
+    async def ping():
+        async with async_engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+
+    count = min(connections, settings.db_pool_size)
+    # Todas a la vez para que el pool abra conexiones distintas en vez de reutilizar la primera
+    await asyncio.gather(*(ping() for _ in range(count)))
+    return count
@@ -0,0 +1,255 @@
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from sqlalchemy import text
+
+from app.config import get_settings
+from app.database import async_engine
+from app.utils.logging import logger
+
+settings = get_settings()
+
+# Estados en los que un job todavía no termina
+ACTIVE_STATUSES = ("queued", "running")
+
+
+class AdvisoryLock:
+    """
+    Advisory lock de Postgres a nivel de sesión para que una sola réplica actualice a la vez.
+    En otras BD (SQLite local) no hace nada y siempre se obtiene.
+    """
+
+    def __init__(self, key: int):
+        self.key = key
+        self.connection = None
+
+    async def acquire(self) -> bool:
+        if async_engine.dialect.name != "postgresql":
+            return True
+        connection = await async_engine.connect()
+        acquired = (await connection.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": self.key})).scalar()
+        await connection.commit()
+        if not acquired:
+            await connection.close()
+            return False
+        self.connection = connection
+        return True
+
+    async def release(self):
+        if self.connection is None:
+            return
+        try:
+            await self.connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": self.key})
+            await self.connection.commit()
+        finally:
+            await self.connection.close()
+            self.connection = None
+
+
+class JobStream:
+    """
+    Registros de un job para un cliente de streaming. Si el cliente no lee y se acumulan más de
+    `maxsize` registros se deja de alimentar (el job no espera a clientes lentos) y el stream
+    termina con un registro de error.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.queue = asyncio.Queue()
+        self.overflowed = False
+
+    def put(self, record, final: bool = False) -> bool:
+        if not final and self.queue.qsize() >= self.maxsize:
+            self.overflowed = True
+            return False
+        self.queue.put_nowait(record)
+        return True
+
+    async def records(self, heartbeat: float = None):
+        """Itera los registros hasta que el job termina; sin registros por `heartbeat` segundos emite uno vacío."""
+        while True:
+            if self.overflowed and self.queue.empty():
+                yield {"type": "error", "detail": "El cliente no leyó a tiempo; consulta el job por su id"}
+                return
+            try:
+                record = await asyncio.wait_for(self.queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                yield {"type": "heartbeat"}
+                continue
+            if record is None:
+                return
+            yield record
+
+
+class RefreshJob:
+    def __init__(self, league_ids: list, force_predictions: bool, trigger: str):
+        self.id = uuid.uuid4().hex
+        self.league_ids = list(league_ids)
+        self.force_predictions = force_predictions
+        self.trigger = trigger  # "api" o "scheduler"
+        self.status = "queued"
+        self.progress = {"leagues_total": len(self.league_ids), "leagues_done": 0, "events": 0}
+        self.result = None
+        self.error = None
+        self.created_at = datetime.now(timezone.utc)
+        self.started_at = None
+        self.finished_at = None
+        self.task = None
+        self.streams = []
+
+    def subscribe(self, maxsize: int) -> JobStream:
+        """Stream con el estado actual del job y los registros que publique desde ahora hasta que termine."""
+        stream = JobStream(maxsize)
+        stream.put(self.summary(), final=True)
+        if self.status in ACTIVE_STATUSES:
+            self.streams.append(stream)
+        else:
+            stream.put(None, final=True)
+        return stream
+
+    def unsubscribe(self, stream: JobStream):
+        if stream in self.streams:
+            self.streams.remove(stream)
+
+    def publish(self, record: dict):
+        for stream in list(self.streams):
+            if not stream.put(record):
+                self.streams.remove(stream)
+
+    def close_streams(self):
+        for stream in self.streams:
+            stream.put(self.summary(), final=True)
+            stream.put(None, final=True)
+        self.streams = []
+
+    def summary(self) -> dict:
+        return {"type": "job", **self.to_dict()}
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "trigger": self.trigger,
+            "leagues": self.league_ids,
+            "force_predictions": self.force_predictions,
+            "progress": self.progress,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class RefreshManager:
+    """
+    Ejecuta las actualizaciones de eventos en segundo plano, una a la vez (single-flight):
+    un asyncio.Lock dentro del proceso y un advisory lock de Postgres entre réplicas.
+    `run(job)` es la corrutina que hace la actualización y devuelve el resumen.
+    """
+
+    def __init__(self, run, max_jobs: int = 50):
+        self.run = run
+        self.max_jobs = max_jobs
+        self.jobs = OrderedDict()
+        self.lock = asyncio.Lock()
+        self.last_run = {}
+        self.scheduler_task = None
+
+    def enqueue(self, league_ids: list, force_predictions: bool = False, trigger: str = "api") -> RefreshJob:
+        """Encola una actualización; si ya hay una pendiente que cubre las mismas ligas se devuelve esa."""
+        for job in self.jobs.values():
+            if (
+                job.status in ACTIVE_STATUSES
+                and set(league_ids) <= set(job.league_ids)
+                and (job.force_predictions or not force_predictions)
+            ):
+                return job
+
+        job = RefreshJob(league_ids, force_predictions, trigger)
+        self.jobs[job.id] = job
+        self._trim()
+        job.task = asyncio.create_task(self._execute(job))
+        return job
+
+    def get(self, job_id: str):
+        return self.jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        job = self.jobs.get(job_id)
+        if job is None or job.status not in ACTIVE_STATUSES:
+            return False
+        job.task.cancel()
+        return True
+
+    def _trim(self):
+        # Solo se descartan jobs terminados, empezando por los más viejos
+        for job_id in list(self.jobs):
+            if len(self.jobs) <= self.max_jobs:
+                break
+            if self.jobs[job_id].status not in ACTIVE_STATUSES:
+                del self.jobs[job_id]
+
+    async def _execute(self, job: RefreshJob):
+        try:
+            async with self.lock:
+                advisory_lock = AdvisoryLock(settings.refresh_lock_key)
+                if not await advisory_lock.acquire():
+                    job.status = "skipped"
+                    job.error = "Otra réplica está actualizando los eventos"
+                    return
+                try:
+                    job.status = "running"
+                    job.started_at = datetime.now(timezone.utc)
+                    job.result = await self.run(job)
+                    job.status = "succeeded"
+                finally:
+                    await advisory_lock.release()
+        except asyncio.CancelledError:
+            job.status = "cancelled"
+            raise
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            logger.error("Error en la actualización {job_id}: {error}", job_id=job.id, error=str(e))
+        finally:
+            job.finished_at = datetime.now(timezone.utc)
+            for id_league in job.league_ids:
+                self.last_run[id_league] = time.monotonic()
+            job.close_streams()
+
+    def start_scheduler(self, intervals: dict, initial_delay: int = 0):
+        """
+        Programa la actualización de cada liga según `intervals` ({id_league: segundos}); las ligas
+        que vencen a la vez van en un mismo job. Las ligas con intervalo 0 no se programan.
+        """
+        intervals = {id_league: interval for id_league, interval in intervals.items() if interval > 0}
+        if not intervals or self.scheduler_task is not None:
+            return
+        self.scheduler_task = asyncio.create_task(self._scheduler_loop(intervals, initial_delay))
+
+    async def _scheduler_loop(self, intervals: dict, initial_delay: int):
+        await asyncio.sleep(initial_delay)
+        tick = min(min(intervals.values()), 60)
+        while True:
+            now = time.monotonic()
+            due = [
+                id_league for id_league, interval in intervals.items()
+                if id_league not in self.last_run or now - self.last_run[id_league] >= interval
+            ]
+            if due:
+                self.enqueue(due, trigger="scheduler")
+            await asyncio.sleep(tick)
+
+    async def stop(self):
+        """Detiene el scheduler y cancela los jobs pendientes al apagar la aplicación."""
+        tasks = [job.task for job in self.jobs.values() if job.status in ACTIVE_STATUSES]
+        if self.scheduler_task is not None:
+            tasks.append(self.scheduler_task)
+            self.scheduler_task = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,88 @@
+import asyncio
+import random
+from functools import lru_cache
+
+from app.config import get_settings
+from app.utils.http import get_client
+from app.utils.metrics import track_upstream
+
+settings = get_settings()
+
+# El SDK de openai se importa en la primera llamada al LLM: es la dependencia más pesada del
+# arranque (~0.3s) y los workers que solo sirven /next nunca la usan.
+
+
+class LLMError(Exception):
+    """Error del proveedor del LLM (envuelve openai.OpenAIError para no importar openai al cargar el módulo)."""
+
+
+@lru_cache(maxsize=1)
+def retryable_errors() -> tuple:
+    """Errores transitorios que vale la pena reintentar."""
+    import openai
+
+    return (
+        openai.APITimeoutError,
+        openai.APIConnectionError,
+        openai.RateLimitError,
+        openai.InternalServerError,
+    )
+
+
+_client = None
+_http_client = None
+
+
+def get_llm_client():
+    """Cliente OpenAI asíncrono (openai.AsyncOpenAI) sobre el cliente HTTP compartido "llm"."""
+    import openai
+
+    global _client, _http_client
+    http_client = get_client("llm")
+    if _client is None or _http_client is not http_client:
+        _client = openai.AsyncOpenAI(
+            api_key=settings.openai_key,
+            base_url=settings.openai_base_url,
+            http_client=http_client,
+            max_retries=0,  # los reintentos se manejan en complete() con backoff propio
+        )
+        _http_client = http_client
+    return _client
+
+
+async def complete(prompt: str, max_tokens: int, **kwargs) -> str:
+    """
+    Pide una completion sin bloquear el event loop.
+    Reintenta errores transitorios con backoff exponencial y jitter completo; si la tarea
+    se cancela (por ejemplo porque el cliente se desconectó) la petición en curso se aborta.
+    `kwargs` se pasan tal cual a chat.completions.create (ej. response_format).
+    Los errores de openai que no se resuelven reintentando se lanzan como LLMError.
+    """
+    import openai
+
+    client = get_llm_client()
+    retryable = retryable_errors()
+    for attempt in range(settings.llm_max_retries + 1):
+        try:
+            # Cada intento se mide por separado; los errores se cuentan por tipo (RateLimitError, etc.)
+            with track_upstream("llm", "chat.completions"):
+                response = await client.chat.completions.create(
+                    model=settings.openai_model,
+                    messages=[{"role": "user", "content": prompt}],
+                    max_tokens=max_tokens,
+                    timeout=settings.llm_timeout,
+                    **kwargs,
+                )
+            choice = response.choices[0]
+        except retryable as e:
+            if attempt == settings.llm_max_retries:
+                raise LLMError(str(e)) from e
+            delay = min(settings.llm_backoff_max, settings.llm_backoff_base * 2 ** attempt)
+            await asyncio.sleep(random.uniform(0, delay))
+            continue
+        except openai.OpenAIError as e:
+            raise LLMError(str(e)) from e
+        # Sin texto (ej. finish_reason "content_filter" o una respuesta solo con tool calls)
+        if choice.message.content is None:
+            raise LLMError(f"Respuesta sin contenido (finish_reason={choice.finish_reason})")
+        return choice.message.content.strip()
@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.config import get_settings
+from app.crud import delete_locations, get_location, save_location
+from app.database import AsyncSessionLocal
+from app.utils.cache import MISSING, TTLCache
+from app.utils.logging import logger
+from app.utils.metrics import registry
+
+settings = get_settings()
+
+
+class LocationCache:
+    """
+    Caché de dos niveles para ubicaciones de estadios y equipos:
+    1) LRU en memoria con TTL, 2) tabla `locations` en la BD.
+    Las entradas se guardan como dict con location (las coordenadas de un strMap se convierten al
+    usarlas con parse_coordinates, que memoriza cada texto).
+    """
+
+    def __init__(self, maxsize: int, ttl: int):
+        self.ttl = ttl
+        self.memory = TTLCache(maxsize, ttl)
+        self.db_hits = 0
+        self.db_misses = 0
+
+    async def _db_get(self, kind: str, ref_id: str):
+        min_updated_at = datetime.now(timezone.utc) - timedelta(seconds=self.ttl)
+        async with AsyncSessionLocal() as db:
+            row = await get_location(db, kind, ref_id, min_updated_at)
+            if row is None:
+                return MISSING
+            return {"location": row.location}
+
+    async def _db_set(self, kind: str, ref_id: str, entry: dict):
+        async with AsyncSessionLocal() as db:
+            try:
+                await save_location(db, kind, ref_id, entry["location"])
+            except SQLAlchemyError as e:
+                # La caché en memoria ya la tiene; se vuelve a guardar cuando expire
+                await db.rollback()
+                logger.warning("No se pudo guardar la ubicación {kind}:{ref_id}: {error}", kind=kind, ref_id=ref_id, error=str(e))
+
+    async def _db_delete(self, kind: str = None, ref_id: str = None) -> int:
+        async with AsyncSessionLocal() as db:
+            return await delete_locations(db, kind, ref_id)
+
+    async def get(self, kind: str, ref_id: str):
+        """Devuelve la entrada cacheada o MISSING si hay que consultar el upstream."""
+        key = (kind, ref_id)
+        entry = self.memory.get(key)
+        if entry is not MISSING:
+            return entry
+        try:
+            entry = await self._db_get(kind, ref_id)
+        except SQLAlchemyError as e:
+            logger.warning("Error al leer la ubicación {kind}:{ref_id} de la BD: {error}", kind=kind, ref_id=ref_id, error=str(e))
+            entry = MISSING
+        if entry is MISSING:
+            self.db_misses += 1
+            return MISSING
+        self.db_hits += 1
+        self.memory.set(key, entry)
+        return entry
+
+    async def set(self, kind: str, ref_id: str, location):
+        entry = {"location": location}
+        self.memory.set((kind, ref_id), entry)
+        await self._db_set(kind, ref_id, entry)
+
+    async def invalidate(self, kind: str = None, ref_id: str = None) -> dict:
+        """Invalida ambos niveles; sin filtros vacía la caché completa."""
+        if kind or ref_id:
+            keys = [key for key in self.memory.keys()
+                    if (not kind or key[0] == kind) and (not ref_id or key[1] == ref_id)]
+            removed = sum(self.memory.delete(key) for key in keys)
+        else:
+            removed = self.memory.clear()
+        deleted = await self._db_delete(kind, ref_id)
+        return {"memory": removed, "database": deleted}
+
+    def stats(self) -> dict:
+        return {
+            "memory": self.memory.stats(),
+            "database": {"hits": self.db_hits, "misses": self.db_misses},
+        }
+
+
+location_cache = LocationCache(settings.location_cache_size, settings.location_cache_ttl)
+registry.cache("location", location_cache.memory.stats)
+registry.cache("location_db", lambda: location_cache.stats()["database"])
@@ -1,9 +1,19 @@
-from fastapi import FastAPI
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import Depends, FastAPI, Response
 from app.routes import users
-from app.routes.events import router as events
+from app.routes.events import router as events, refresh_manager, league_intervals
 
-from app.database import Base, engine
+from app.database import Base, engine, async_engine, read_replicas, warm_up_pool
 from app.models import User
+from app.utils.http import create_clients, close_clients, warm_up_clients
+from app.utils.logging import logger
+from app.passwords import password_hasher
+from app.tokens import require_token
+from app.config import get_settings
+from app.utils.metrics import CONTENT_TYPE, MetricsMiddleware, registry
 
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -11,7 +21,54 @@ from fastapi.middleware.cors import CORSMiddleware
 # print("Creando tablas en la base de datos...")
 # Base.metadata.create_all(bind=engine)
 
-app = FastAPI()
+async def warm_up(settings):
+    """Conexiones de BD y HTTP abiertas antes de la primera petición; si algo falla, el worker arranca igual."""
+    start = time.perf_counter()
+    steps = {}
+    if settings.warmup_db_connections > 0:
+        steps["db"] = warm_up_pool(settings.warmup_db_connections)
+    if settings.warmup_http:
+        steps["http"] = warm_up_clients()
+    try:
+        async with asyncio.timeout(settings.warmup_timeout):
+            results = await asyncio.gather(*steps.values(), return_exceptions=True)
+    except TimeoutError:
+        logger.warning("El calentamiento no terminó en {timeout}s", timeout=settings.warmup_timeout)
+        return
+    for name, result in zip(steps, results):
+        if isinstance(result, Exception):
+            logger.warning("Falló el calentamiento de {step}: {error}", step=name, error=str(result))
+    logger.info("Calentamiento en {ms:.0f}ms: {results}", ms=(time.perf_counter() - start) * 1000,
+                results=dict(zip(steps, results)))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    settings = get_settings()
+    # Clientes HTTP compartidos (keep-alive) para todos los servicios externos
+    create_clients()
+    await warm_up(settings)
+    # Health check de las réplicas de lectura (primero uno inmediato, luego cada DB_REPLICA_CHECK_INTERVAL)
+    await read_replicas.start()
+    # Actualización periódica de eventos en segundo plano
+    refresh_manager.start_scheduler(
+        league_intervals(), settings.refresh_initial_delay_seconds
+    )
+    # Con varios workers, las estadísticas de este proceso llegan a /metrics aunque el scrape lo atienda otro
+    metrics_sync = None
+    if registry.multiprocess:
+        metrics_sync = asyncio.create_task(registry.sync_periodically(settings.metrics_sync_seconds))
+    yield
+    if metrics_sync:
+        metrics_sync.cancel()
+        registry.sync()
+    await refresh_manager.stop()
+    await close_clients()
+    await read_replicas.stop()
+    await async_engine.dispose()
+    password_hasher.shutdown()
+
+app = FastAPI(lifespan=lifespan)
 
 @app.get("/")
 def read_root():
@@ -19,7 +76,9 @@ def read_root():
 
 app.include_router(users.router, prefix="/kingtide/api/users", tags=["Users"])
 
-app.include_router(events, prefix="/kingtide/api/events", tags=["Events"])
+# Los endpoints de eventos exigen un Bearer token (validado con la caché de tokens)
+events_dependencies = [Depends(require_token)] if get_settings().events_require_auth else []
+app.include_router(events, prefix="/kingtide/api/events", tags=["Events"], dependencies=events_dependencies)
 
 app.add_middleware(
     CORSMiddleware,
@@ -29,5 +88,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Latencia por ruta, upstreams, BD y cachés en formato Prometheus
+if get_settings().metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        return Response(registry.render(), media_type=CONTENT_TYPE)
+
 if __name__ == '__main__':
     uvicorn.run("main:app", host='127.0.0.1', port=8000, log_level="info", reload=True)
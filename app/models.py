@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Boolean, JSON, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, JSON, Date, DateTime, Index, UniqueConstraint
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.sql import func
 from app.database import Base
 
@@ -12,11 +13,46 @@ class User(Base):
 
 class EventModel(Base):
     __tablename__ = "events"
+    __table_args__ = (
+        # Filtros de /next por liga y rango de fechas
+        Index("ix_events_league_date", "id_league", "date_event", "id_event"),
+        # Orden y paginación por cursor (date_event, id_event) sin filtro de liga
+        Index("ix_events_date_id", "date_event", "id_event"),
+        # Búsqueda por equipo con event_data @> '{"idHomeTeam": ...}' (solo Postgres)
+        Index(
+            "ix_events_event_data_gin", "event_data",
+            postgresql_using="gin", postgresql_ops={"event_data": "jsonb_path_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     id_event = Column(String, unique=True, nullable=False)
     id_league = Column(String, nullable=False)
-    date_event = Column(String, nullable=False)
-    event_data = Column(JSON, nullable=False)
+    date_event = Column(Date, nullable=False)
+    event_data = Column(JSON().with_variant(JSONB(), "postgresql"), nullable=False)
+    prediction_hash = Column(String, nullable=True)  # hash de las entradas del pronóstico guardado
+    predicted_at = Column(DateTime(timezone=True), nullable=True)
+    enriched_at = Column(DateTime(timezone=True), nullable=True)  # última vez que se obtuvieron clima y pronóstico
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+
+class LocationModel(Base):
+    """Ubicación resuelta de un estadio (lookupvenue.php) o equipo (lookupteam.php)."""
+    __tablename__ = "locations"
+    __table_args__ = (UniqueConstraint("kind", "ref_id", name="uq_locations_kind_ref_id"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False)  # "venue" (idVenue) o "team" (idTeam)
+    ref_id = Column(String, nullable=False)
+    location = Column(String, nullable=True)  # strMap / strLocation; None si el upstream no lo tiene
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class RevokedToken(Base):
+    """Tokens revocados antes de su expiración; `jti` es el claim jti o el sha256 del token."""
+    __tablename__ = "revoked_tokens"
+
+    jti = Column(String, primary_key=True)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    revoked_at = Column(DateTime(timezone=True), server_default=func.now())
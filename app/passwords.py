@@ -0,0 +1,133 @@
+import asyncio
+import multiprocessing
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+
+from app.config import get_settings
+from app.utils.metrics import registry
+
+settings = get_settings()
+
+
+class PasswordQueueFull(Exception):
+    """Hay demasiados hashes de contraseña pendientes; el cliente debe reintentar más tarde."""
+
+
+@lru_cache(maxsize=4)
+def crypt_context(rounds: int):
+    # passlib (y bcrypt) se importan con el primer hash; en un executor de procesos, en cada proceso
+    from passlib.context import CryptContext
+
+    # Los hashes con otro costo quedan "deprecated" y verify_and_update los recalcula
+    return CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds)
+
+
+# Funciones de módulo para que se puedan enviar a un ProcessPoolExecutor
+def hash_password(password: str, rounds: int) -> str:
+    return crypt_context(rounds).hash(password)
+
+
+def verify_and_update_password(password: str, hashed: str, rounds: int) -> tuple:
+    """Devuelve (válida, nuevo_hash); nuevo_hash es None si el hash guardado ya tiene el costo actual."""
+    return crypt_context(rounds).verify_and_update(password, hashed)
+
+
+password_seconds = registry.histogram(
+    "password_hash_seconds", "Duración de hash/verificación de contraseñas, incluida la espera en cola", ("executor",)
+)
+
+
+class PasswordHasher:
+    """
+    Ejecuta bcrypt (100-300ms de CPU por llamada) en un executor propio y acotado, para que un
+    pico de logins no ocupe el event loop ni el threadpool de FastAPI.
+    `kind` es "thread" (bcrypt libera el GIL) o "process" (cores separados).
+    Si hay más de `workers + max_queue` operaciones pendientes se lanza PasswordQueueFull.
+    """
+
+    def __init__(self, rounds: int, kind: str = "thread", workers: int = 2, max_queue: int = 64):
+        if kind not in ("thread", "process"):
+            raise ValueError("kind debe ser 'thread' o 'process'")
+        self.rounds = rounds
+        self.kind = kind
+        self.workers = workers
+        self.max_queue = max_queue
+        self.pending = 0
+        self.max_pending = 0
+        self.rejected = 0
+        self.rehashed = 0
+        self.latencies = deque(maxlen=1000)  # ms de las últimas operaciones (espera + bcrypt)
+        self._executor = None
+
+    def _get_executor(self):
+        if self._executor is None:
+            if self.kind == "process":
+                # spawn: hacer fork de un proceso con hilos y event loop activos no es seguro
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        return self._executor
+
+    async def _run(self, fn, *args):
+        if self.pending >= self.workers + self.max_queue:
+            self.rejected += 1
+            raise PasswordQueueFull()
+        self.pending += 1
+        self.max_pending = max(self.max_pending, self.pending)
+        start = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self.pending -= 1
+            elapsed = time.perf_counter() - start
+            self.latencies.append(elapsed * 1000)
+            password_seconds.observe(elapsed, executor=self.kind)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password, self.rounds)
+
+    async def verify_and_update(self, password: str, hashed: str) -> tuple:
+        valid, new_hash = await self._run(verify_and_update_password, password, hashed, self.rounds)
+        if new_hash:
+            self.rehashed += 1
+        return valid, new_hash
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        latencies = sorted(self.latencies)
+
+        def percentile(p: float):
+            return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))], 1) if latencies else None
+
+        return {
+            "executor": self.kind,
+            "workers": self.workers,
+            "rounds": self.rounds,
+            "pending": self.pending,
+            "queue_depth": max(0, self.pending - self.workers),
+            "max_pending": self.max_pending,
+            "rejected": self.rejected,
+            "rehashed": self.rehashed,
+            "latency_ms": {"p50": percentile(0.5), "p99": percentile(0.99), "samples": len(latencies)},
+        }
+
+
+password_hasher = PasswordHasher(
+    settings.bcrypt_rounds, settings.password_executor, settings.password_workers, settings.password_max_queue
+)
+
+
+@registry.collector
+def password_metrics():
+    stats = password_hasher.stats()
+    yield "password_pending", "gauge", "Operaciones de bcrypt en curso o en cola", [({}, stats["pending"])]
+    yield "password_rejected_total", "counter", "Operaciones rechazadas con la cola llena", [({}, stats["rejected"])]
+    yield "password_rehashed_total", "counter", "Hashes recalculados al cambiar BCRYPT_ROUNDS", [({}, stats["rehashed"])]
@@ -0,0 +1,90 @@
+import hashlib
+import json
+from datetime import datetime, timezone
+
+from app.config import get_settings
+
+settings = get_settings()
+
+# Prefijo de los pronósticos fallidos; nunca se reutilizan
+PREDICTION_ERROR_PREFIX = "Error al obtener el pronóstico"
+
+
+def _bucket(value, step: float):
+    """Discretiza un valor numérico del clima; los valores no numéricos ("Desconocida") se usan tal cual."""
+    if isinstance(value, (int, float)) and step > 0:
+        return round(round(value / step) * step, 2)
+    return str(value)
+
+
+def weather_bucket(weather: dict) -> dict:
+    return {
+        "temperature": _bucket(weather.get("temperature"), settings.prediction_temperature_step),
+        "wind_speed": _bucket(weather.get("wind_speed"), settings.prediction_wind_step),
+        "description": str(weather.get("description", "")).casefold(),
+    }
+
+
+def prediction_hash(home_team: str, away_team: str, date: str, weather: dict) -> str:
+    """Hash de las entradas del prompt: equipos, fecha y franja del clima."""
+    payload = {
+        "home": home_team,
+        "away": away_team,
+        "date": date,
+        "weather": weather_bucket(weather),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+def can_reuse_prediction(stored: dict, input_hash: str, force: bool = False) -> bool:
+    """
+    Indica si el pronóstico guardado sigue siendo válido para las mismas entradas.
+    `stored` tiene hash, predicted_at y pronostico del evento en la BD.
+    Con prediction_max_age > 0 los pronósticos más viejos se regeneran aunque el hash coincida.
+    """
+    if force or not stored or stored.get("hash") != input_hash:
+        return False
+    pronostico = stored.get("pronostico")
+    if not pronostico or pronostico.startswith(PREDICTION_ERROR_PREFIX):
+        return False
+
+    max_age = settings.prediction_max_age
+    if max_age > 0:
+        predicted_at = stored.get("predicted_at")
+        if predicted_at is None:
+            return False
+        if predicted_at.tzinfo is None:
+            predicted_at = predicted_at.replace(tzinfo=timezone.utc)
+        if (datetime.now(timezone.utc) - predicted_at).total_seconds() > max_age:
+            return False
+    return True
+
+
+def parse_batch_predictions(content: str, event_ids: list) -> dict:
+    """
+    Interpreta la respuesta JSON de un pronóstico por lote.
+    Acepta {"predictions": [{"idEvent": ..., "pronostico": ...}]} o {idEvent: pronostico};
+    descarta ids desconocidos y textos vacíos. Si el JSON no es válido devuelve {}.
+    """
+    try:
+        data = json.loads(content)
+    except (TypeError, ValueError):
+        return {}
+
+    if isinstance(data, dict) and isinstance(data.get("predictions"), list):
+        items = [
+            (str(item.get("idEvent")), item.get("pronostico"))
+            for item in data["predictions"]
+            if isinstance(item, dict)
+        ]
+    elif isinstance(data, dict):
+        items = [(str(key), value) for key, value in data.items()]
+    else:
+        return {}
+
+    expected = set(event_ids)
+    return {
+        id_event: pronostico.strip()
+        for id_event, pronostico in items
+        if id_event in expected and isinstance(pronostico, str) and pronostico.strip()
+    }
@@ -1,25 +1,63 @@
-from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session
-from datetime import datetime
-from app.database import get_db
-from app.models import EventModel
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import date, datetime, timezone
+from app.database import AsyncSessionLocal, pin, read_db, read_replicas
 from app.schemas import Event
-import httpx
-from pydantic import BaseModel
-from typing import List
-import openai
+from pydantic import BaseModel, ValidationError
+from typing import List, Optional
 
-import re
+import asyncio
+import base64
+import json
+import time
+from contextlib import contextmanager
 
 from app.config import get_settings
+from app.utils.http import get_client
+from app.utils.cache import MISSING, MaterializedResponse, ResponseCache, accepts_encoding
+from app.utils.serialization import dumps, project
+from app.utils.geo import looks_like_coordinates, parse_coordinates
+from app.utils.logging import logger, sampled
+from app.utils.metrics import refresh_stage_seconds
+from app.utils.resilience import UPSTREAM_ERRORS, CircuitOpen, upstreams
+from app.locations import location_cache
+from app.weather import UNKNOWN_WEATHER, weather_cache
+from app.predictions import PREDICTION_ERROR_PREFIX, can_reuse_prediction, parse_batch_predictions, prediction_hash
+from app.llm import LLMError, complete
+from app.crud import delete_stale_events, get_stored_events, list_events, upsert_events
+from app.jobs import RefreshJob, RefreshManager
 
 settings = get_settings()
 
 OPENAI_KEY = settings.openai_key
 WEATHER_KEY = settings.weather_key
 SPORTS_KEY = settings.sports_key
+SPORTS_URL = settings.sports_base_url
+WEATHER_URL = settings.weather_base_url
 
-openai.api_key = OPENAI_KEY
+LEAGUE_IDS = list(settings.leagues)  # IDs de las ligas a consultar (registro en settings.leagues)
+
+
+def league_intervals() -> dict:
+    """Segundos entre actualizaciones programadas de cada liga; 0 en el registro usa refresh_interval_seconds."""
+    return {id_league: settings.leagues.get(id_league) or settings.refresh_interval_seconds for id_league in LEAGUE_IDS}
+
+# Campos de la respuesta de /next, en el orden del schema Event
+EVENT_FIELDS = tuple(Event.model_fields)
+
+# Campos de thesportsdb de los que dependen el clima y el pronóstico de un partido
+ENRICHMENT_FIELDS = ("dateEvent", "strTime", "idVenue", "idHomeTeam", "idAwayTeam", "strHomeTeam", "strAwayTeam")
+
+# Respuesta de /next serializada, se reconstruye al terminar cada actualización
+next_cache = ResponseCache(settings.next_cache_ttl)
+
+
+# Semáforos por servicio externo: limitan las peticiones simultáneas a cada upstream
+sports_semaphore = asyncio.Semaphore(settings.sports_concurrency)
+weather_semaphore = asyncio.Semaphore(settings.weather_concurrency)
+llm_semaphore = asyncio.Semaphore(settings.llm_concurrency)
 
 # class Event(BaseModel):
 #     idEvent: str
@@ -41,162 +79,116 @@ openai.api_key = OPENAI_KEY
 router = APIRouter()
 
 
-def convert_to_decimal(dms_str: str) -> tuple:
+def log_upstream_error(message: str, error: Exception, **fields):
+    """Registra un error de thesportsdb/api_clima; con el circuito abierto solo una muestra, porque falla cada llamada."""
+    if isinstance(error, CircuitOpen) and not sampled():
+        return
+    logger.warning(message, error=str(error) or type(error).__name__, **fields)
+
+
+async def fetch_weather(url: str, label: str) -> dict:
     """
-    Convierte coordenadas en formato DMS o decimal a coordenadas decimales.
-    Ejemplo de entrada:
-    - '42°50′14″N 2°41′17″W' (DMS)
-    - '42°50′14″N 2°41′17″O' (DMS con "O" para oeste)
-    - '42.2118°N 8.7397°W' (decimal con dirección)
+    Consulta api_clima y normaliza la respuesta. Ante errores, plazo vencido o circuito abierto
+    devuelve UNKNOWN_WEATHER (no se guarda en la caché, y la siguiente actualización lo reintenta).
     """
-    try:
-        # Patrón para DMS
-        dms_pattern = r"(\d+)°(\d+)′(\d+)″([NSEWO])"
-        # Patrón para grados decimales con dirección (ej. '42.2118°N')
-        decimal_pattern = r"([\d\.]+)°([NSEWO])"
-
-        dms_matches = re.findall(dms_pattern, dms_str)
-        decimal_matches = re.findall(decimal_pattern, dms_str)
-
-        # Conversión para formato DMS
-        if len(dms_matches) == 2:
-            def dms_to_decimal(degrees, minutes, seconds, direction):
-                decimal = int(degrees) + int(minutes) / 60 + int(seconds) / 3600
-                if direction in ['S', 'W', 'O']:  # Considera 'O' como oeste
-                    decimal = -decimal
-                return decimal
-
-            lat = dms_to_decimal(*dms_matches[0])
-            lon = dms_to_decimal(*dms_matches[1])
-            return lat, lon
-
-        # Conversión para formato decimal con dirección
-        elif len(decimal_matches) == 2:
-            def decimal_with_direction(value, direction):
-                decimal = float(value)
-                if direction in ['S', 'W', 'O']:  # Considera 'O' como oeste
-                    decimal = -decimal
-                return decimal
-
-            lat = decimal_with_direction(*decimal_matches[0])
-            lon = decimal_with_direction(*decimal_matches[1])
-            return lat, lon
-
-        # Si no se encontró un formato válido
-        return None
-
-    except Exception as e:
-        print(f"Error al convertir coordenadas: {e}")
-        return None
+    client = get_client("weather")
+    async with weather_semaphore:
+        try:
+            response = await upstreams["weather"].get(client, url, "clima", hedge=True)
+            weather_data = response.json()
+        except UPSTREAM_ERRORS as e:
+            log_upstream_error("Error al obtener el clima para {label}: {error}", e, label=label)
+            return dict(UNKNOWN_WEATHER)
+
+    # Verificar si la estructura esperada está presente
+    if "main" in weather_data and "wind" in weather_data and "weather" in weather_data:
+        return {
+            "temperature": weather_data["main"]["temp"],
+            "wind_speed": weather_data["wind"]["speed"],
+            "description": weather_data["weather"][0]["description"],
+        }
+    # Estructura diferente (manejo del caso 'desconocido')
+    return dict(UNKNOWN_WEATHER)
 
 # Función para obtener el clima
 async def get_weather(city: str, date: str) -> dict:
     api_key = WEATHER_KEY
-    url = f"http://api_clima:3000/clima?city={city}"
+    url = f"{WEATHER_URL}/clima?city={city}"
     # url = f"http://api.openweathermap.org/data/2.5/weather?q={city}&appid={api_key}&units=metric"
 
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(url)
-            response.raise_for_status()
-            weather_data = response.json()
-            # Verificar si la estructura esperada está presente
-            if "main" in weather_data and "wind" in weather_data and "weather" in weather_data:
-                return {
-                    "temperature": weather_data["main"]["temp"],
-                    "wind_speed": weather_data["wind"]["speed"],
-                    "description": weather_data["weather"][0]["description"],
-                }
-            else:
-                # Estructura diferente (manejo del caso 'desconocido')
-                return {
-                    "temperature": "Desconocida",
-                    "wind_speed": "Desconocido",
-                    "description": "No disponible",
-                }
-        except httpx.RequestError as e:
-            # Registrar el error en los logs del servidor
-            print(f"Error al obtener el clima para la ciudad {city}: {e}")
-            return {"temperature": "Desconocida", "wind_speed": "Desconocido", "description": "No disponible"}
+    return await weather_cache.get_or_fetch(weather_cache.city_key(city), lambda: fetch_weather(url, city))
 
 async def get_weather_by_coordinates(coordinates: str, date: str) -> dict:
-   
-    latitude, longitude = convert_to_decimal(coordinates)
+    parsed = parse_coordinates(coordinates)
+    if parsed is None:
+        logger.warning("Coordenadas no válidas: {coordinates}", coordinates=coordinates)
+        return dict(UNKNOWN_WEATHER)
+    latitude, longitude = parsed
 
     api_key = WEATHER_KEY
     # url = f"http://api.openweathermap.org/data/2.5/weather?lat={latitude}&lon={longitude}&appid={api_key}&units=metric"
-    url = f"http://api_clima:3000/clima?lat={latitude}&lon={longitude}"
+    url = f"{WEATHER_URL}/clima?lat={latitude}&lon={longitude}"
 
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(url)
-            response.raise_for_status()
-            weather_data = response.json()
-            # Verificar si la estructura esperada está presente
-            if "main" in weather_data and "wind" in weather_data and "weather" in weather_data:
-                return {
-                    "temperature": weather_data["main"]["temp"],
-                    "wind_speed": weather_data["wind"]["speed"],
-                    "description": weather_data["weather"][0]["description"],
-                }
-            else:
-                # Estructura diferente (manejo del caso 'desconocido')
-                return {
-                    "temperature": "Desconocida",
-                    "wind_speed": "Desconocido",
-                    "description": "No disponible",
-                }
-        except httpx.RequestError as e:
-            # Registrar el error en los logs del servidor
-            print(f"Error al obtener el clima para la ciudad {coordinates}: {e}")
-            return {"temperature": "Desconocida", "wind_speed": "Desconocido", "description": "No disponible"}
+    key = weather_cache.coordinates_key(latitude, longitude)
+    return await weather_cache.get_or_fetch(key, lambda: fetch_weather(url, coordinates))
 
 
 # Función para obtener `strMap` del evento
 async def get_city_for_event(id_venue: str, country: str) -> str:
+    cached = await location_cache.get("venue", id_venue)
+    if cached is not MISSING:
+        return cached["location"] or country  # Si no hay ciudad, usa country
+
     sports_key = SPORTS_KEY
-    api_url = f"https://www.thesportsdb.com/api/v1/json/{sports_key}/lookupvenue.php?id={id_venue}"
-    async with httpx.AsyncClient() as client:
+    api_url = f"{SPORTS_URL}/{sports_key}/lookupvenue.php?id={id_venue}"
+    client = get_client("sports")
+    async with sports_semaphore:
         try:
-            print("Consultando evento:", id_venue)
-            response = await client.get(api_url)
-            response.raise_for_status()
+            response = await upstreams["sports"].get(client, api_url, "lookupvenue", hedge=True)
             event_data = response.json()
+        except UPSTREAM_ERRORS as e:
+            # Sin guardar en la caché: se usa el país y se vuelve a consultar en la siguiente actualización
+            log_upstream_error("Error al consultar lookupvenue {id}: {error}", e, id=id_venue)
+            return country
 
-            # Imprime la estructura completa de la respuesta
-            print(f"Respuesta del evento {id_venue}:", event_data)
+    city = None
+    if "venues" in event_data and event_data["venues"]:
+        city = event_data["venues"][0].get("strMap", None)
+    # Solo una muestra de las consultas, sin la respuesta completa
+    if sampled():
+        logger.debug("Ubicación del estadio {id}: {location}", id=id_venue, location=city, kind="venue")
 
-            if "venues" in event_data and event_data["venues"]:
-                city = event_data["venues"][0].get("strMap", None)
-                print(f"Ciudad obtenida para el evento {id_venue}: {city}")
-                return city if city else country  # Si no hay ciudad, usa home_team
-            return country  
-        except httpx.RequestError as e:
-            print(f"Error al consultar el evento {id_venue}: {e}")
-            return country 
+    # Se guarda también la ausencia de mapa
+    await location_cache.set("venue", id_venue, city)
+    return city if city else country  # Si no hay ciudad, usa country
 
 # Función para obtener `strLocation` del evento
 async def get_location_for_event(id_venue: str, country: str) -> str:
+    cached = await location_cache.get("team", id_venue)
+    if cached is not MISSING:
+        return cached["location"] or country  # Si no hay location, usa country
+
     sports_key = SPORTS_KEY
-    api_url = f"https://www.thesportsdb.com/api/v1/json/{sports_key}/lookupteam.php?id={id_venue}"
-    async with httpx.AsyncClient() as client:
+    api_url = f"{SPORTS_URL}/{sports_key}/lookupteam.php?id={id_venue}"
+    client = get_client("sports")
+    async with sports_semaphore:
         try:
-            print("Consultando evento:", id_venue)
-            response = await client.get(api_url)
-            response.raise_for_status()
+            response = await upstreams["sports"].get(client, api_url, "lookupteam", hedge=True)
             event_data = response.json()
+        except UPSTREAM_ERRORS as e:
+            # Sin guardar en la caché: se usa el país y se vuelve a consultar en la siguiente actualización
+            log_upstream_error("Error al consultar lookupteam {id}: {error}", e, id=id_venue)
+            return country
 
-            # Imprime la estructura completa de la respuesta
-            print(f"Respuesta del evento {id_venue}:", event_data)
+    city = None
+    if "teams" in event_data and event_data["teams"]:
+        city = event_data["teams"][0].get("strLocation", None)
+    # Solo una muestra de las consultas, sin la respuesta completa
+    if sampled():
+        logger.debug("Ubicación del equipo {id}: {location}", id=id_venue, location=city, kind="team")
 
-            if "teams" in event_data and event_data["teams"]:
-                city = event_data["teams"][0].get("strLocation", None)
-                print(f"Ciudad obtenida para el evento {id_venue}: {city}")
-                return city if city else country  # Si no hay location, usa country
-            return country  
-        except httpx.RequestError as e:
-            print(f"Error al consultar el evento {id_venue}: {e}")
-            return country
+    await location_cache.set("team", id_venue, city)
+    return city if city else country  # Si no hay location, usa country
 
 
 # Función para obtener el pronóstico usando OpenAI
@@ -211,132 +203,740 @@ async def get_match_prediction(home_team: str, away_team: str, date: str, weathe
     de {tokens} tokens y terminar el parrafo al final del texto. 
     """
     try:
-        response = openai.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=200,
-        )
-        return response.choices[0].message.content.strip()
-    except openai.OpenAIError as e:
+        async with llm_semaphore:
+            return await complete(prompt, max_tokens=tokens)
+    except LLMError as e:
         return f"Error al obtener el pronóstico: {str(e)}"
 
-@router.post("/update-events")
-async def update_events(db: Session = Depends(get_db)):
-    sports_key = SPORTS_KEY
-    league_ids = ["4335", "4351"]  # IDs de las ligas a consultar
-    all_enriched_events = []
+# Función para obtener en una sola llamada los pronósticos de varios partidos
+async def get_match_predictions_batch(fixtures: list) -> dict:
+    """
+    `fixtures` es una lista de dicts con idEvent, home_team, away_team, date y weather.
+    Devuelve {idEvent: pronostico} con las respuestas válidas; los partidos que falten
+    (o todos, si la respuesta no se puede interpretar) se resuelven después uno por uno.
+    """
+    tokens = 200
+    partidos = [
+        {
+            "idEvent": fixture["idEvent"],
+            "partido": f"{fixture['home_team']} vs {fixture['away_team']}",
+            "fecha": fixture["date"],
+            "clima": (
+                f"Temperatura {fixture['weather']['temperature']}°C, Viento {fixture['weather']['wind_speed']} km/h, "
+                f"Condiciones {fixture['weather']['description']}"
+            ),
+        }
+        for fixture in fixtures
+    ]
+    prompt = f"""
+    Análisis de Partidos de la jornada:
+    {json.dumps(partidos, ensure_ascii=False)}
+    Para cada partido, basado en las condiciones climáticas y el contexto actual de los equipos, ¿qué pronóstico harías?
+    Proporciona un análisis breve, conciso y considera cómo las condiciones pueden afectar el juego. Procura utilizar menos
+    de {tokens} tokens por partido y terminar cada parrafo al final del texto.
+    Responde solo con un objeto JSON de la forma {{"predictions": [{{"idEvent": "...", "pronostico": "..."}}]}}.
+    """
+    try:
+        async with llm_semaphore:
+            content = await complete(
+                prompt,
+                max_tokens=tokens * len(fixtures),
+                response_format={"type": "json_object"},
+            )
+    except LLMError as e:
+        logger.warning("Error en el pronóstico por lote, se usará un pronóstico por partido: {error}", error=str(e))
+        return {}
+    return parse_batch_predictions(content, [fixture["idEvent"] for fixture in fixtures])
+
+async def fetch_league_events(id_league: str) -> list:
+    """
+    Obtiene los próximos eventos de una liga desde thesportsdb. Los errores (incluidos plazo vencido
+    y circuito abierto) se propagan: la liga queda con error y conserva sus eventos guardados.
+    """
+    api_url = f"{SPORTS_URL}/{SPORTS_KEY}/eventsnextleague.php?id={id_league}"
+    client = get_client("sports")
+    async with sports_semaphore:
+        response = await upstreams["sports"].get(client, api_url, "eventsnextleague", hedge=True)
+    data = response.json()
+    return data.get("events") or []  # Para manejar el caso cuando no hay eventos proximos en una liga
+
+
+async def get_weather_for_event(event: dict) -> dict:
+    """Resuelve la ubicación del evento (mapa, location del equipo local o país) y obtiene su clima."""
+    date_event = event.get("dateEvent")
+    country = event.get("strCountry")
+    venue = event.get("idVenue")
+    ban = 0 # bandera para determinar si buscar weather por country despues de que falla por location
+
+    # Obtener la ciudad o coordenadas
+    city_or_map = await get_city_for_event(venue, country)
+    if parse_coordinates(city_or_map):
+        if sampled():
+            logger.debug("Clima por coordenadas: {location}", location=city_or_map, id_venue=venue)
+        return await get_weather_by_coordinates(city_or_map, date_event)
+    if looks_like_coordinates(city_or_map):
+        # Mapa con un formato que no se pudo interpretar: se sigue como si no hubiera mapa
+        logger.warning("Coordenadas no válidas para el estadio {id_venue}: {location}", id_venue=venue, location=city_or_map)
+        city_or_map = country
+
+    if country == city_or_map: # Significa que no encontro Map, se busca por location del home_team
+        city_or_map = await get_location_for_event(event.get("idHomeTeam"), country)
+        if city_or_map != country: # Significa que encontro Location
+            ban = 1
+
+    if sampled():
+        logger.debug("Clima por ciudad o país: {location}", location=city_or_map, id_venue=venue)
+    if city_or_map == 'Brazil':
+        city_or_map = 'Brasil'
+
+    weather = await get_weather(city_or_map, date_event)
+
+    if weather["temperature"] == "Desconocida" and ban: # Se intenta buscar por pais
+        city_or_map = country
+        if city_or_map == 'Brazil':
+            city_or_map = 'Brasil'
+        weather = await get_weather(city_or_map, date_event)
+    return weather
+
+
+@contextmanager
+def stage_timer(timings: dict, stage: str):
+    """Suma a timings[stage] los segundos del bloque; no hace nada si timings es None."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if timings is not None:
+            timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - start
 
-    for id_league in league_ids:
-        api_url = f"https://www.thesportsdb.com/api/v1/json/{sports_key}/eventsnextleague.php?id={id_league}"
 
-        try:
-            # Obtener los eventos desde el API
-            async with httpx.AsyncClient() as client:
-                response = await client.get(api_url)
-                response.raise_for_status()
-
-            data = response.json()
-            events = data.get("events", [])
-            ban = 0 # bandera para determinar si buscar weather por country despues de que falla por location 
-            if not events:
-                print(f"No se encontraron eventos para la liga {id_league}")
-
-            # Recolectar los idEvent actuales desde la respuesta del API
-            current_event_ids = []
-
-            for event in events or []: # Para manejar el caso cuando no hay eventos proximos en una liga 
-                id_event = event.get("idEvent")
-                if not id_event:
-                    continue
-                home_team = event.get("strHomeTeam")
-                away_team = event.get("strAwayTeam")
-                date_event = event.get("dateEvent")
-                country = event.get("strCountry")
-                venue = event.get("idVenue")
-                if not venue:
-                    continue
-                current_event_ids.append(id_event)
-
-                # Obtener la ciudad o coordenadas
-                city_or_map = await get_city_for_event(venue, country)
-                if re.search(r"°|′|″", city_or_map):
-                    print(f"Usando coordenadas: {city_or_map}")
-                    weather = await get_weather_by_coordinates(city_or_map, date_event)
-                else:
-                    if country == city_or_map: # Significa que no encontro Map, se busca por location del home_team
-                        city_or_map = await get_location_for_event(event.get("idHomeTeam"), country)
-                        if city_or_map != country: # Significa que encontro Location 
-                            ban = 1
-
-                    print(f"Usando ciudad o país: {city_or_map}")
-                    if city_or_map == 'Brazil':
-                        city_or_map = 'Brasil'
-
-                    weather = await get_weather(city_or_map, date_event)
-
-                    if weather["temperature"] == "Desconocida" and ban: # Se intenta buscar por pais
-                        ban = 0
-                        city_or_map = country
-                        if city_or_map == 'Brazil':
-                            city_or_map = 'Brasil'
-                        weather = await get_weather(city_or_map, date_event)
-
-                # Obtener el pronóstico
-                pronostico = await get_match_prediction(home_team, away_team, date_event, weather)
-
-                # Enriquecer el evento
-                enriched_event = {
-                    "idEvent": id_event,
-                    "strEvent": event.get("strEvent"),
-                    "strHomeTeam": home_team,
-                    "strAwayTeam": away_team,
-                    "idHomeTeam": event.get("idHomeTeam"),
-                    "idAwayTeam": event.get("idAwayTeam"),
-                    "dateEvent": event.get("dateEvent"),
-                    "strTime": event.get("strTime"),
-                    "strHomeTeamBadge": event.get("strHomeTeamBadge"),
-                    "strAwayTeamBadge": event.get("strAwayTeamBadge"),
-                    "idLeague": id_league,
-                    "idVenue": event.get("idVenue"),
-                    "strVenue": event.get("strVenue", "Desconocido"),
-                    "clima": weather,
-                    "pronostico": pronostico,
-                }
-
-                # Guardar o actualizar en la base de datos
-                existing_event = db.query(EventModel).filter_by(id_event=id_event).first()
-                if existing_event:
-                    existing_event.event_data = enriched_event
-                    existing_event.updated_at = datetime.now()
+async def enrich_event(event: dict, id_league: str, stored: dict = None, force_prediction: bool = False,
+                       timings: dict = None) -> tuple:
+    """
+    Agrega clima y pronóstico a un evento de thesportsdb.
+    Si las entradas del pronóstico no cambiaron respecto a `stored` (el evento guardado) se reutiliza
+    sin llamar al LLM. Devuelve el evento enriquecido y los datos del pronóstico para persistir.
+    """
+    home_team = event.get("strHomeTeam")
+    away_team = event.get("strAwayTeam")
+    date_event = event.get("dateEvent")
+
+    with stage_timer(timings, "weather"):
+        weather = await get_weather_for_event(event)
+
+    # Obtener el pronóstico
+    input_hash = prediction_hash(home_team, away_team, date_event, weather)
+    if can_reuse_prediction(stored, input_hash, force_prediction):
+        pronostico = stored["pronostico"]
+        prediction = {"hash": input_hash, "predicted_at": stored["predicted_at"], "llm_called": False}
+    else:
+        with stage_timer(timings, "llm"):
+            pronostico = await get_match_prediction(home_team, away_team, date_event, weather)
+        prediction = {"hash": input_hash, "predicted_at": datetime.now(timezone.utc), "llm_called": True}
+
+    return build_enriched_event(event, id_league, weather, pronostico), prediction
+
+
+def build_enriched_event(event: dict, id_league: str, weather: dict, pronostico: str) -> dict:
+    return {
+        "idEvent": event.get("idEvent"),
+        "strEvent": event.get("strEvent"),
+        "strHomeTeam": event.get("strHomeTeam"),
+        "strAwayTeam": event.get("strAwayTeam"),
+        "idHomeTeam": event.get("idHomeTeam"),
+        "idAwayTeam": event.get("idAwayTeam"),
+        "dateEvent": event.get("dateEvent"),
+        "strTime": event.get("strTime"),
+        "strHomeTeamBadge": event.get("strHomeTeamBadge"),
+        "strAwayTeamBadge": event.get("strAwayTeamBadge"),
+        "idLeague": id_league,
+        "idVenue": event.get("idVenue"),
+        "strVenue": event.get("strVenue", "Desconocido"),
+        "clima": weather,
+        "pronostico": pronostico,
+    }
+
+
+def invalid_event_error(event: dict, id_league: str) -> Optional[str]:
+    """
+    Valida los campos de thesportsdb contra el schema Event antes de enriquecer (clima y pronóstico
+    de relleno); devuelve el error, o None si es válido. Un evento que no pasaría la validación de
+    event_row nunca se guarda, y sin este chequeo cada actualización volvería a pagar su clima y su LLM.
+    """
+    try:
+        Event.model_validate(build_enriched_event(event, id_league, {}, ""))
+    except ValidationError as e:
+        return str(e)
+    return None
+
+
+def classify_event(event: dict, id_league: str, stored: dict, force: bool = False) -> tuple:
+    """
+    Compara un evento de eventsnextleague.php con el guardado y devuelve (estado, event_data):
+    "enrich" si hay que volver a obtener clima y pronóstico (evento nuevo, cambió la fecha, la hora, el
+    estadio o los equipos, o el enriquecimiento es viejo o falló), "update" si solo cambiaron campos
+    informativos (se conservan clima y pronóstico) y "unchanged" si no hay nada que escribir.
+    """
+    if force or not stored or not stored.get("event_data"):
+        return "enrich", None
+    stored_data = stored["event_data"]
+    if any(event.get(field) != stored_data.get(field) for field in ENRICHMENT_FIELDS):
+        return "enrich", None
+    if (stored_data.get("pronostico") or "").startswith(PREDICTION_ERROR_PREFIX) or stored_data.get("clima") == UNKNOWN_WEATHER:
+        return "enrich", None
+
+    max_age = settings.refresh_unchanged_max_age
+    enriched_at = stored.get("enriched_at")
+    if max_age > 0:
+        if enriched_at is None:
+            return "enrich", None
+        if enriched_at.tzinfo is None:
+            enriched_at = enriched_at.replace(tzinfo=timezone.utc)
+        if (datetime.now(timezone.utc) - enriched_at).total_seconds() > max_age:
+            return "enrich", None
+
+    event_data = build_enriched_event(event, id_league, stored_data.get("clima"), stored_data.get("pronostico"))
+    if event_data == stored_data:
+        return "unchanged", stored_data
+    return "update", event_data
+
+
+async def enrich_events_batched(events: list, id_league: str, event_semaphore: asyncio.Semaphore,
+                                stored_predictions: dict, force_predictions: bool = False,
+                                timings: dict = None) -> tuple:
+    """
+    Variante por lotes de enrich_event para toda una liga: primero obtiene el clima de todos los
+    eventos y luego pide los pronósticos pendientes en grupos de `llm_batch_size` partidos.
+    Devuelve los resultados alineados con `events` (tupla o excepción) y el número de llamadas al LLM.
+    """
+    with stage_timer(timings, "weather"):
+        weathers = await asyncio.gather(
+            *(run_bounded(event_semaphore, get_weather_for_event(event)) for event in events),
+            return_exceptions=True,
+        )
+
+    predictions = {}
+    pending = []
+    for event, weather in zip(events, weathers):
+        if isinstance(weather, Exception):
+            continue
+        id_event = event["idEvent"]
+        input_hash = prediction_hash(event.get("strHomeTeam"), event.get("strAwayTeam"), event.get("dateEvent"), weather)
+        stored = stored_predictions.get(id_event)
+        if can_reuse_prediction(stored, input_hash, force_predictions):
+            predictions[id_event] = (stored["pronostico"], {
+                "hash": input_hash, "predicted_at": stored["predicted_at"], "llm_called": False,
+            })
+        else:
+            pending.append({
+                "idEvent": id_event,
+                "home_team": event.get("strHomeTeam"),
+                "away_team": event.get("strAwayTeam"),
+                "date": event.get("dateEvent"),
+                "weather": weather,
+                "hash": input_hash,
+            })
+
+    batch_size = max(1, settings.llm_batch_size)
+    batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+    with stage_timer(timings, "llm"):
+        batch_results = await asyncio.gather(
+            *(get_match_predictions_batch(batch) for batch in batches), return_exceptions=True
+        )
+    llm_calls = len(batches)
+
+    # Un lote que falla no corta la liga: sus partidos se piden uno por uno
+    answered = {}
+    for batch_result in batch_results:
+        if isinstance(batch_result, Exception):
+            logger.warning("Error en el pronóstico por lote de la liga {id_league}: {error}",
+                           id_league=id_league, error=str(batch_result) or type(batch_result).__name__)
+            continue
+        answered.update(batch_result)
+
+    # Los partidos sin respuesta válida en el lote se piden uno por uno
+    missing = [fixture for fixture in pending if fixture["idEvent"] not in answered]
+    if missing:
+        logger.warning(
+            "Pronóstico por lote incompleto para la liga {id_league}: {missing} partidos se piden por separado",
+            id_league=id_league, missing=len(missing),
+        )
+        with stage_timer(timings, "llm"):
+            fallback = await asyncio.gather(*(
+                run_bounded(
+                    event_semaphore,
+                    get_match_prediction(fixture["home_team"], fixture["away_team"], fixture["date"], fixture["weather"]),
+                )
+                for fixture in missing
+            ), return_exceptions=True)
+        llm_calls += len(missing)
+        answered.update({fixture["idEvent"]: pronostico for fixture, pronostico in zip(missing, fallback)})
+
+    predicted_at = datetime.now(timezone.utc)
+    for fixture in pending:
+        predictions[fixture["idEvent"]] = (answered[fixture["idEvent"]], {
+            "hash": fixture["hash"], "predicted_at": predicted_at, "llm_called": True,
+        })
+
+    # Como en enrich_event, un evento que falla queda como excepción (se registra y se conserva su
+    # idEvent) sin afectar al resto de la liga
+    results = []
+    for event, weather in zip(events, weathers):
+        if isinstance(weather, Exception):
+            results.append(weather)
+            continue
+        pronostico, prediction = predictions[event["idEvent"]]
+        if isinstance(pronostico, Exception):
+            results.append(pronostico)
+            continue
+        results.append((build_enriched_event(event, id_league, weather, pronostico), prediction))
+    return results, llm_calls
+
+
+def parse_event_date(value: str):
+    """Convierte dateEvent ('2024-12-02') a date; devuelve None si no es válido."""
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+async def run_bounded(semaphore: asyncio.Semaphore, coro):
+    """Ejecuta una corrutina respetando el límite de concurrencia del semáforo."""
+    try:
+        await semaphore.acquire()
+    except asyncio.CancelledError:
+        coro.close()  # cancelada (plazo vencido o job cancelado) antes de empezar
+        raise
+    try:
+        return await coro
+    finally:
+        semaphore.release()
+
+
+async def process_league(id_league: str, event_semaphore: asyncio.Semaphore, stored_events: dict,
+                         force_predictions: bool = False) -> dict:
+    """
+    Descarga los eventos de una liga y enriquece en paralelo solo los que cambiaron respecto a
+    `stored_events` (ver classify_event); el costo crece con los partidos modificados, no con el total.
+    Devuelve los eventos enriquecidos (con su pronóstico), los que solo cambiaron campos informativos
+    (`updated`), cuántos no cambiaron, cuántos no pasan la validación del schema (no se enriquecen) y
+    los idEvent vigentes; si un evento falla se registra el error y
+    se conserva su idEvent para no borrarlo de la BD.
+    `timings` acumula los segundos por etapa: sports (lista de eventos), weather y llm (suma de
+    las llamadas, que corren en paralelo) y enrich (tiempo real de todo el enriquecimiento).
+    """
+    timings = {}
+    with stage_timer(timings, "sports"):
+        events = await fetch_league_events(id_league)
+    if not events:
+        logger.info("No se encontraron eventos para la liga {id_league}", id_league=id_league)
+
+    # Solo se enriquecen los eventos con idEvent, idVenue y una fecha válida
+    events = [
+        event for event in events
+        if event.get("idEvent") and event.get("idVenue") and parse_event_date(event.get("dateEvent"))
+    ]
+
+    changed = []
+    updated = []
+    unchanged = 0
+    invalid = 0
+    for event in events:
+        error = invalid_event_error(event, id_league)
+        if error:
+            # Se conserva en current_event_ids: si había una versión válida guardada no se borra
+            logger.warning("Evento {id_event} inválido, no se enriquece: {error}", id_event=event["idEvent"], error=error)
+            invalid += 1
+            continue
+        stored = stored_events.get(event["idEvent"])
+        state, event_data = classify_event(event, id_league, stored, force_predictions)
+        if state == "enrich":
+            changed.append(event)
+        elif state == "update":
+            updated.append((event_data, stored))
+        else:
+            unchanged += 1
+
+    enrich_start = time.perf_counter()
+    if id_league in settings.llm_batch_leagues:
+        results, llm_calls = await enrich_events_batched(
+            changed, id_league, event_semaphore, stored_events, force_predictions, timings
+        )
+    else:
+        results = await asyncio.gather(
+            *(
+                run_bounded(
+                    event_semaphore,
+                    enrich_event(event, id_league, stored_events.get(event["idEvent"]), force_predictions, timings),
+                )
+                for event in changed
+            ),
+            return_exceptions=True,
+        )
+        llm_calls = sum(1 for result in results if not isinstance(result, Exception) and result[1]["llm_called"])
+
+    enriched_events = []
+    for event, result in zip(changed, results):
+        if isinstance(result, Exception):
+            logger.warning(
+                "Error al enriquecer el evento {id_event} de la liga {id_league}: {error}",
+                id_event=event["idEvent"], id_league=id_league, error=str(result),
+            )
+            continue
+        enriched_events.append(result)
+    timings["enrich"] = time.perf_counter() - enrich_start
+
+    return {
+        "id_league": id_league,
+        "current_event_ids": [event["idEvent"] for event in events],
+        "events": enriched_events,
+        "updated": updated,
+        "unchanged": unchanged,
+        "invalid": invalid,
+        "llm_calls": llm_calls,
+        "timings": timings,
+    }
+
+
+async def load_stored_events(db: AsyncSession, league_ids: list) -> dict:
+    """Eventos guardados por idEvent, para detectar cambios y decidir si el pronóstico se puede reutilizar."""
+    rows = await get_stored_events(db, league_ids)
+    return {
+        row.id_event: {
+            "hash": row.prediction_hash,
+            "predicted_at": row.predicted_at,
+            "enriched_at": row.enriched_at,
+            "pronostico": (row.event_data or {}).get("pronostico"),
+            "event_data": row.event_data,
+        }
+        for row in rows
+    }
+
+
+async def process_league_result(id_league: str, league_semaphore: asyncio.Semaphore, event_semaphore: asyncio.Semaphore,
+                                stored_events: dict, force_predictions: bool) -> tuple:
+    """process_league acotado por el semáforo de ligas; devuelve (id_league, resultado o excepción)."""
+    try:
+        return id_league, await run_bounded(
+            league_semaphore, process_league(id_league, event_semaphore, stored_events, force_predictions)
+        )
+    except Exception as e:
+        return id_league, e
+
+
+def event_row(id_league: str, enriched_event: dict, prediction_hash: str, predicted_at: datetime,
+              enriched_at: datetime) -> Optional[dict]:
+    """Fila de EventModel para upsert_events; None si el evento no pasa la validación del schema."""
+    # Validación única contra el schema de respuesta; /next sirve event_data sin revalidar
+    try:
+        event_data = Event.model_validate(enriched_event).model_dump(mode="json")
+    except ValidationError as e:
+        logger.warning("Evento {id_event} inválido, no se guarda: {error}", id_event=enriched_event.get("idEvent"), error=str(e))
+        return None
+    return {
+        "id_event": event_data["idEvent"],
+        "id_league": id_league,
+        "date_event": parse_event_date(event_data["dateEvent"]),
+        "event_data": event_data,
+        "prediction_hash": prediction_hash,
+        "predicted_at": predicted_at,
+        "enriched_at": enriched_at,
+    }
+
+
+async def refresh_leagues(db: AsyncSession, league_ids: list, force_predictions: bool = False, progress: dict = None,
+                          emit=None) -> dict:
+    """
+    Descarga, enriquece y guarda los eventos de las ligas indicadas.
+    Cada liga se guarda en cuanto termina de enriquecerse, sin esperar a las demás; solo se escriben
+    los eventos nuevos o modificados.
+    Devuelve un resumen por liga, las llamadas al LLM y si cambió algo en la BD (`changed`);
+    `progress` (si se pasa) se actualiza por liga. Las ligas que no terminan dentro de
+    REFRESH_DEADLINE_SECONDS quedan con error.
+    `emit(record)` (si se pasa) recibe cada evento guardado y el resumen de cada liga con sus tiempos.
+    """
+    llm_calls = 0
+    llm_skipped = 0
+    changed = False
+    leagues = {}
+
+    stored_events = await load_stored_events(db, league_ids)
+    league_semaphore = asyncio.Semaphore(settings.league_concurrency)
+    event_semaphore = asyncio.Semaphore(settings.event_concurrency)
+    tasks = [
+        asyncio.create_task(process_league_result(
+            id_league, league_semaphore, event_semaphore, stored_events, force_predictions
+        ))
+        for id_league in league_ids
+    ]
+
+    # Plazo de toda la actualización: vence entre ligas, nunca a mitad de guardar una
+    deadline = settings.refresh_deadline_seconds or None
+    try:
+        # La escritura en BD se hace una liga a la vez con la misma sesión, en el orden en que terminan
+        for next_result in asyncio.as_completed(tasks, timeout=deadline):
+            try:
+                id_league, result = await next_result
+            except TimeoutError:
+                break
+            if progress is not None:
+                progress["leagues_done"] += 1
+            if isinstance(result, Exception):
+                error = str(result) or type(result).__name__
+                if isinstance(result, UPSTREAM_ERRORS):
+                    logger.error("Error en la API para la liga {id_league}: {error}", id_league=id_league, error=error)
                 else:
-                    new_event = EventModel(
-                        id_event=id_event,
-                        id_league=id_league,
-                        date_event=date_event,
-                        event_data=enriched_event
-                    )
-                    db.add(new_event)
-                db.commit()
-
-                all_enriched_events.append(enriched_event)
-
-        except httpx.HTTPStatusError as e:
-            print(f"Error en la API para la liga {id_league}: {e}")
-        except Exception as e:
-            print(f"Error inesperado para la liga {id_league}: {e}")
-
-        # Eliminar eventos que ya no están en la respuesta del API
-        stored_events = db.query(EventModel).filter_by(id_league=id_league).all()
-        for stored_event in stored_events:
-            if stored_event.id_event not in current_event_ids:
-                db.delete(stored_event)
-        db.commit()
-
-    return {"message": "Eventos actualizados exitosamente", "events": all_enriched_events}
+                    logger.error("Error inesperado para la liga {id_league}: {error}", id_league=id_league, error=error)
+                leagues[id_league] = {"status": "error", "error": error}
+                if emit:
+                    emit({"type": "league", "id_league": id_league, **leagues[id_league]})
+                continue
+
+            llm_calls += result["llm_calls"]
+            # Los partidos sin cambios o con solo campos informativos conservan su pronóstico sin llamar al LLM
+            llm_skipped += result["unchanged"] + len(result["updated"])
+            enriched_at = datetime.now(timezone.utc)
+            rows = []
+            for enriched_event, prediction in result["events"]:
+                if not prediction["llm_called"]:
+                    llm_skipped += 1
+                row = event_row(id_league, enriched_event, prediction["hash"], prediction["predicted_at"], enriched_at)
+                if row:
+                    rows.append(row)
+            enriched = len(rows)
+            # Solo cambiaron campos informativos: se conservan clima, pronóstico y sus marcas de tiempo
+            for event_data, stored in result["updated"]:
+                row = event_row(id_league, event_data, stored["hash"], stored["predicted_at"], stored["enriched_at"])
+                if row:
+                    rows.append(row)
+
+            # Un upsert y un borrado por liga, en una sola transacción
+            timings = result["timings"]
+            try:
+                with stage_timer(timings, "persist"):
+                    await upsert_events(db, rows)
+                    # Eliminar eventos que ya no están en la respuesta del API
+                    deleted = await delete_stale_events(db, id_league, result["current_event_ids"])
+                    await db.commit()
+            except SQLAlchemyError as e:
+                await db.rollback()
+                logger.error("Error al guardar los eventos de la liga {id_league}: {error}", id_league=id_league, error=str(e))
+                leagues[id_league] = {"status": "error", "error": str(e)}
+                if emit:
+                    emit({"type": "league", "id_league": id_league, **leagues[id_league]})
+                continue
+
+            changed = changed or bool(rows) or deleted > 0
+            for stage, seconds in timings.items():
+                refresh_stage_seconds.observe(seconds, stage=stage)
+            leagues[id_league] = {
+                "status": "ok",
+                "events": len(rows) + result["unchanged"],
+                "enriched": enriched,
+                "updated": len(rows) - enriched,
+                "unchanged": result["unchanged"],
+                "invalid": result["invalid"],
+                "deleted": deleted,
+                "llm_calls": result["llm_calls"],
+                "timings": {stage: round(seconds, 3) for stage, seconds in timings.items()},
+            }
+            if progress is not None:
+                progress["events"] += len(rows)
+            if emit:
+                for row in rows:
+                    emit({"type": "event", "id_league": id_league, "event": row["event_data"]})
+                emit({"type": "league", "id_league": id_league, **leagues[id_league]})
+
+        # Las ligas que no terminaron antes del plazo se cancelan y conservan sus eventos guardados
+        for id_league in league_ids:
+            if id_league not in leagues:
+                logger.error("La liga {id_league} no terminó antes del plazo de {deadline}s", id_league=id_league, deadline=deadline)
+                leagues[id_league] = {"status": "error", "error": "Se venció el plazo de la actualización"}
+                if emit:
+                    emit({"type": "league", "id_league": id_league, **leagues[id_league]})
+    finally:
+        # Si el job se cancela o vence el plazo, las ligas que siguen en curso también se cancelan
+        for task in tasks:
+            task.cancel()
+
+    return {
+        "leagues": {id_league: leagues[id_league] for id_league in league_ids if id_league in leagues},
+        "llm": {"calls": llm_calls, "skipped": llm_skipped},
+        "changed": changed,
+    }
+
+
+async def run_refresh(job: RefreshJob) -> dict:
+    """Ejecuta un job de actualización con su propia sesión de BD y reconstruye la respuesta de /next."""
+    async with AsyncSessionLocal() as db:
+        result = await refresh_leagues(db, job.league_ids, job.force_predictions, job.progress, job.publish)
+        # Sin eventos nuevos, modificados ni borrados la respuesta de /next sigue vigente
+        if result["changed"]:
+            await next_cache.rebuild(lambda: build_next_response(db))
+            # Mientras las réplicas alcanzan al primario, /next de este proceso lee del primario
+            pin("events")
+        return result
+
+
+refresh_manager = RefreshManager(run_refresh)
+
+
+STREAM_FORMATS = {"ndjson": "application/x-ndjson", "sse": "text/event-stream"}
+STREAM_DESCRIPTION = "ndjson o sse: transmite cada evento guardado y el resumen de cada liga"
+
+
+def encode_record(record: dict, stream_format: str) -> bytes:
+    data = dumps(record)
+    if stream_format == "sse":
+        return b"event: " + record["type"].encode() + b"\ndata: " + data + b"\n\n"
+    return data + b"\n"
+
+
+def stream_job(job: RefreshJob, stream_format: str) -> StreamingResponse:
+    """
+    Respuesta en streaming con el estado del job, cada evento en cuanto se guarda, el resumen de
+    cada liga (con tiempos por etapa) y el estado final. Si el cliente se desconecta el job sigue.
+    """
+    stream = job.subscribe(settings.refresh_stream_buffer)
+
+    async def body():
+        try:
+            async for record in stream.records(settings.refresh_stream_heartbeat):
+                yield encode_record(record, stream_format)
+        finally:
+            job.unsubscribe(stream)
+
+    return StreamingResponse(
+        body(),
+        media_type=STREAM_FORMATS[stream_format],
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/update-events", status_code=202)
+async def update_events(
+    force_predictions: bool = False,
+    wait: bool = False,
+    stream: Optional[str] = Query(None, pattern="^(ndjson|sse)$", description=STREAM_DESCRIPTION),
+):
+    """
+    Encola una actualización de todas las ligas y devuelve el id del job.
+    Si ya hay una actualización en curso se devuelve esa. Con `wait=true` responde al terminar;
+    con `stream` transmite el progreso mientras corre.
+    """
+    job = refresh_manager.enqueue(LEAGUE_IDS, force_predictions)
+    if stream:
+        return stream_job(job, stream)
+    if wait:
+        # asyncio.wait no cancela el job si este cliente se va
+        await asyncio.wait({job.task})
+    return job.to_dict()
+
+@router.get("/update-events/{job_id}")
+async def get_update_job(
+    job_id: str,
+    stream: Optional[str] = Query(None, pattern="^(ndjson|sse)$", description=STREAM_DESCRIPTION),
+):
+    job = refresh_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job no encontrado")
+    if stream:
+        return stream_job(job, stream)
+    return job.to_dict()
+
+@router.delete("/update-events/{job_id}")
+async def cancel_update_job(job_id: str):
+    if not refresh_manager.cancel(job_id):
+        raise HTTPException(status_code=404, detail="Job no encontrado o ya terminado")
+    return {"message": "Actualización cancelada", "job_id": job_id}
+
+def serialize_events(rows) -> bytes:
+    # event_data ya se validó contra Event al guardarse; aquí solo se recorta a sus campos
+    return dumps([project(row.event_data, EVENT_FIELDS) for row in rows])
+
+
+async def build_next_response(db: AsyncSession) -> MaterializedResponse:
+    """Serializa todos los eventos guardados, ordenados por fecha, tal como los devuelve /next."""
+    rows = await list_events(db)
+    # Serializar y comprimir miles de eventos es CPU; se hace fuera del event loop
+    return await asyncio.to_thread(lambda: MaterializedResponse(serialize_events(rows)))
+
+
+def encode_cursor(date_event: date, id_event: str) -> str:
+    return base64.urlsafe_b64encode(f"{date_event.isoformat()}|{id_event}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        date_event, id_event = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        return date.fromisoformat(date_event), id_event
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
 
 @router.get("/next", response_model=List[Event])
-def get_next_events(db: Session = Depends(get_db)):
-    # Consultar todos los eventos desde la base de datos
-    events = db.query(EventModel).order_by(EventModel.date_event).all()
-    # Transformar event_data (JSON) a la estructura de Event
-    return [Event(**event.event_data) for event in events]
+async def get_next_events(
+    request: Request,
+    id_league: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    team: Optional[str] = Query(None, description="idTeam del equipo local o visitante"),
+    limit: Optional[int] = Query(None, ge=1, le=settings.next_max_page_size),
+    cursor: Optional[str] = Query(None, description="Valor de X-Next-Cursor de la página anterior"),
+    db: AsyncSession = Depends(read_db("events")),
+):
+    if any(param is not None for param in (id_league, date_from, date_to, team, limit, cursor)):
+        # Consulta filtrada y paginada por cursor (date_event, id_event)
+        page_size = limit or settings.next_page_size
+        rows = await list_events(
+            db, id_league=id_league, date_from=date_from, date_to=date_to, team=team,
+            after=decode_cursor(cursor) if cursor else None,
+            limit=page_size + 1,
+        )
+        headers = {"Cache-Control": f"public, max-age={settings.next_cache_max_age}"}
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            headers["X-Next-Cursor"] = encode_cursor(rows[-1].date_event, rows[-1].id_event)
+        return Response(serialize_events(rows), media_type="application/json", headers=headers)
+
+    # Sin filtros: la respuesta se arma una vez por actualización y se sirve desde memoria
+    snapshot = await next_cache.get(lambda: build_next_response(db))
+    use_gzip = accepts_encoding(request.headers.get("accept-encoding"), "gzip")
+    headers = {
+        "ETag": snapshot.gzip_etag if use_gzip else snapshot.etag,
+        "Cache-Control": f"public, max-age={settings.next_cache_max_age}",
+        "Vary": "Accept-Encoding",
+    }
+    if snapshot.matches(request.headers.get("if-none-match"), gzip=use_gzip):
+        return Response(status_code=304, headers=headers)
+    if use_gzip:
+        headers["Content-Encoding"] = "gzip"
+        return Response(snapshot.gzip_body, media_type=snapshot.media_type, headers=headers)
+    return Response(snapshot.body, media_type=snapshot.media_type, headers=headers)
+
+@router.get("/weather-cache")
+def get_weather_cache_stats():
+    return weather_cache.stats()
+
+@router.get("/location-cache")
+def get_location_cache_stats():
+    return location_cache.stats()
+
+@router.get("/upstreams")
+def get_upstream_stats():
+    # Estado del circuit breaker, plazos y hedges de thesportsdb y api_clima
+    return {name: upstream.stats() for name, upstream in upstreams.items()}
+
+@router.get("/db-replicas")
+def get_db_replica_stats():
+    # Réplicas de lectura: en rotación o no, último error y atraso de replicación
+    return read_replicas.stats()
+
+@router.delete("/location-cache")
+async def invalidate_location_cache(kind: Optional[str] = None, ref_id: Optional[str] = None):
+    # kind: "venue" o "team"; sin parámetros se invalida toda la caché
+    if kind not in (None, "venue", "team"):
+        raise HTTPException(status_code=400, detail="kind debe ser 'venue' o 'team'")
+    removed = await location_cache.invalidate(kind, ref_id)
+    return {"message": "Caché de ubicaciones invalidada", "removed": removed}
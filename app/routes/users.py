@@ -1,12 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from jose import JWTError, jwt
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 
-from sqlalchemy.orm import Session
-from app.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_write_db, pin, read_session, read_your_writes
 from app.schemas import UserCreate, UserOut
-from app.crud import create_user, get_user_by_email
-from app.auth import create_access_token, authenticate_user 
+from app.crud import create_user
+from app.auth import create_access_token, authenticate_user, unknown_emails
+from app.passwords import PasswordQueueFull, password_hasher
+from app.tokens import InvalidToken, token_validator, unauthorized
 from app.config import get_settings 
+from app.utils.logging import logger
 
 from pydantic import BaseModel
 
@@ -32,38 +34,50 @@ class TokenRequest(BaseModel):
 
 router = APIRouter()
 
-def verify_token(token: str):
+async def verify_token(token: str):
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload  # Devuelve el contenido del token si es válido
-    except JWTError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Token inválido o expirado",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+        # Tokens frecuentes se resuelven desde la caché sin volver a hacer jwt.decode
+        return await token_validator.validate(token)  # Devuelve el contenido del token si es válido
+    except InvalidToken:
+        raise unauthorized()
 
 @router.post("/validate-token")
-def validate_token(request: TokenRequest):
-    token = request.token
-    try:
-        verify_token(token)  # Implementa esta función para validar el token
-        return {"valid": True}
-    except Exception as e:
-        raise HTTPException(status_code=401, detail="Token inválido o expirado")
+async def validate_token(request: TokenRequest):
+    await verify_token(request.token)
+    return {"valid": True}
+
+@router.post("/revoke-token")
+async def revoke_token(request: TokenRequest):
+    if not await token_validator.revoke(request.token):
+        raise unauthorized()
+    return {"revoked": True}
+
+@router.get("/token-cache")
+def get_token_cache_stats():
+    return token_validator.stats()
+
+def password_queue_full() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Demasiadas solicitudes de autenticación, intenta de nuevo",
+        headers={"Retry-After": "1"},
+    )
 
 @router.post("/register", response_model=RegisterResponse)
-def register_user(user: UserCreate, db: Session = Depends(get_db)):
+async def register_user(user: UserCreate, db: AsyncSession = Depends(get_write_db)):
     try:
-        
-        if get_user_by_email(db, user.email):
+        # Un solo INSERT ... ON CONFLICT (email) DO NOTHING; None si el email ya existía
+        if await create_user(db, user) is None:
             # raise HTTPException(status_code=400, detail="Email already registered")
             return {"result": "Email previamente registrado"}
-
-        else:
-            return create_user(db, user)
+        unknown_emails.delete(user.email)
+        # El login que sigue al registro lee del primario aunque llegue sin la cookie
+        pin(f"user:{user.email}")
+        return {"result": "success"}
+    except PasswordQueueFull:
+        raise password_queue_full()
     except Exception as e:
-        print(e)
+        logger.exception("Error al registrar un usuario")
         return {"result": "error", "detail": "Error al registrar Email"}
 
 @router.post(
@@ -72,12 +86,25 @@ def register_user(user: UserCreate, db: Session = Depends(get_db)):
     summary="User Login",
     description="Authenticate a user and return an access token."
 )
-def login_user(login_request: LoginRequest, db: Session = Depends(get_db)):
+async def login_user(login_request: LoginRequest, request: Request):
     email = login_request.email
     password = login_request.password
 
-    user = authenticate_user(db, email, password)
+    try:
+        # Solo lectura: una réplica salvo que el usuario se haya registrado recién
+        async with read_session(read_your_writes(request, f"user:{email}")) as db:
+            user = await authenticate_user(db, email, password)
+    except PasswordQueueFull:
+        raise password_queue_full()
     if not user:
         raise HTTPException(status_code=400, detail="Invalid credentials")
-    access_token = create_access_token({"sub": user.email})
+    access_token = create_access_token({"sub": email})
     return {"access_token": access_token, "token_type": "bearer"}
+
+@router.get("/password-hashing")
+def get_password_hashing_stats():
+    return password_hasher.stats()
+
+@router.get("/unknown-email-cache")
+def get_unknown_email_cache_stats():
+    return unknown_emails.stats()
@@ -0,0 +1,122 @@
+"""
+Punto de entrada de producción: gunicorn con workers de uvicorn.
+
+    python -m app.server [--workers N] [--port 8000]
+
+- Un worker por defecto. Los jobs de /update-events (GET/DELETE /update-events/{job_id}) y el
+  programador de actualizaciones viven en memoria del worker que los creó, así que con más de uno
+  esas consultas fallan en los demás workers. WEB_WORKERS=0 usa un worker por núcleo disponible
+  (afinidad del proceso y cuota de CPU del cgroup).
+- Con WEB_PRELOAD la app se importa una sola vez en el proceso maestro y los workers la heredan
+  al hacer fork (arrancan más rápido y comparten memoria). El maestro no abre conexiones: el pool
+  de BD y los clientes HTTP se crean y calientan en el lifespan de cada worker.
+- Reinicios ordenados: SIGTERM deja que cada worker termine sus peticiones durante
+  WEB_GRACEFUL_TIMEOUT segundos; SIGHUP reemplaza los workers uno a uno sin cortar conexiones
+  (con preload no vuelve a importar el código: un despliegue nuevo reinicia el contenedor).
+  WEB_MAX_REQUESTS recicla cada worker después de esa cantidad de peticiones.
+
+Con varios workers cada uno corre su propio programador de actualizaciones; el lock de la BD
+(REFRESH_LOCK_KEY) evita que dos workers actualicen a la vez. /metrics usa prometheus_client en
+modo multiproceso (PROMETHEUS_MULTIPROC_DIR, un directorio temporal si no se indica) para sumar
+las métricas de todos los workers.
+"""
+import argparse
+import importlib.util
+import math
+import os
+import tempfile
+
+from gunicorn.app.base import BaseApplication
+
+from app.config import get_settings
+
+
+def available_cpus() -> int:
+    """Núcleos que puede usar el proceso: afinidad de CPU y, en contenedores, la cuota del cgroup v2."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cpus = min(cpus, math.ceil(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+    return max(1, cpus)
+
+
+def worker_class() -> str:
+    # uvicorn.workers está deprecado desde uvicorn 0.30 en favor del paquete uvicorn-worker
+    if importlib.util.find_spec("uvicorn_worker") is not None:
+        return "uvicorn_worker.UvicornWorker"
+    return "uvicorn.workers.UvicornWorker"
+
+
+def server_options(workers: int = None, port: int = None) -> dict:
+    settings = get_settings()
+    return {
+        "bind": f"{settings.web_host}:{port or settings.web_port}",
+        "workers": workers or settings.web_workers or available_cpus(),
+        "worker_class": worker_class(),
+        "preload_app": settings.web_preload,
+        "graceful_timeout": settings.web_graceful_timeout,
+        "keepalive": settings.web_keepalive,
+        "max_requests": settings.web_max_requests,
+        "max_requests_jitter": settings.web_max_requests_jitter,
+        "loglevel": settings.log_level.lower(),
+    }
+
+
+def prepare_multiprocess_metrics() -> str:
+    """
+    Directorio compartido de métricas para varios workers; se fija antes de importar la app porque
+    prometheus_client elige dónde guardar los valores al importarse.
+    """
+    directory = os.environ.get("PROMETHEUS_MULTIPROC_DIR") or tempfile.mkdtemp(prefix="api_deportes_metrics_")
+    os.makedirs(directory, exist_ok=True)
+    # Archivos de una corrida anterior sumarían contadores viejos
+    for name in os.listdir(directory):
+        if name.endswith(".db"):
+            os.remove(os.path.join(directory, name))
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = directory
+    return directory
+
+
+def child_exit(server, worker):
+    # Los gauges de un worker que terminó dejan de exportarse; sus contadores siguen sumando
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
+
+
+class Server(BaseApplication):
+    def __init__(self, options: dict):
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        from app.main import app
+
+        return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=None, help="por defecto WEB_WORKERS o uno por núcleo")
+    parser.add_argument("--port", type=int, default=None, help="por defecto WEB_PORT")
+    args = parser.parse_args()
+    options = server_options(args.workers, args.port)
+    if options["workers"] > 1:
+        prepare_multiprocess_metrics()
+        options["child_exit"] = child_exit
+    Server(options).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+import asyncio
+import hashlib
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from fastapi import Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.auth import ACCESS_TOKEN_EXPIRE_MINUTES, ALGORITHM, SECRET_KEY
+from app.config import get_settings
+from app.crud import list_revoked_tokens, revoke_token
+from app.database import AsyncSessionLocal
+from app.utils.cache import MISSING, TTLCache
+from app.utils.logging import logger
+from app.utils.metrics import registry
+
+settings = get_settings()
+
+
+class InvalidToken(Exception):
+    """Token con firma inválida, expirado o revocado."""
+
+
+class TokenValidator:
+    """
+    Valida JWT con una caché LRU de tokens ya verificados: la llave es el sha256 del token y el
+    valor sus claims. Cada entrada vence en su `exp`, y `exp` se vuelve a comparar contra el reloj
+    en cada acierto. La lista de revocación (tabla revoked_tokens) se recarga cada
+    `revocation_refresh` segundos para ver las revocaciones hechas en otras réplicas.
+    """
+
+    def __init__(self, maxsize: int, revocation_refresh: float):
+        self.cache = TTLCache(maxsize, ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+        self.revocation_refresh = revocation_refresh
+        self.revoked = set()
+        self.revocations_loaded_at = None
+        self.decodes = 0
+        self.rejected = 0
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def digest(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    @staticmethod
+    def token_id(claims: dict, digest: str) -> str:
+        # Los tokens emitidos antes de agregar jti se identifican por su sha256
+        return claims.get("jti") or digest
+
+    def _decode(self, token: str) -> dict:
+        from jose import JWTError, jwt  # se importa con el primer token, no al arrancar
+
+        self.decodes += 1
+        try:
+            return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        except JWTError:
+            self.rejected += 1
+            raise InvalidToken()
+
+    async def _refresh_revocations(self):
+        loaded_at = self.revocations_loaded_at
+        if loaded_at is not None and time.monotonic() - loaded_at < self.revocation_refresh:
+            return
+        async with self._lock:
+            # Otra petición pudo recargarla mientras se esperaba el lock
+            if self.revocations_loaded_at is not loaded_at:
+                return
+            try:
+                async with AsyncSessionLocal() as db:
+                    rows = await list_revoked_tokens(db, datetime.now(timezone.utc))
+                self.revoked = {row.jti for row in rows}
+            except SQLAlchemyError as e:
+                # Se conserva la lista anterior; se reintenta en el siguiente intervalo
+                logger.error("Error al cargar los tokens revocados: {error}", error=str(e))
+            self.revocations_loaded_at = time.monotonic()
+
+    async def validate(self, token: str) -> dict:
+        """Devuelve los claims del token o lanza InvalidToken."""
+        await self._refresh_revocations()
+        key = self.digest(token)
+        claims = self.cache.get(key)
+        now = time.time()
+        if claims is not MISSING and claims.get("exp") is not None and claims["exp"] <= now:
+            # El TTL de la caché usa el reloj monotónico; en el borde de exp manda el reloj real
+            self.cache.delete(key)
+            claims = MISSING
+        if claims is MISSING:
+            claims = self._decode(token)
+            exp = claims.get("exp")
+            if exp is not None and exp <= now:
+                # jose compara exp en segundos enteros; se aplica el mismo corte que en la caché
+                self.rejected += 1
+                raise InvalidToken()
+            self.cache.set(key, claims, ttl=exp - now if exp is not None else None)
+        if self.token_id(claims, key) in self.revoked:
+            self.rejected += 1
+            raise InvalidToken()
+        return claims
+
+    async def revoke(self, token: str) -> bool:
+        """Revoca un token válido; devuelve False si ya era inválido o había expirado."""
+        try:
+            claims = self._decode(token)
+        except InvalidToken:
+            return False
+        key = self.digest(token)
+        exp = claims.get("exp")
+        expires_at = (
+            datetime.fromtimestamp(exp, timezone.utc) if exp is not None
+            else datetime.now(timezone.utc) + timedelta(days=365)
+        )
+        async with AsyncSessionLocal() as db:
+            await revoke_token(db, self.token_id(claims, key), expires_at)
+        self.revoked.add(self.token_id(claims, key))
+        self.cache.delete(key)
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "cache": self.cache.stats(),
+            "decodes": self.decodes,
+            "rejected": self.rejected,
+            "revoked": len(self.revoked),
+        }
+
+
+token_validator = TokenValidator(settings.token_cache_size, settings.token_revocation_refresh_seconds)
+registry.cache("token", token_validator.cache.stats)
+
+bearer_scheme = HTTPBearer(auto_error=False)
+
+
+def unauthorized() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Token inválido o expirado",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+async def require_token(credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme)) -> dict:
+    """Dependencia de FastAPI: exige un Bearer token válido y devuelve sus claims."""
+    if credentials is None:
+        raise unauthorized()
+    try:
+        return await token_validator.validate(credentials.credentials)
+    except InvalidToken:
+        raise unauthorized()
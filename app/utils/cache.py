@@ -0,0 +1,135 @@
+import asyncio
+import gzip
+import hashlib
+import time
+from collections import OrderedDict
+
+# Marca para distinguir "no está en caché" de un valor None guardado
+MISSING = object()
+
+
+class TTLCache:
+    """Caché LRU en memoria con expiración por entrada y contadores de aciertos/fallos."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+
+    def get(self, key, default=MISSING):
+        entry = self._data.get(key)
+        if entry is None or entry[1] <= time.monotonic():
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def set(self, key, value, ttl: float = None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key) -> bool:
+        return self._data.pop(key, None) is not None
+
+    def clear(self) -> int:
+        size = len(self._data)
+        self._data.clear()
+        return size
+
+    def keys(self) -> list:
+        return list(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> dict:
+        return {"size": len(self._data), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+
+def accepts_encoding(accept_encoding: str, coding: str) -> bool:
+    """
+    Si el header Accept-Encoding acepta `coding` (ej. "gzip"): su q-value, o el de "*" si no
+    aparece, tiene que ser mayor que 0. "gzip;q=0" lo rechaza explícitamente.
+    """
+    wildcard = None
+    for item in (accept_encoding or "").split(","):
+        name, _, params = item.partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name in (coding, f"x-{coding}"):
+            return quality > 0
+        if name == "*":
+            wildcard = quality
+    return wildcard is not None and wildcard > 0
+
+
+class MaterializedResponse:
+    """
+    Cuerpo de una respuesta ya serializado y una copia comprimida con gzip, cada una con su ETag
+    fuerte (la comprimida termina en -gz): son representaciones distintas byte a byte.
+    """
+
+    def __init__(self, body: bytes, media_type: str = "application/json"):
+        self.body = body
+        self.media_type = media_type
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        self.gzip_body = gzip.compress(body, compresslevel=6)
+        self.gzip_etag = self.etag[:-1] + '-gz"'
+        self.built_at = time.monotonic()
+
+    def matches(self, if_none_match: str, gzip: bool = False) -> bool:
+        """Compara contra el header If-None-Match (lista de ETags, débiles o "*") el ETag de la representación elegida."""
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        etag = self.gzip_etag if gzip else self.etag
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return any(tag.removeprefix("W/") == etag for tag in tags)
+
+
+class ResponseCache:
+    """
+    Guarda una única MaterializedResponse que se reconstruye con `build()` (corrutina) cuando
+    pasa `ttl` segundos (para ver cambios hechos por otras réplicas); tras una actualización
+    `rebuild()` la reemplaza sin dejar un hueco en que las peticiones consulten la BD.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.builds = 0
+        self._response = None
+        self._lock = asyncio.Lock()
+
+    async def get(self, build) -> MaterializedResponse:
+        response = self._response
+        if response is not None and time.monotonic() - response.built_at < self.ttl:
+            return response
+        async with self._lock:
+            # Otra petición pudo reconstruirla mientras se esperaba el lock
+            response = self._response
+            if response is None or time.monotonic() - response.built_at >= self.ttl:
+                response = await self.rebuild(build)
+            return response
+
+    async def rebuild(self, build) -> MaterializedResponse:
+        self._response = await build()
+        self.builds += 1
+        return self._response
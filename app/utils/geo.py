@@ -0,0 +1,98 @@
+import re
+from functools import lru_cache
+from typing import Iterable, List, NamedTuple, Optional
+
+# Un componente en grados con dirección: '42°50′14″N', '42°50.25′N', '42.2118°N', "42°50'14\"N"
+# Minutos y segundos aceptan decimales; las marcas pueden ser tipográficas (′ ″) o ASCII (' ").
+DMS_COMPONENT = re.compile(
+    r"(?P<degrees>\d+(?:\.\d+)?)\s*°\s*"
+    r"(?:(?P<minutes>\d+(?:\.\d+)?)\s*['′’]\s*"
+    r"(?:(?P<seconds>\d+(?:\.\d+)?)\s*(?:″|\"|''|′′|”)\s*)?)?"
+    r"(?P<direction>[NSEWO])\b"
+)
+# Par de decimales con signo: '-34.6037, -58.3816', '40.4168 -3.7038', '40.4168°, -3.7038°'
+SIGNED_PAIR = re.compile(
+    r"^\s*(?P<latitude>[+-]?\d+(?:\.\d+)?)\s*°?\s*[,;\s]\s*(?P<longitude>[+-]?\d+(?:\.\d+)?)\s*°?\s*$"
+)
+# Señales de que un texto (strMap) es una coordenada y no un nombre de ciudad: marcas de grados o
+# solo dos números ('91.0, 10.0' fuera de rango). Un texto que empieza con un dígito ('3 de Febrero')
+# sigue siendo un lugar
+COORDINATE_MARKS = re.compile(r"[°′″]")
+NUMBER_PAIR = re.compile(r"^\s*[+-]?\d+(?:\.\d+)?\s*[,;\s]\s*[+-]?\d+(?:\.\d+)?\s*$")
+
+NEGATIVE_DIRECTIONS = frozenset("SWO")  # 'O' (oeste) en los mapas en español
+LONGITUDE_DIRECTIONS = frozenset("EWO")
+
+
+class Coordinates(NamedTuple):
+    """Latitud y longitud en grados decimales; se desempaqueta como la tupla (lat, lon) de antes."""
+    latitude: float
+    longitude: float
+
+
+def _component_to_decimal(degrees: str, minutes: str, seconds: str, direction: str) -> Optional[float]:
+    minutes = float(minutes) if minutes else 0.0
+    seconds = float(seconds) if seconds else 0.0
+    if minutes >= 60 or seconds >= 60:
+        return None
+    value = float(degrees) + minutes / 60 + seconds / 3600
+    return -value if direction in NEGATIVE_DIRECTIONS else value
+
+
+def _valid(latitude: float, longitude: float) -> Optional[Coordinates]:
+    if -90 <= latitude <= 90 and -180 <= longitude <= 180:
+        return Coordinates(latitude, longitude)
+    return None
+
+
+@lru_cache(maxsize=4096)
+def parse_coordinates(text: str) -> Optional[Coordinates]:
+    """
+    Convierte coordenadas en texto a grados decimales. Formatos aceptados:
+    - '42°50′14″N 2°41′17″W' (DMS, también con "O" para oeste y segundos con decimales)
+    - "42°50'14\"N 2°41'17\"O" (marcas ASCII)
+    - '42°50.25′N 2°41.3′W' (grados y minutos con decimales)
+    - '42.2118°N 8.7397°W' (decimal con dirección)
+    - '42.2118, -8.7397' (decimales con signo, latitud primero)
+    Devuelve None si el texto no es una coordenada válida. El resultado se memoriza por texto.
+    """
+    if not text:
+        return None
+
+    # findall devuelve tuplas (grados, minutos, segundos, dirección)
+    components = DMS_COMPONENT.findall(text)
+    if len(components) == 2:
+        first, second = components
+        first_is_longitude = first[3] in LONGITUDE_DIRECTIONS
+        if first_is_longitude == (second[3] in LONGITUDE_DIRECTIONS):
+            return None  # dos latitudes o dos longitudes
+        if first_is_longitude:
+            # Viene primero la longitud ('3°41′18″O 40°27′11″N')
+            first, second = second, first
+        latitude = _component_to_decimal(*first)
+        longitude = _component_to_decimal(*second)
+        if latitude is None or longitude is None:
+            return None
+        return _valid(latitude, longitude)
+    if components:
+        return None
+
+    signed = SIGNED_PAIR.match(text)
+    if signed:
+        return _valid(float(signed["latitude"]), float(signed["longitude"]))
+    return None
+
+
+def parse_coordinates_many(texts: Iterable[str]) -> List[Optional[Coordinates]]:
+    """
+    Versión por lotes de parse_coordinates para una lista de strMap: cada texto distinto se
+    convierte una sola vez y el resultado queda alineado con la entrada.
+    """
+    texts = list(texts)
+    parsed = {text: parse_coordinates(text) for text in dict.fromkeys(texts)}
+    return [parsed[text] for text in texts]
+
+
+def looks_like_coordinates(text: str) -> bool:
+    """Indica si un strMap parece una coordenada (aunque no sea válida) en vez de un nombre de ciudad."""
+    return bool(text) and (COORDINATE_MARKS.search(text) is not None or NUMBER_PAIR.match(text) is not None)
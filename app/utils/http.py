@@ -0,0 +1,85 @@
+import asyncio
+import importlib.util
+import logging
+
+import httpx
+
+from app.config import get_settings
+
+log = logging.getLogger("uvicorn")
+
+# Registro de clientes HTTP compartidos, uno por servicio externo
+UPSTREAMS = ("sports", "weather", "llm")
+
+_clients: dict = {}
+
+
+def _build_client() -> httpx.AsyncClient:
+    settings = get_settings()
+    http2 = settings.http2_enabled
+    if http2 and importlib.util.find_spec("h2") is None:
+        log.warning("http2_enabled=True pero el paquete 'h2' no está instalado; se usará HTTP/1.1")
+        http2 = False
+
+    limits = httpx.Limits(
+        max_connections=settings.http_max_connections,
+        max_keepalive_connections=settings.http_max_keepalive_connections,
+        keepalive_expiry=settings.http_keepalive_expiry,
+    )
+    timeout = httpx.Timeout(
+        settings.http_read_timeout,
+        connect=settings.http_connect_timeout,
+    )
+    return httpx.AsyncClient(limits=limits, timeout=timeout, http2=http2)
+
+
+def create_clients():
+    """Crea los clientes compartidos. Se llama desde el lifespan de la aplicación."""
+    for name in UPSTREAMS:
+        if name not in _clients:
+            _clients[name] = _build_client()
+
+
+async def close_clients():
+    """Cierra los clientes y sus conexiones keep-alive al apagar la aplicación."""
+    while _clients:
+        _, client = _clients.popitem()
+        await client.aclose()
+
+
+def upstream_base_urls() -> dict:
+    settings = get_settings()
+    return {
+        "sports": settings.sports_base_url,
+        "weather": settings.weather_base_url,
+        "llm": settings.openai_base_url or "https://api.openai.com/v1",
+    }
+
+
+async def warm_up_clients() -> dict:
+    """
+    Abre una conexión keep-alive por servicio con un HEAD a su URL base (sin API key, no cuenta
+    contra las cuotas), así la primera actualización no paga DNS, TCP y TLS. El código de la
+    respuesta no importa; devuelve {servicio: True/False} según si se pudo conectar.
+    """
+    async def connect(name: str, url: str) -> bool:
+        try:
+            await get_client(name).head(url)
+            return True
+        except httpx.HTTPError:
+            return False
+
+    urls = upstream_base_urls()
+    results = await asyncio.gather(*(connect(name, url) for name, url in urls.items()))
+    return dict(zip(urls, results))
+
+
+def get_client(name: str) -> httpx.AsyncClient:
+    """
+    Devuelve el cliente compartido del servicio indicado.
+    Si la aplicación no pasó por el lifespan (scripts, pruebas) se crea al primer uso.
+    """
+    client = _clients.get(name)
+    if client is None or client.is_closed:
+        client = _clients[name] = _build_client()
+    return client
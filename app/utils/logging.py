@@ -1,3 +1,24 @@
+import random
+import sys
+
 from loguru import logger
 
-logger.add("logs/api.log", rotation="1 MB", level="DEBUG")
+from app.config import get_settings
+
+settings = get_settings()
+
+# Un solo sink a stderr; con LOG_JSON cada registro es una línea JSON con sus campos en "extra"
+logger.remove()
+logger.add(sys.stderr, level=settings.log_level, serialize=settings.log_json)
+if settings.log_file:
+    logger.add(settings.log_file, rotation="1 MB", level="DEBUG", serialize=settings.log_json)
+
+
+def sampled(rate: float = None) -> bool:
+    """
+    Indica si se escribe un log de detalle del camino crítico (una consulta por evento, etc.):
+    solo una fracción `rate` (LOG_SAMPLE_RATE por defecto) para que los logs no cuesten más que el trabajo.
+    """
+    if rate is None:
+        rate = settings.log_sample_rate
+    return rate >= 1 or random.random() < rate
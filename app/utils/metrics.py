@@ -0,0 +1,295 @@
+import asyncio
+import os
+import re
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+
+import prometheus_client
+from prometheus_client import CollectorRegistry, generate_latest, multiprocess
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from sqlalchemy import event
+
+# Buckets de latencia en segundos: de 1ms (caché, BD local) a 30s (LLM con reintentos)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Con varios workers (python -m app.server) cada proceso escribe sus métricas en archivos de este
+# directorio y /metrics los suma; prometheus_client lo lee al importarse, así que se fija antes de
+# importar la app
+MULTIPROC_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+
+# Sin las series *_created que prometheus_client agrega a cada contador e histograma
+prometheus_client.disable_created_metrics()
+
+
+def child_for(metric, labels: dict):
+    """Serie de prometheus_client para las etiquetas, guardada para no pasar por `.labels()` (y su lock) cada vez."""
+    if not metric.labelnames:
+        return metric.metric
+    key = tuple(map(labels.__getitem__, metric.labelnames))
+    child = metric._children.get(key)
+    if child is None:
+        child = metric._children[key] = metric.metric.labels(*key)
+    return child
+
+
+class Counter:
+    """Contador monotónico por combinación de etiquetas."""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), registry=None):
+        self.name = name
+        self.labelnames = tuple(labelnames)
+        self.metric = prometheus_client.Counter(name, documentation, self.labelnames, registry=registry)
+        self._children = {}
+
+    def inc(self, amount: float = 1, **labels):
+        child_for(self, labels).inc(amount)
+
+    def values(self) -> dict:
+        """Valores de este proceso: tupla de etiquetas -> total."""
+        return {
+            tuple(sample.labels[name] for name in self.labelnames): sample.value
+            for family in self.metric.collect() for sample in family.samples if sample.name.endswith("_total")
+        }
+
+
+class Histogram:
+    """Histograma acumulado por combinación de etiquetas (buckets, suma y cantidad)."""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS,
+                 registry=None):
+        self.name = name
+        self.labelnames = tuple(labelnames)
+        self.metric = prometheus_client.Histogram(
+            name, documentation, self.labelnames, buckets=tuple(sorted(buckets)), registry=registry
+        )
+        self._children = {}
+
+    def observe(self, value: float, **labels):
+        child_for(self, labels).observe(value)
+
+    @contextmanager
+    def time(self, **labels):
+        """Observa los segundos que tarda el bloque, también si lanza una excepción."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+
+class Registry:
+    """
+    Métricas de la aplicación sobre prometheus_client. Además de contadores e histogramas acepta
+    colectores: funciones que se llaman al exportar y devuelven (nombre, tipo, ayuda,
+    [(etiquetas, valor)]), para leer las estadísticas que ya llevan las cachés sin tocar su camino
+    crítico.
+
+    Con PROMETHEUS_MULTIPROC_DIR (varios workers) los contadores e histogramas se suman entre
+    procesos, también los de workers que ya terminaron, así que no retroceden según qué worker
+    atienda el scrape. Los colectores leen estado de cada proceso: `sync()` copia sus valores a
+    métricas de prometheus_client (los contadores se suman; los gauges llevan la etiqueta pid de
+    cada worker vivo) y corre antes de cada scrape y cada METRICS_SYNC_SECONDS en cada worker.
+    """
+
+    def __init__(self):
+        self.prometheus = CollectorRegistry(auto_describe=True)
+        self.multiprocess = bool(MULTIPROC_DIR)
+        self.collectors = [self._collect_caches]
+        self.caches = {}
+        self._mirrors = {}
+        self._synced = {}
+        if not self.multiprocess:
+            self.prometheus.register(self)
+
+    def counter(self, name: str, documentation: str, labelnames: tuple = ()) -> Counter:
+        return Counter(name, documentation, labelnames, registry=self.prometheus)
+
+    def histogram(self, name: str, documentation: str, labelnames: tuple = (),
+                  buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        return Histogram(name, documentation, labelnames, buckets, registry=self.prometheus)
+
+    def collector(self, function):
+        """Registra un colector; se puede usar como decorador."""
+        self.collectors.append(function)
+        return function
+
+    def cache(self, name: str, stats):
+        """Expone los aciertos, fallos y tamaño de una caché; `stats()` devuelve un dict con hits, misses y size."""
+        self.caches[name] = stats
+
+    def _collect_caches(self):
+        stats = {name: function() for name, function in self.caches.items()}
+        for key, kind, documentation in (
+            ("hits", "counter", "Aciertos de caché"),
+            ("misses", "counter", "Fallos de caché"),
+            ("size", "gauge", "Entradas en la caché"),
+        ):
+            samples = [({"cache": name}, values[key]) for name, values in stats.items() if key in values]
+            if samples:
+                suffix = "_total" if kind == "counter" else ""
+                yield f"cache_{key}{suffix}", kind, documentation, samples
+
+    def collect(self):
+        """Colectores como familias de prometheus_client (un solo proceso)."""
+        for collect in self.collectors:
+            for name, kind, documentation, samples in collect():
+                family_class = CounterMetricFamily if kind == "counter" else GaugeMetricFamily
+                label_names = list(samples[0][0]) if samples else []
+                family = family_class(name, documentation, labels=label_names)
+                for labels, value in samples:
+                    family.add_metric([str(labels[label]) for label in label_names], value)
+                yield family
+
+    def describe(self):
+        return []
+
+    def _mirror(self, name: str, kind: str, documentation: str, labelnames: tuple):
+        metric = self._mirrors.get(name)
+        if metric is None:
+            if kind == "counter":
+                metric = prometheus_client.Counter(name, documentation, labelnames, registry=None)
+            else:
+                metric = prometheus_client.Gauge(name, documentation, labelnames, registry=None,
+                                                 multiprocess_mode="liveall")
+            self._mirrors[name] = metric
+        return metric
+
+    def sync(self):
+        """Copia los valores de los colectores de este proceso a los archivos compartidos entre workers."""
+        for collect in self.collectors:
+            for name, kind, documentation, samples in collect():
+                for labels, value in samples:
+                    metric = self._mirror(name, kind, documentation, tuple(labels))
+                    child = metric.labels(**labels) if labels else metric
+                    if kind == "counter":
+                        key = (name, tuple(labels.items()))
+                        # Los colectores dan totales; al archivo va solo lo nuevo desde el último sync
+                        delta = value - self._synced.get(key, 0)
+                        if delta > 0:
+                            child.inc(delta)
+                        self._synced[key] = value
+                    else:
+                        child.set(value)
+
+    async def sync_periodically(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            self.sync()
+
+    def render(self) -> bytes:
+        """Exporta todas las métricas en el formato de texto de Prometheus (versión 0.0.4)."""
+        if not self.multiprocess:
+            return generate_latest(self.prometheus)
+        self.sync()
+        merged = CollectorRegistry()
+        multiprocess.MultiProcessCollector(merged)
+        return generate_latest(merged)
+
+
+registry = Registry()
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Servicios externos: thesportsdb ("sports"), api_clima ("weather") y OpenAI ("llm")
+upstream_seconds = registry.histogram(
+    "upstream_request_seconds", "Duración de las peticiones a servicios externos", ("upstream", "operation")
+)
+upstream_errors = registry.counter(
+    "upstream_errors_total", "Errores de servicios externos por tipo de excepción", ("upstream", "operation", "error")
+)
+
+# Sentencias SQL, por tipo de sentencia y tabla principal
+db_seconds = registry.histogram("db_statement_seconds", "Duración de las sentencias SQL", ("operation", "table"))
+db_errors = registry.counter("db_errors_total", "Sentencias SQL que fallaron", ("operation", "table"))
+
+# Peticiones HTTP a la API, por ruta (plantilla, no la URL con parámetros)
+request_seconds = registry.histogram(
+    "http_request_seconds", "Duración de las peticiones a la API hasta enviar la respuesta completa",
+    ("method", "route", "status"),
+)
+
+# Etapas de la actualización de eventos por liga (ver stage_timer en app/routes/events.py)
+refresh_stage_seconds = registry.histogram(
+    "refresh_stage_seconds", "Segundos por etapa de la actualización de una liga", ("stage",),
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0),
+)
+
+
+@contextmanager
+def track_upstream(upstream: str, operation: str):
+    """Mide una petición a un servicio externo y cuenta sus errores (la excepción se vuelve a lanzar)."""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        upstream_errors.inc(upstream=upstream, operation=operation, error=type(e).__name__)
+        raise
+    finally:
+        upstream_seconds.observe(time.perf_counter() - start, upstream=upstream, operation=operation)
+
+
+# Tabla principal de una sentencia: FROM / INTO / UPDATE <tabla>
+STATEMENT_TABLE = re.compile(r"\b(?:FROM|INTO|UPDATE)\s+\"?(\w+)", re.IGNORECASE)
+
+
+@lru_cache(maxsize=1024)
+def statement_labels(statement: str) -> tuple:
+    """(operación, tabla) de una sentencia SQL; SQLAlchemy reutiliza los mismos strings compilados."""
+    operation = statement.split(None, 1)[0].upper() if statement.strip() else "UNKNOWN"
+    match = STATEMENT_TABLE.search(statement)
+    return operation, match.group(1).lower() if match else ""
+
+
+def instrument_engine(engine):
+    """Registra en db_statement_seconds y db_errors_total cada sentencia de un engine síncrono (o `.sync_engine`)."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._metrics_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        operation, table = statement_labels(statement)
+        db_seconds.observe(time.perf_counter() - context._metrics_start, operation=operation, table=table)
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(exception_context):
+        operation, table = statement_labels(exception_context.statement or "")
+        db_errors.inc(operation=operation, table=table)
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI que mide cada petición hasta enviar el último fragmento de la respuesta
+    (incluye el streaming de /update-events). La ruta es la plantilla de FastAPI
+    (/update-events/{job_id}) para no crear una serie por URL.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            request_seconds.observe(
+                time.perf_counter() - start,
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=status,
+            )
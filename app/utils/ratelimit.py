@@ -0,0 +1,144 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+import httpx
+
+from app.utils.metrics import registry
+
+ratelimit_wait_seconds = registry.histogram(
+    "ratelimit_wait_seconds", "Espera en el limitador de tasa antes de llamar a un servicio externo", ("upstream",),
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+
+
+def retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    """Segundos de la cabecera Retry-After (número o fecha HTTP), o None si no viene o no se entiende."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket cuya tasa se ajusta sola a la cuota del servicio externo. `rate` es la tasa inicial
+    (peticiones/s) y `burst` el máximo de fichas acumuladas. Cada 429 reduce la tasa a la mitad y
+    pausa el bucket durante el Retry-After. Mientras las llamadas tienen que esperar al limitador, la
+    tasa sube: se duplica por segundo por debajo del 80% de la tasa del último 429 (o si nunca hubo
+    uno) y crece un 5% por segundo por encima. Así converge al máximo que acepta el servicio sin
+    configurarlo a mano.
+    Los 429 de peticiones enviadas antes del último ajuste no vuelven a bajar la tasa.
+
+    Las esperas son reservas: cada llamada toma una ficha aunque el saldo quede negativo y duerme lo
+    que falte, en orden de llegada. Si llega un 429 mientras duerme, la reserva se rehace con la tasa nueva.
+    """
+
+    MIN_RATE = 0.1
+    DECREASE = 0.5
+    # Crecimiento por segundo de tráfico limitado; cada respuesta aplica la fracción 1/rate
+    FAST_GROWTH = 2.0
+    GROWTH = 1.05
+
+    def __init__(self, name: str, rate: float, burst: int):
+        self.name = name
+        self.initial_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.ceiling = None  # tasa con la que llegó el último 429
+        self.epoch = 0  # cambia con cada 429 e invalida las reservas en curso
+        self.throttled = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+
+    def _refill(self, now: float):
+        # Mientras el bucket está pausado por un Retry-After no se acumulan fichas
+        start = max(self.updated, self.blocked_until)
+        if now > start:
+            self.tokens = min(self.burst, self.tokens + (now - start) * self.rate)
+            self.updated = now
+
+    async def acquire(self) -> float:
+        """Espera una ficha y devuelve los segundos de espera (0 si había una disponible)."""
+        start = time.monotonic()
+        waited = 0.0
+        while True:
+            epoch = self.epoch
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= 1
+            # El saldo negativo se paga a partir del fin de la pausa, no durante ella
+            delay = max(0.0, self.blocked_until - now) + max(0.0, -self.tokens / self.rate)
+            if delay <= 0:
+                break
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                # Se venció el plazo de la llamada (o se canceló) antes de usar la ficha reservada
+                self.tokens = min(self.burst, self.tokens + 1)
+                raise
+            waited = time.monotonic() - start
+            if self.epoch == epoch:
+                break
+        if waited:
+            self.waits += 1
+            self.wait_seconds += waited
+        ratelimit_wait_seconds.observe(waited, upstream=self.name)
+        return waited
+
+    def try_acquire(self) -> bool:
+        """Toma una ficha solo si hay una disponible ahora (para peticiones opcionales como el hedge)."""
+        now = time.monotonic()
+        self._refill(now)
+        if now < self.blocked_until or self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+    def success(self, waited: float):
+        """Respuesta correcta: si la llamada esperó por el limitador, se prueba una tasa algo mayor."""
+        if waited > 0:
+            fast = self.ceiling is None or self.rate < self.ceiling * 0.8
+            self.rate *= (self.FAST_GROWTH if fast else self.GROWTH) ** (1 / self.rate)
+
+    def throttle(self, retry_after: Optional[float], epoch: int) -> float:
+        """
+        El servicio respondió 429 a una petición enviada en `epoch`: baja la tasa, pausa el bucket
+        y devuelve la pausa en segundos.
+        """
+        self.throttled += 1
+        now = time.monotonic()
+        if epoch != self.epoch:
+            # Ya se ajustó por otro 429 de la misma ráfaga: solo se respeta la pausa vigente
+            return max(0.0, self.blocked_until - now)
+        self.ceiling = self.rate
+        self.rate = max(self.MIN_RATE, self.rate * self.DECREASE)
+        pause = retry_after if retry_after is not None else 1 / self.rate
+        self.blocked_until = max(self.blocked_until, now + pause)
+        self.tokens = 0.0
+        self.updated = now
+        self.epoch += 1
+        return pause
+
+    def stats(self) -> dict:
+        return {
+            "rate": round(self.rate, 2),
+            "initial_rate": self.initial_rate,
+            "burst": self.burst,
+            "throttled": self.throttled,
+            "waits": self.waits,
+            "wait_seconds": round(self.wait_seconds, 3),
+            "paused_for": round(max(0.0, self.blocked_until - time.monotonic()), 3),
+        }
@@ -0,0 +1,312 @@
+import asyncio
+import time
+from collections import deque
+from typing import Optional
+
+import httpx
+
+from app.config import get_settings
+from app.utils.metrics import registry, track_upstream
+from app.utils.ratelimit import AdaptiveRateLimiter, retry_after_seconds
+
+settings = get_settings()
+
+
+class CircuitOpen(Exception):
+    """El circuit breaker del servicio está abierto: se responde sin llamarlo."""
+
+    def __init__(self, upstream: str):
+        super().__init__(f"Circuito abierto para {upstream}")
+        self.upstream = upstream
+
+
+# Errores ante los que los llamadores usan datos en caché o valores de reemplazo
+UPSTREAM_ERRORS = (httpx.HTTPError, TimeoutError, CircuitOpen)
+
+
+def is_upstream_failure(error: BaseException) -> bool:
+    """
+    Errores que cuentan contra la salud del servicio; un 404 o un 400 son respuestas válidas y
+    un 429 lo maneja el limitador de tasa.
+    """
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code >= 500
+    return isinstance(error, (httpx.RequestError, TimeoutError))
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker por tasa de errores en una ventana de tiempo.
+    closed: deja pasar todo y se abre si en los últimos `window` segundos hubo al menos `min_calls`
+    llamadas y la fracción de fallos llegó a `error_rate`. open: rechaza todo durante `reset_timeout`
+    segundos. half_open: deja pasar una sola llamada de prueba; si funciona se cierra, si no se abre otra vez.
+    """
+
+    def __init__(self, error_rate: float, min_calls: int, window: float, reset_timeout: float):
+        self.error_rate = error_rate
+        self.min_calls = min_calls
+        self.window = window
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.outcomes = deque()  # (monotonic, ok) de las llamadas en la ventana
+        self.failures = 0
+        self.opened_at = None
+        self.probe_in_flight = False
+        self.opened = 0
+        self.rejected = 0
+
+    def allow(self) -> bool:
+        if self.state == "open":
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                self.rejected += 1
+                return False
+            self.state = "half_open"
+        if self.state == "half_open":
+            if self.probe_in_flight:
+                self.rejected += 1
+                return False
+            self.probe_in_flight = True
+        return True
+
+    def _prune(self, now: float):
+        while self.outcomes and now - self.outcomes[0][0] > self.window:
+            _, ok = self.outcomes.popleft()
+            if not ok:
+                self.failures -= 1
+
+    def _open(self):
+        self.state = "open"
+        self.opened_at = time.monotonic()
+        self.opened += 1
+        self.outcomes.clear()
+        self.failures = 0
+
+    def record(self, ok: bool):
+        if self.state == "half_open":
+            self.probe_in_flight = False
+            if ok:
+                self.state = "closed"
+            else:
+                self._open()
+            return
+        if self.state == "open":
+            return  # llamada que empezó antes de abrirse
+        now = time.monotonic()
+        self.outcomes.append((now, ok))
+        if not ok:
+            self.failures += 1
+        self._prune(now)
+        if len(self.outcomes) >= self.min_calls and self.failures / len(self.outcomes) >= self.error_rate:
+            self._open()
+
+    def release(self):
+        """La llamada se canceló sin resultado; libera la prueba de half_open."""
+        if self.state == "half_open":
+            self.probe_in_flight = False
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "calls_in_window": len(self.outcomes),
+            "failures_in_window": self.failures,
+            "opened": self.opened,
+            "rejected": self.rejected,
+        }
+
+
+class Upstream:
+    """
+    Política de resiliencia de un servicio externo: plazo por llamada (`timeout`, incluye el hedge),
+    circuit breaker y, si `hedge` está activo, una segunda petición idéntica cuando la primera tarda
+    más que el p95 de las últimas respuestas; se usa la que llegue primero y se cancela la otra.
+    Con `limiter`, cada GET espera una ficha del limitador de tasa y los 429 se reintentan hasta
+    `retries` veces respetando el Retry-After (el hedge solo sale si hay una ficha libre); la espera
+    y los reintentos cuentan dentro de `timeout`.
+    """
+
+    # Respuestas necesarias antes de calcular el p95 para el hedge
+    HEDGE_MIN_SAMPLES = 20
+
+    def __init__(self, name: str, timeout: float, breaker: CircuitBreaker, hedge: bool = False,
+                 hedge_min_delay: float = 0.05, limiter: Optional[AdaptiveRateLimiter] = None,
+                 retries: int = 3, max_retry_wait: float = 30.0):
+        self.name = name
+        self.timeout = timeout
+        self.breaker = breaker
+        self.limiter = limiter
+        self.retries = retries
+        self.max_retry_wait = max_retry_wait
+        self.throttled_retries = 0
+        self.hedge = hedge
+        self.hedge_min_delay = hedge_min_delay
+        self.latencies = deque(maxlen=200)
+        self._hedge_delay = None
+        self._observations = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.timeouts = 0
+
+    def hedge_delay(self) -> Optional[float]:
+        """p95 de las últimas respuestas (recalculado cada 20), o None si todavía no hay suficientes."""
+        if len(self.latencies) < self.HEDGE_MIN_SAMPLES:
+            return None
+        if self._hedge_delay is None or self._observations % 20 == 0:
+            ordered = sorted(self.latencies)
+            self._hedge_delay = max(self.hedge_min_delay, ordered[int(len(ordered) * 0.95) - 1])
+        return self._hedge_delay
+
+    async def _hedged(self, request):
+        delay = self.hedge_delay()
+        first = asyncio.ensure_future(request())
+        if delay is None:
+            return await first
+        tasks = {first}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done and (self.limiter is None or self.limiter.try_acquire()):
+                self.hedges += 1
+                tasks.add(asyncio.ensure_future(request()))
+            error = None
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not first:
+                            self.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def call(self, operation: str, request, hedge: bool = False):
+        """
+        Ejecuta `request()` (una función que devuelve una corrutina nueva en cada llamada) con el
+        breaker, el limitador y el plazo del servicio. El breaker se consulta antes de pedir una
+        ficha: con el circuito abierto lanza CircuitOpen enseguida y sin gastar fichas. La espera
+        del limitador y las pausas de los reintentos por 429 cuentan dentro del plazo; si se vence
+        lanza TimeoutError. `hedge` solo se debe usar en consultas idempotentes.
+        """
+        if not self.breaker.allow():
+            raise CircuitOpen(self.name)
+        # Si el plazo vence esperando al limitador, el servicio no llegó a fallar
+        in_flight = {"request": False}
+        try:
+            with track_upstream(self.name, operation):
+                async with asyncio.timeout(self.timeout) as deadline:
+                    result, latency = await self._attempts(request, hedge, deadline.when(), in_flight)
+        except asyncio.CancelledError:
+            self.breaker.release()
+            raise
+        except Exception as e:
+            if isinstance(e, TimeoutError):
+                self.timeouts += 1
+                if not in_flight["request"]:
+                    self.breaker.release()
+                    raise
+            self.breaker.record(not is_upstream_failure(e))
+            raise
+        self.breaker.record(True)
+        self.latencies.append(latency)
+        self._observations += 1
+        return result
+
+    async def _attempts(self, request, hedge: bool, deadline: float, in_flight: dict) -> tuple:
+        """
+        Una petición por ficha del limitador; un 429 se reintenta tras la pausa del limitador salvo
+        que el Retry-After supere `max_retry_wait` o lo que queda del plazo. Devuelve el resultado y
+        la latencia de la petición que respondió (sin la espera del limitador, para el p95 del hedge).
+        """
+        attempt = 0
+        while True:
+            waited = await self.limiter.acquire() if self.limiter else 0.0
+            epoch = self.limiter.epoch if self.limiter else 0
+            start = time.perf_counter()
+            in_flight["request"] = True
+            try:
+                result = await (self._hedged(request) if hedge and self.hedge else request())
+            except httpx.HTTPStatusError as e:
+                if self.limiter is None or e.response.status_code != 429:
+                    raise
+                pause = self.limiter.throttle(retry_after_seconds(e.response), epoch)
+                remaining = deadline - asyncio.get_running_loop().time()
+                if attempt >= self.retries or pause > min(self.max_retry_wait, remaining):
+                    raise
+                attempt += 1
+                self.throttled_retries += 1
+                in_flight["request"] = False
+                continue
+            if self.limiter:
+                self.limiter.success(waited)
+            return result, time.perf_counter() - start
+
+    async def get(self, client: httpx.AsyncClient, url: str, operation: str, hedge: bool = False) -> httpx.Response:
+        """GET con raise_for_status bajo la política del servicio; las respuestas 5xx cuentan como fallo."""
+        async def request():
+            response = await client.get(url)
+            response.raise_for_status()
+            return response
+
+        return await self.call(operation, request, hedge=hedge)
+
+    def stats(self) -> dict:
+        delay = self.hedge_delay()
+        return {
+            "breaker": self.breaker.stats(),
+            "timeout": self.timeout,
+            "timeouts": self.timeouts,
+            "hedge": self.hedge,
+            "hedge_delay_ms": round(delay * 1000, 1) if delay is not None else None,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "throttled_retries": self.throttled_retries,
+            "rate_limit": self.limiter.stats() if self.limiter else None,
+        }
+
+
+def build_upstream(name: str, timeout: float, rate_limit: float) -> Upstream:
+    breaker = CircuitBreaker(
+        settings.breaker_error_rate,
+        settings.breaker_min_calls,
+        settings.breaker_window_seconds,
+        settings.breaker_reset_seconds,
+    )
+    # rate_limit <= 0 desactiva el limitador (y con él los reintentos de 429)
+    limiter = AdaptiveRateLimiter(name, rate_limit, settings.rate_limit_burst) if rate_limit > 0 else None
+    return Upstream(name, timeout, breaker, hedge=name in settings.hedge_upstreams,
+                    hedge_min_delay=settings.hedge_min_delay, limiter=limiter,
+                    retries=settings.rate_limit_retries, max_retry_wait=settings.rate_limit_max_wait)
+
+
+# Servicios con política de resiliencia (el LLM tiene sus propios reintentos en app/llm.py).
+# Cada servicio usa una sola API key, así que hay un limitador por servicio.
+upstreams = {
+    "sports": build_upstream("sports", settings.sports_timeout, settings.sports_rate_limit),
+    "weather": build_upstream("weather", settings.weather_timeout, settings.weather_rate_limit),
+}
+
+BREAKER_STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+
+@registry.collector
+def upstream_metrics():
+    yield "circuit_breaker_state", "gauge", "Estado del circuit breaker (0 cerrado, 1 semiabierto, 2 abierto)", [
+        ({"upstream": name}, BREAKER_STATES[upstream.breaker.state]) for name, upstream in upstreams.items()
+    ]
+    yield "circuit_breaker_rejected_total", "counter", "Llamadas rechazadas con el circuito abierto", [
+        ({"upstream": name}, upstream.breaker.rejected) for name, upstream in upstreams.items()
+    ]
+    yield "upstream_hedges_total", "counter", "Segundas peticiones (hedge) enviadas", [
+        ({"upstream": name}, upstream.hedges) for name, upstream in upstreams.items()
+    ]
+    yield "upstream_hedge_wins_total", "counter", "Hedges que respondieron antes que la petición original", [
+        ({"upstream": name}, upstream.hedge_wins) for name, upstream in upstreams.items()
+    ]
+    limited = [(name, upstream.limiter) for name, upstream in upstreams.items() if upstream.limiter]
+    yield "ratelimit_rate", "gauge", "Tasa actual del limitador (peticiones/s)", [
+        ({"upstream": name}, limiter.rate) for name, limiter in limited
+    ]
+    yield "upstream_throttled_total", "counter", "Respuestas 429 de servicios externos", [
+        ({"upstream": name}, limiter.throttled) for name, limiter in limited
+    ]
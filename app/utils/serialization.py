@@ -0,0 +1,26 @@
+import json
+from datetime import date
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional; sin él se usa json de la librería estándar
+    orjson = None
+
+
+def dumps(data) -> bytes:
+    """JSON compacto en UTF-8, igual al que genera FastAPI pero sin pasar por pydantic."""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+def _default(value):
+    # orjson serializa fechas en ISO 8601; json de la librería estándar necesita ayuda
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} no es serializable a JSON")
+
+
+def project(data: dict, fields: tuple) -> dict:
+    """Copia solo las llaves de `fields` (las del schema de respuesta), con None si faltan."""
+    return {field: data.get(field) for field in fields}
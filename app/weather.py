@@ -0,0 +1,102 @@
+import asyncio
+import time
+import unicodedata
+
+from app.config import get_settings
+from app.utils.cache import MISSING, TTLCache
+from app.utils.logging import logger
+from app.utils.metrics import registry
+
+settings = get_settings()
+
+# Respuesta usada cuando api_clima no devuelve datos; nunca se guarda en caché
+UNKNOWN_WEATHER = {"temperature": "Desconocida", "wind_speed": "Desconocido", "description": "No disponible"}
+
+
+class WeatherCache:
+    """
+    Caché de clima por ubicación y franja horaria.
+    - La llave es la ciudad normalizada o las coordenadas redondeadas a una malla, más la franja actual.
+    - Peticiones simultáneas para la misma llave comparten una sola consulta en curso.
+    - Si solo existe el dato de la franja anterior se devuelve de inmediato y se refresca en segundo plano.
+    """
+
+    def __init__(self, maxsize: int, bucket_seconds: int, grid: float):
+        self.bucket_seconds = bucket_seconds
+        self.grid = grid
+        # Cada entrada vive dos franjas: la suya como dato fresco y la siguiente como dato viejo
+        self.cache = TTLCache(maxsize, 2 * bucket_seconds)
+        self.inflight = {}
+        self.fetches = 0
+        self.coalesced = 0
+        self.stale_served = 0
+
+    def city_key(self, city: str) -> tuple:
+        normalized = unicodedata.normalize("NFKD", city or "")
+        normalized = "".join(c for c in normalized if not unicodedata.combining(c))
+        return ("city", " ".join(normalized.casefold().split()))
+
+    def coordinates_key(self, latitude: float, longitude: float) -> tuple:
+        return (
+            "coords",
+            round(round(latitude / self.grid) * self.grid, 6),
+            round(round(longitude / self.grid) * self.grid, 6),
+        )
+
+    def _bucket(self) -> int:
+        return int(time.time() // self.bucket_seconds)
+
+    async def get_or_fetch(self, key: tuple, fetch) -> dict:
+        """Devuelve el clima cacheado para `key` o lo obtiene con la corrutina `fetch()`."""
+        bucket = self._bucket()
+        value = self.cache.get((key, bucket))
+        if value is not MISSING:
+            return dict(value)
+
+        stale = self.cache.get((key, bucket - 1))
+        if stale is not MISSING:
+            self.stale_served += 1
+            self._refresh(key, bucket, fetch)
+            return dict(stale)
+
+        # shield: si el llamador se cancela, la consulta compartida sigue para los demás
+        return dict(await asyncio.shield(self._refresh(key, bucket, fetch)))
+
+    def _refresh(self, key: tuple, bucket: int, fetch) -> asyncio.Task:
+        task = self.inflight.get((key, bucket))
+        if task is not None:
+            self.coalesced += 1
+            return task
+        task = asyncio.create_task(self._fetch(key, bucket, fetch))
+        self.inflight[(key, bucket)] = task
+        task.add_done_callback(lambda t: self._done(key, bucket, t))
+        return task
+
+    def _done(self, key: tuple, bucket: int, task: asyncio.Task):
+        self.inflight.pop((key, bucket), None)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Error al refrescar el clima para {key}: {error}", key=str(key), error=str(task.exception()))
+
+    async def _fetch(self, key: tuple, bucket: int, fetch) -> dict:
+        self.fetches += 1
+        value = await fetch()
+        if value.get("temperature") != UNKNOWN_WEATHER["temperature"]:
+            self.cache.set((key, bucket), value)
+        return value
+
+    def stats(self) -> dict:
+        return {
+            **self.cache.stats(),
+            "fetches": self.fetches,
+            "coalesced": self.coalesced,
+            "stale_served": self.stale_served,
+            "inflight": len(self.inflight),
+        }
+
+
+weather_cache = WeatherCache(
+    settings.weather_cache_size,
+    settings.weather_cache_bucket_seconds,
+    settings.weather_cache_grid,
+)
+registry.cache("weather", weather_cache.stats)
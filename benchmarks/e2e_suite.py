@@ -0,0 +1,265 @@
+"""
+Suite de rendimiento de punta a punta, reproducible y sin red.
+
+Levanta stubs de thesportsdb y api_clima que reproducen respuestas grabadas (benchmarks/recorded,
+ver benchmarks/fixtures.py), un stub de OpenAI, la API sobre SQLite (o --database-url de Postgres;
+las tablas se borran y se vuelven a crear) y mide:
+
+- refresh: tiempo de POST /update-events?wait=true en frío y repetido (incremental), con las
+  llamadas a cada servicio externo por endpoint.
+- /next sin filtros, /next filtrado por liga y /login: req/s, p50 y p99 con --concurrency clientes
+  desde otro proceso.
+- import: segundos de `import app.main` en un proceso nuevo (ver benchmarks/startup_bench.py).
+
+La latencia y la tasa de errores de cada stub se inyectan por parámetro. Los resultados se guardan
+en JSON (por defecto benchmarks/results/<commit>.json) para comparar entre commits con --compare.
+
+Uso:
+    python -m benchmarks.e2e_suite --leagues 4 --requests 2000 --concurrency 16
+    python -m benchmarks.e2e_suite --error-rate 0.05 --compare benchmarks/results/abc1234.json
+    python -m benchmarks.e2e_suite --record   # graba los fixtures contra los servicios reales
+"""
+import argparse
+import copy
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from functools import partial
+
+import httpx
+
+from benchmarks.fixtures import fixture_key, load_fixture, save_fixture
+from benchmarks.startup_bench import measure_import
+from benchmarks.stubs import ServerThread, bench_env, create_tables, llm_stub, recording_stub, replay_stub, run_load
+
+EVENTS = "/kingtide/api/events"
+USERS = "/kingtide/api/users"
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+CREDENTIALS = {"email": "suite@example.com", "password": "contraseña-de-prueba"}
+
+# Métricas que se comparan con --compare: (ruta en el JSON, True si más alto es mejor)
+COMPARED = (
+    ("import.seconds", False),
+    ("refresh.cold.seconds", False),
+    ("refresh.warm.seconds", False),
+    ("next.rps", True),
+    ("next.p50_ms", False),
+    ("next.p99_ms", False),
+    ("next_filtered.rps", True),
+    ("next_filtered.p99_ms", False),
+    ("login.rps", True),
+    ("login.p99_ms", False),
+)
+
+
+def scale_leagues(fixture: dict, base_league: str, count: int) -> list:
+    """Copia los eventos grabados de `base_league` en `count - 1` ligas sintéticas; devuelve los ids."""
+    base = fixture["responses"][fixture_key("/eventsnextleague.php", f"id={base_league}")]["body"]
+    league_ids = [base_league]
+    for n in range(1, count):
+        id_league = f"{base_league}{n:03d}"
+        events = []
+        for event in base["events"] or []:
+            event = copy.deepcopy(event)
+            event["idEvent"] = f"{event['idEvent']}{n:03d}"
+            event["idLeague"] = id_league
+            events.append(event)
+        fixture["responses"][fixture_key("/eventsnextleague.php", f"id={id_league}")] = {
+            "status": 200, "body": {"events": events},
+        }
+        league_ids.append(id_league)
+    return league_ids
+
+
+def send(method: str, path: str, payload: dict, client: httpx.AsyncClient, worker: int, i: int):
+    return client.request(method, path, json=payload)
+
+
+def git_commit() -> tuple:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                                    capture_output=True, text=True, check=True).stdout.strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return "desconocido", False
+
+
+def lookup(results: dict, path: str):
+    value = results
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value
+
+
+def compare(previous: dict, current: dict):
+    print(f"\nComparación con {previous.get('commit')} ({previous.get('timestamp')}):")
+    if previous.get("params") != current.get("params") or previous.get("database") != current.get("database"):
+        print("  (atención: los parámetros o la BD de las dos corridas no coinciden)")
+    for path, higher_is_better in COMPARED:
+        before, after = lookup(previous, path), lookup(current, path)
+        if not before or after is None:
+            continue
+        change = (after - before) / before * 100
+        better = change > 0 if higher_is_better else change < 0
+        mark = "mejor" if better and abs(change) >= 5 else "peor" if abs(change) >= 5 else ""
+        print(f"  {path:<24} {before:>10} -> {after:>10} ({change:+6.1f}%) {mark}")
+
+
+def record(args):
+    """
+    Graba los fixtures con una actualización contra thesportsdb y api_clima reales (el LLM es el
+    stub). Usa SPORTS_KEY, SPORTS_BASE_URL y WEATHER_BASE_URL del entorno.
+    """
+    bench_env()
+    sports_url = os.environ.get("SPORTS_BASE_URL", "https://www.thesportsdb.com/api/v1/json")
+    weather_url = os.environ.get("WEATHER_BASE_URL", "http://api_clima:3000")
+    fixtures = {"sports": load_fixture("sports"), "weather": load_fixture("weather")}
+    sports = ServerThread(recording_stub(sports_url, fixtures["sports"])).start()
+    weather = ServerThread(recording_stub(weather_url, fixtures["weather"])).start()
+    llm = ServerThread(llm_stub(latency=0.0)).start()
+    bench_env(sports.url, weather.url, llm.url, f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'record.db')}")
+    os.environ["LEAGUES"] = json.dumps({id_league: 0 for id_league in args.record_leagues})
+
+    from app.main import app
+
+    create_tables()
+    api = ServerThread(app).start()
+    try:
+        httpx.post(f"{api.url}{EVENTS}/update-events?wait=true", timeout=600).raise_for_status()
+    finally:
+        for server in (api, llm, weather, sports):
+            server.stop()
+    for fixture in fixtures.values():
+        fixture["recorded_at"] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        print(f"{save_fixture(fixture)}: {len(fixture['responses'])} respuestas")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--league", default="4335", help="liga grabada que se usa como base")
+    parser.add_argument("--leagues", type=int, default=1, help="ligas en total (copias de la liga base)")
+    parser.add_argument("--sports-latency", type=float, default=0.05)
+    parser.add_argument("--weather-latency", type=float, default=0.05)
+    parser.add_argument("--llm-latency", type=float, default=0.5)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fracción de respuestas 5xx de cada stub")
+    parser.add_argument("--requests", type=int, default=2000, help="peticiones a /next por escenario")
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--bcrypt-rounds", type=int, default=12)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="archivo JSON de resultados")
+    parser.add_argument("--compare", default=None, help="resultados anteriores para comparar")
+    parser.add_argument("--record", action="store_true", help="grabar fixtures contra los servicios reales")
+    parser.add_argument("--record-leagues", nargs="+", default=["4335", "4351"])
+    args = parser.parse_args()
+
+    if args.record:
+        record(args)
+        return
+
+    sports_fixture = load_fixture("sports")
+    league_ids = scale_leagues(sports_fixture, args.league, args.leagues)
+    sports_app = replay_stub(sports_fixture, args.sports_latency, args.error_rate, args.seed)
+    weather_app = replay_stub(load_fixture("weather"), args.weather_latency, args.error_rate, args.seed)
+    llm_app = llm_stub(args.llm_latency, args.error_rate, args.seed)
+    sports, weather, llm = (ServerThread(stub).start() for stub in (sports_app, weather_app, llm_app))
+
+    database_url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'suite.db')}"
+    bench_env(sports.url, weather.url, llm.url, database_url)
+    os.environ["LEAGUES"] = json.dumps({id_league: 0 for id_league in league_ids})
+    os.environ["BCRYPT_ROUNDS"] = str(args.bcrypt_rounds)
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ["WARMUP_HTTP"] = "true"  # los stubs reciben el HEAD del calentamiento
+    import_time = measure_import(3)
+
+    from app.database import async_engine
+    from app.main import app
+
+    create_tables()
+    api = ServerThread(app).start()
+
+    def upstream_calls() -> dict:
+        calls = {"sports": dict(sports_app.state.calls), "weather": dict(weather_app.state.calls),
+                 "llm": llm_app.state.calls}
+        sports_app.state.calls.clear()
+        weather_app.state.calls.clear()
+        llm_app.state.calls = 0
+        return calls
+
+    def refresh() -> dict:
+        start = time.perf_counter()
+        response = httpx.post(f"{api.url}{EVENTS}/update-events?wait=true", timeout=600)
+        response.raise_for_status()
+        seconds = time.perf_counter() - start
+        leagues = response.json().get("result", {}).get("leagues", {})
+        return {
+            "seconds": round(seconds, 3),
+            "events": sum(league.get("events", 0) for league in leagues.values()),
+            "league_errors": sum(1 for league in leagues.values() if league.get("status") == "error"),
+            "upstream_calls": upstream_calls(),
+        }
+
+    commit, dirty = git_commit()
+    results = {
+        "commit": commit,
+        "dirty": dirty,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "database": async_engine.dialect.name,
+        "params": {key: value for key, value in vars(args).items() if key not in ("output", "compare", "record")},
+        "import": import_time,
+    }
+    try:
+        results["refresh"] = {"cold": refresh(), "warm": refresh()}
+        httpx.post(f"{api.url}{USERS}/register", json=CREDENTIALS).raise_for_status()
+        scenarios = (
+            ("next", "GET", f"{EVENTS}/next", None, args.requests),
+            ("next_filtered", "GET", f"{EVENTS}/next?id_league={args.league}&limit=10", None, args.requests),
+            ("login", "POST", f"{USERS}/login", CREDENTIALS, args.logins),
+        )
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            for name, method, path, payload, requests in scenarios:
+                results[name] = executor.submit(
+                    run_load, api.url, partial(send, method, path, payload), args.concurrency, requests
+                ).result()
+    finally:
+        for server in (api, llm, weather, sports):
+            server.stop()
+
+    print(f"import app.main {results['import']['seconds']:7.3f}s")
+    for phase in ("cold", "warm"):
+        data = results["refresh"][phase]
+        calls = data["upstream_calls"]
+        print(
+            f"refresh {phase:<5} {data['seconds']:7.2f}s  {data['events']} eventos  ligas con error {data['league_errors']}"
+            f"  sports {sum(calls['sports'].values())}  weather {sum(calls['weather'].values())}  llm {calls['llm']}"
+        )
+    for name in ("next", "next_filtered", "login"):
+        data = results[name]
+        print(f"{name:<14} {data['rps']:8.1f} req/s  p50 {data['p50_ms']:7.2f}ms  p99 {data['p99_ms']:7.2f}ms"
+              f"  errores {data['errors']}")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{commit}{'-dirty' if dirty else ''}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=1)
+        f.write("\n")
+    print(f"Resultados en {output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(json.load(f), results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Respuestas grabadas de thesportsdb y api_clima para reproducir una actualización sin red.
+
+Un fixture es un JSON por servicio en benchmarks/recorded/<servicio>.json:
+
+    {
+      "upstream": "sports",
+      "recorded_at": "2024-12-01T12:00:00+00:00",
+      "responses": {"eventsnextleague.php?id=4335": {"status": 200, "body": {...}}},
+      "defaults": {"lookupvenue.php": {"status": 200, "body": {"venues": null}}}
+    }
+
+La clave es el último segmento de la ruta más la query ordenada, así que la API key de
+thesportsdb (que va en la ruta) no queda grabada. `defaults` responde las consultas no
+grabadas de un endpoint. Los fixtures se graban con `python -m benchmarks.e2e_suite --record`
+(contra los servicios reales) o se generan desde un volcado como salida.txt:
+
+    python -m benchmarks.fixtures --from-dump salida.txt --league 4335
+"""
+import argparse
+import ast
+import json
+import os
+from datetime import datetime, timezone
+from urllib.parse import parse_qsl, urlencode
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "recorded")
+
+# Respuestas de thesportsdb y api_clima para lo que no esté grabado
+DEFAULTS = {
+    "sports": {
+        "lookupvenue.php": {"status": 200, "body": {"venues": None}},
+        "lookupteam.php": {"status": 200, "body": {"teams": None}},
+        "eventsnextleague.php": {"status": 200, "body": {"events": None}},
+    },
+    "weather": {
+        "clima": {
+            "status": 200,
+            "body": {"main": {"temp": 18.5}, "wind": {"speed": 3.2}, "weather": [{"description": "cielo claro"}]},
+        },
+    },
+}
+
+
+def fixture_key(path: str, query: str) -> str:
+    """'/<key>/lookupvenue.php' + 'id=1' -> 'lookupvenue.php?id=1' (sin la API key de la ruta)."""
+    endpoint = path.rstrip("/").rsplit("/", 1)[-1]
+    params = sorted(parse_qsl(query, keep_blank_values=True))
+    return f"{endpoint}?{urlencode(params)}" if params else endpoint
+
+
+def endpoint_of(key: str) -> str:
+    return key.split("?", 1)[0]
+
+
+def empty_fixture(upstream: str) -> dict:
+    return {
+        "upstream": upstream,
+        "recorded_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "responses": {},
+        "defaults": dict(DEFAULTS.get(upstream, {})),
+    }
+
+
+def fixture_path(upstream: str, directory: str = FIXTURES_DIR) -> str:
+    return os.path.join(directory, f"{upstream}.json")
+
+
+def load_fixture(upstream: str, directory: str = FIXTURES_DIR) -> dict:
+    """Fixture grabado del servicio, o uno vacío (solo `defaults`) si no existe."""
+    path = fixture_path(upstream, directory)
+    if not os.path.exists(path):
+        return empty_fixture(upstream)
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_fixture(fixture: dict, directory: str = FIXTURES_DIR) -> str:
+    os.makedirs(directory, exist_ok=True)
+    path = fixture_path(fixture["upstream"], directory)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(fixture, f, ensure_ascii=False, indent=1, sort_keys=True)
+        f.write("\n")
+    return path
+
+
+def fixture_from_dump(dump_path: str, id_league: str) -> dict:
+    """Fixture de thesportsdb a partir de un volcado (repr de Python) de eventsnextleague.php."""
+    with open(dump_path, encoding="utf-8") as f:
+        body = ast.literal_eval(f.read())
+    fixture = load_fixture("sports")
+    fixture["responses"][fixture_key("/eventsnextleague.php", f"id={id_league}")] = {"status": 200, "body": body}
+    return fixture
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--from-dump", required=True, help="volcado de eventsnextleague.php (ej. salida.txt)")
+    parser.add_argument("--league", default="4335")
+    args = parser.parse_args()
+
+    fixture = fixture_from_dump(args.from_dump, args.league)
+    path = save_fixture(fixture)
+    events = fixture["responses"][fixture_key("/eventsnextleague.php", f"id={args.league}")]["body"]["events"] or []
+    print(f"{path}: {len(events)} eventos de la liga {args.league}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Conversiones de coordenadas por segundo: convert_to_decimal anterior (re.findall sin compilar y
+funciones anidadas en cada llamada) vs app.utils.geo sin memoización, memorizado y por lotes.
+
+La mezcla de entrada imita los strMap de thesportsdb: pocos estadios distintos que se repiten.
+
+Uso:
+    python -m benchmarks.geo_parse_bench --values 100000 --distinct 500
+"""
+import argparse
+import random
+import re
+import time
+
+from app.utils.geo import parse_coordinates, parse_coordinates_many
+
+
+def legacy_convert_to_decimal(dms_str: str) -> tuple:
+    """Versión anterior de app/routes/events.py."""
+    try:
+        dms_pattern = r"(\d+)°(\d+)′(\d+)″([NSEWO])"
+        decimal_pattern = r"([\d\.]+)°([NSEWO])"
+
+        dms_matches = re.findall(dms_pattern, dms_str)
+        decimal_matches = re.findall(decimal_pattern, dms_str)
+
+        if len(dms_matches) == 2:
+            def dms_to_decimal(degrees, minutes, seconds, direction):
+                decimal = int(degrees) + int(minutes) / 60 + int(seconds) / 3600
+                if direction in ['S', 'W', 'O']:
+                    decimal = -decimal
+                return decimal
+
+            return dms_to_decimal(*dms_matches[0]), dms_to_decimal(*dms_matches[1])
+
+        elif len(decimal_matches) == 2:
+            def decimal_with_direction(value, direction):
+                decimal = float(value)
+                if direction in ['S', 'W', 'O']:
+                    decimal = -decimal
+                return decimal
+
+            return decimal_with_direction(*decimal_matches[0]), decimal_with_direction(*decimal_matches[1])
+
+        return None
+    except Exception as e:
+        print(f"Error al convertir coordenadas: {e}")
+        return None
+
+
+def sample(values: int, distinct: int, rng: random.Random) -> list:
+    pool = []
+    for i in range(distinct):
+        lat, lon = rng.uniform(-60, 60), rng.uniform(-120, 120)
+        if i % 2:
+            pool.append(f"{abs(lat):.4f}°{'N' if lat >= 0 else 'S'} {abs(lon):.4f}°{'E' if lon >= 0 else 'W'}")
+        else:
+            pool.append(
+                f"{int(abs(lat))}°{rng.randint(0, 59)}′{rng.randint(0, 59)}″{'N' if lat >= 0 else 'S'} "
+                f"{int(abs(lon))}°{rng.randint(0, 59)}′{rng.randint(0, 59)}″{'E' if lon >= 0 else 'O'}"
+            )
+    return [rng.choice(pool) for _ in range(values)]
+
+
+def timed(label: str, function, texts: list):
+    start = time.perf_counter()
+    function(texts)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {len(texts) / elapsed:>12,.0f} conversiones/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--values", type=int, default=100_000)
+    parser.add_argument("--distinct", type=int, default=500, help="strMap distintos en la entrada")
+    args = parser.parse_args()
+
+    texts = sample(args.values, args.distinct, random.Random(0))
+    for text in set(texts):
+        legacy = legacy_convert_to_decimal(text)
+        assert legacy is not None and parse_coordinates(text) is not None
+        assert all(abs(a - b) < 1e-9 for a, b in zip(legacy, parse_coordinates(text))), text
+
+    def uncached(values):
+        for text in values:
+            parse_coordinates.__wrapped__(text)
+
+    def memoized(values):
+        parse_coordinates.cache_clear()
+        for text in values:
+            parse_coordinates(text)
+
+    def batched(values):
+        parse_coordinates.cache_clear()
+        parse_coordinates_many(values)
+
+    print(f"{args.values} strMap, {args.distinct} distintos")
+    timed("convert_to_decimal anterior", lambda values: [legacy_convert_to_decimal(text) for text in values], texts)
+    timed("parse_coordinates sin caché", uncached, texts)
+    timed("parse_coordinates memorizado", memoized, texts)
+    timed("parse_coordinates_many", batched, texts)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Benchmark local: cliente httpx nuevo por petición vs cliente compartido (app.utils.http).
+
+Levanta un servidor HTTP/1.1 de prueba con keep-alive que cuenta las conexiones TCP
+aceptadas (cada una equivale a un handshake) y agrega una latencia fija al conectar,
+simulando el costo de TCP+TLS hacia thesportsdb.com o api_clima.
+
+Uso:
+    python -m benchmarks.http_client_bench --requests 200 --concurrency 8 --handshake-ms 30
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+
+import httpx
+
+# Valores mínimos para poder importar app.config sin un .dev_env
+for _var in ("DB_USER", "DB_PASS", "DB_HOST", "DB_PORT", "DB_NAME", "SECRET_KEY",
+             "ALGORITHM", "OPENAI_KEY", "WEATHER_KEY", "SPORTS_KEY"):
+    os.environ.setdefault(_var, "bench")
+
+from app.utils.http import close_clients, get_client  # noqa: E402
+from benchmarks.stubs import p99  # noqa: E402
+
+BODY = json.dumps({"main": {"temp": 20}, "wind": {"speed": 3}, "weather": [{"description": "despejado"}]}).encode()
+
+
+class StubServer:
+    def __init__(self, handshake_ms: float):
+        self.handshake_delay = handshake_ms / 1000
+        self.connections = 0
+        self.server = None
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        await asyncio.sleep(self.handshake_delay)
+        try:
+            while True:
+                request = await reader.readuntil(b"\r\n\r\n")
+                if not request:
+                    break
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    + f"Content-Length: {len(BODY)}\r\n\r\n".encode()
+                    + BODY
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self) -> str:
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        port = self.server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}/clima"
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+
+async def _run(url: str, total: int, concurrency: int, shared: bool) -> list:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            if shared:
+                response = await get_client("weather").get(url)
+            else:
+                async with httpx.AsyncClient() as client:
+                    response = await client.get(url)
+            response.raise_for_status()
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    await asyncio.gather(*(one() for _ in range(total)))
+    return latencies
+
+
+def _summary(name: str, connections: int, latencies: list, wall: float) -> dict:
+    latencies.sort()
+    return {
+        "mode": name,
+        "connections": connections,
+        "wall_s": round(wall, 3),
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p99_ms": round(p99(latencies), 2),
+    }
+
+
+async def main(total: int, concurrency: int, handshake_ms: float):
+    results = []
+    for name, shared in (("cliente por petición", False), ("cliente compartido", True)):
+        server = StubServer(handshake_ms)
+        url = await server.start()
+        start = time.perf_counter()
+        latencies = await _run(url, total, concurrency, shared)
+        wall = time.perf_counter() - start
+        await close_clients()
+        await server.stop()
+        results.append(_summary(name, server.connections, latencies, wall))
+
+    for row in results:
+        print(f"{row['mode']:<22} conexiones={row['connections']:<5} total={row['wall_s']}s "
+              f"p50={row['p50_ms']}ms p99={row['p99_ms']}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--handshake-ms", type=float, default=30.0)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency, args.handshake_ms))
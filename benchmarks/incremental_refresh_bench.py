@@ -0,0 +1,107 @@
+"""
+Costo de una actualización según la cantidad de partidos que cambiaron en eventsnextleague.php.
+
+Guarda una liga de `--events` partidos y la vuelve a actualizar cambiando la fecha de una parte
+de ellos: solo esos se vuelven a enriquecer (clima y LLM), así que el tiempo, las llamadas al LLM
+y las filas escritas crecen con los cambios y no con el total. `--force` muestra el costo de
+reenriquecer todo (force_predictions=true, el comportamiento anterior).
+
+Uso:
+    python -m benchmarks.incremental_refresh_bench --events 500 --changed 0 5 50 500
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from sqlalchemy import event
+
+from benchmarks.stubs import ServerThread, bench_env, create_tables, llm_stub, sports_stub, weather_stub
+
+LEAGUE = "7001"
+
+
+def fixture(i: int) -> dict:
+    return {
+        "idEvent": f"{LEAGUE}{i:05d}",
+        "strEvent": f"Local {i} vs Visita {i}",
+        "strHomeTeam": f"Local {i}",
+        "strAwayTeam": f"Visita {i}",
+        "idHomeTeam": f"1{i:05d}",
+        "idAwayTeam": f"2{i:05d}",
+        "dateEvent": f"2024-12-{i % 28 + 1:02d}",
+        "strTime": "20:00:00",
+        "idLeague": LEAGUE,
+        "idVenue": f"9{i:05d}",
+        "strVenue": f"Estadio {i}",
+        "strCountry": "Spain",
+    }
+
+
+async def run(events_module, force: bool = False) -> tuple:
+    from app.database import AsyncSessionLocal
+
+    start = time.perf_counter()
+    async with AsyncSessionLocal() as db:
+        result = await events_module.refresh_leagues(db, [LEAGUE], force_predictions=force)
+    return time.perf_counter() - start, result["leagues"][LEAGUE]
+
+
+async def main(args, fixtures: list):
+    import app.routes.events as events_module
+    from app.database import async_engine
+    from app.utils.http import close_clients, create_clients
+
+    statements = 0
+
+    def count(*_):
+        nonlocal statements
+        statements += 1
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", count)
+    create_clients()
+    await run(events_module)  # carga inicial: todos los partidos son nuevos
+
+    print(f"{args.events} partidos, LLM {args.llm_latency * 1000:.0f}ms por llamada")
+    print(f"{'cambiados':>10} {'tiempo':>8} {'enriquecidos':>13} {'sin cambios':>12} {'LLM':>5} {'SQL':>5}")
+    for round_number, changed in enumerate(args.changed, start=1):
+        for i in range(min(changed, len(fixtures))):
+            fixtures[i]["dateEvent"] = f"2025-01-{round_number % 28 + 1:02d}"
+        statements = 0
+        elapsed, league = await run(events_module)
+        print(
+            f"{changed:>10} {elapsed:>7.2f}s {league['enriched']:>13} {league['unchanged']:>12} "
+            f"{league['llm_calls']:>5} {statements:>5}"
+        )
+    if args.force:
+        statements = 0
+        elapsed, league = await run(events_module, force=True)
+        print(f"{'forzado':>10} {elapsed:>7.2f}s {league['enriched']:>13} {league['unchanged']:>12} "
+              f"{league['llm_calls']:>5} {statements:>5}")
+
+    await close_clients()
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=500)
+    parser.add_argument("--changed", type=int, nargs="+", default=[0, 5, 50, 500])
+    parser.add_argument("--llm-latency", type=float, default=0.05)
+    parser.add_argument("--force", action="store_true")
+    args = parser.parse_args()
+
+    fixtures = [fixture(i) for i in range(args.events)]
+    sports = ServerThread(sports_stub(latency=0.0, leagues={LEAGUE: fixtures})).start()
+    weather = ServerThread(weather_stub(latency=0.01)).start()
+    llm = ServerThread(llm_stub(latency=args.llm_latency)).start()
+    bench_env(sports_url=sports.url, weather_url=weather.url, llm_url=llm.url,
+              database_url=f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}")
+    os.environ["EVENT_CONCURRENCY"] = "32"
+    os.environ["LLM_CONCURRENCY"] = "32"
+    create_tables()
+
+    asyncio.run(main(args, fixtures))
+    for server in (sports, weather, llm):
+        server.stop()
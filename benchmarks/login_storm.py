@@ -0,0 +1,118 @@
+"""
+Prueba de carga: la latencia de GET /next no debe cambiar durante una ráfaga de logins.
+
+Levanta la API sobre SQLite con eventos precargados y un usuario registrado, mide /next en
+reposo y mientras otro proceso lanza `--logins` logins concurrentes en bucle. Con bcrypt en
+su propio executor el event loop sigue libre; termina con código 1 si el p99 de /next durante
+la ráfaga supera `--max-ratio` veces el de reposo (más un margen fijo).
+
+Uso:
+    python -m benchmarks.login_storm --logins 32 --seconds 5 --executor thread
+    python -m benchmarks.login_storm --executor process --workers 4
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import httpx
+from sqlalchemy import insert
+
+from benchmarks.stubs import ServerThread, bench_env, create_tables, p99, run_load
+
+USERS = "/kingtide/api/users"
+EVENTS = "/kingtide/api/events"
+CREDENTIALS = {"email": "storm@example.com", "password": "contraseña-de-prueba"}
+
+
+def seed_events(count: int):
+    from datetime import date, timedelta
+
+    from app.database import engine
+    from app.models import EventModel
+
+    rows = []
+    for i in range(count):
+        id_event = str(4335000 + i)
+        rows.append({
+            "id_event": id_event,
+            "id_league": "4335",
+            "date_event": date(2024, 12, 1) + timedelta(days=i % 30),
+            "event_data": {"idEvent": id_event, "idLeague": "4335", "strEvent": f"Local {i} vs Visita {i}"},
+        })
+    with engine.begin() as connection:
+        connection.execute(insert(EventModel), rows)
+
+
+async def send_login(client: httpx.AsyncClient, worker: int, i: int) -> httpx.Response:
+    return await client.post(f"{USERS}/login", json=CREDENTIALS)
+
+
+def measure(client: httpx.Client, seconds: float) -> list:
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        client.get(f"{EVENTS}/next").raise_for_status()
+        latencies.append((time.perf_counter() - start) * 1000)
+        time.sleep(0.005)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=32, help="logins concurrentes")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--executor", choices=("thread", "process"), default="thread")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--rounds", type=int, default=12, help="costo de bcrypt")
+    parser.add_argument("--events", type=int, default=200)
+    parser.add_argument("--max-ratio", type=float, default=3.0)
+    parser.add_argument("--slack-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    bench_env(database_url=f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}")
+    os.environ["BCRYPT_ROUNDS"] = str(args.rounds)
+    os.environ["PASSWORD_EXECUTOR"] = args.executor
+    os.environ["PASSWORD_WORKERS"] = str(args.workers)
+    os.environ["PASSWORD_MAX_QUEUE"] = str(args.logins * 2)
+
+    from app.main import app
+
+    create_tables()
+    seed_events(args.events)
+    api = ServerThread(app).start()
+
+    with httpx.Client(base_url=api.url, timeout=60) as client:
+        client.post(f"{USERS}/register", json=CREDENTIALS).raise_for_status()
+        client.get(f"{EVENTS}/next").raise_for_status()
+        idle = measure(client, args.seconds)
+
+        # La ráfaga corre en otro proceso para no competir por el GIL con el cliente de /next
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            storm = executor.submit(run_load, api.url, send_login, args.logins, seconds=args.seconds + 1)
+            time.sleep(0.5)
+            busy = measure(client, args.seconds)
+            logins = storm.result()
+        hashing = client.get(f"{USERS}/password-hashing").json()
+
+    api.stop()
+
+    idle_p99, busy_p99 = p99(idle), p99(busy)
+    print(f"bcrypt: costo {args.rounds}, executor {args.executor} x{args.workers}")
+    print(f"logins:                  {logins['statuses']} ({logins['rps']:.1f}/s)")
+    print(f"hash de contraseñas:     {hashing}")
+    print(f"/next en reposo:         n={len(idle)} p50={statistics.median(idle):.1f}ms p99={idle_p99:.1f}ms")
+    print(f"/next durante la ráfaga: n={len(busy)} p50={statistics.median(busy):.1f}ms p99={busy_p99:.1f}ms")
+
+    if busy_p99 > idle_p99 * args.max_ratio + args.slack_ms:
+        print("FALLO: el p99 de /next sube durante la ráfaga de logins")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Costo por llamada de la instrumentación del camino crítico: Histogram.observe, track_upstream,
+el log muestreado y, como referencia, el print de la respuesta completa de lookupvenue que se
+hacía antes en cada consulta (redirigido a /dev/null para medir solo el formateo y la escritura).
+
+Uso:
+    python -m benchmarks.metrics_overhead_bench --calls 200000
+"""
+import argparse
+import contextlib
+import os
+import sys
+import time
+
+from benchmarks.stubs import bench_env
+
+VENUE_RESPONSE = {
+    "venues": [{
+        "idVenue": "16012", "strVenue": "Estadio Santiago Bernabéu", "strMap": "40°27′11″N 3°41′18″O",
+        "strLocation": "Madrid", "strCountry": "Spain", "intCapacity": "81044",
+        "strDescriptionEN": "El estadio del Real Madrid. " * 40,
+    }]
+}
+
+
+def per_call(label: str, function, calls: int):
+    start = time.perf_counter()
+    for _ in range(calls):
+        function()
+    print(f"{label:<40} {(time.perf_counter() - start) / calls * 1e6:8.3f}µs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200_000)
+    args = parser.parse_args()
+
+    bench_env()
+    os.environ.setdefault("LOG_LEVEL", "INFO")
+    os.environ.setdefault("LOG_SAMPLE_RATE", "0.01")
+    from app.utils.logging import logger, sampled
+    from app.utils.metrics import registry, track_upstream, upstream_seconds
+
+    def observe():
+        upstream_seconds.observe(0.012, upstream="sports", operation="lookupvenue")
+
+    def tracked():
+        with track_upstream("sports", "lookupvenue"):
+            pass
+
+    def sampled_log():
+        if sampled():
+            logger.debug("Ubicación del estadio {id}: {location}", id="16012", location="40°27′11″N 3°41′18″O")
+
+    with open(os.devnull, "w") as devnull:
+        def old_print():
+            with contextlib.redirect_stdout(devnull):
+                print("Consultando evento:", "16012")
+                print("Respuesta del evento 16012:", VENUE_RESPONSE)
+                print("Ciudad obtenida para el evento 16012:", "40°27′11″N 3°41′18″O")
+
+        per_call("Histogram.observe", observe, args.calls)
+        per_call("track_upstream", tracked, args.calls)
+        per_call("log muestreado (1%, nivel INFO)", sampled_log, args.calls)
+        per_call("print de la respuesta completa (antes)", old_print, args.calls // 10)
+
+    start = time.perf_counter()
+    body = registry.render()
+    print(f"{'GET /metrics (render)':<40} {(time.perf_counter() - start) * 1000:8.3f}ms, {len(body)} bytes")
+    sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
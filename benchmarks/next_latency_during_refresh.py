@@ -0,0 +1,91 @@
+"""
+Prueba de latencia: el p99 de GET /next no debe subir mientras corre POST /update-events.
+
+Levanta los stubs de thesportsdb, api_clima y OpenAI (con latencia alta en el LLM), la API
+sobre SQLite y mide /next en reposo y durante una actualización. Termina con código 1 si el
+p99 durante la actualización supera `--max-ratio` veces el p99 en reposo (más un margen fijo).
+
+Uso:
+    python -m benchmarks.next_latency_during_refresh --llm-latency 1.0 --samples 200
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+import httpx
+
+from benchmarks.stubs import ServerThread, bench_env, create_tables, llm_stub, p99, sports_stub, weather_stub
+
+PREFIX = "/kingtide/api/events"
+
+
+def measure(client: httpx.Client, samples: int, stop: threading.Event = None) -> list:
+    latencies = []
+    while len(latencies) < samples and not (stop and stop.is_set()):
+        start = time.perf_counter()
+        client.get(f"{PREFIX}/next").raise_for_status()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--llm-latency", type=float, default=1.0)
+    parser.add_argument("--samples", type=int, default=200)
+    parser.add_argument("--max-ratio", type=float, default=3.0)
+    parser.add_argument("--slack-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    sports = ServerThread(sports_stub(latency=0.02)).start()
+    weather = ServerThread(weather_stub(latency=0.02)).start()
+    llm = ServerThread(llm_stub(latency=args.llm_latency)).start()
+    db_path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    bench_env(sports.url, weather.url, llm.url, f"sqlite:///{db_path}")
+    os.environ["PREDICTION_MAX_AGE"] = "1"  # fuerza llamadas al LLM en cada actualización
+
+    from app.main import app
+
+    create_tables()
+    api = ServerThread(app).start()
+
+    with httpx.Client(base_url=api.url, timeout=120) as client:
+        # Primera carga para que /next tenga datos
+        client.post(f"{PREFIX}/update-events?wait=true").raise_for_status()
+        idle = measure(client, args.samples)
+
+        done = threading.Event()
+        refresh_time = {}
+
+        def refresh():
+            start = time.perf_counter()
+            with httpx.Client(base_url=api.url, timeout=120) as refresh_client:
+                refresh_client.post(f"{PREFIX}/update-events?force_predictions=true&wait=true").raise_for_status()
+            refresh_time["s"] = time.perf_counter() - start
+            done.set()
+
+        worker = threading.Thread(target=refresh)
+        worker.start()
+        time.sleep(0.1)
+        busy = measure(client, args.samples, stop=done)
+        worker.join()
+
+    for server in (api, llm, weather, sports):
+        server.stop()
+
+    idle_p99, busy_p99 = p99(idle), p99(busy)
+    print(f"/next en reposo:        n={len(idle)} p50={statistics.median(idle):.1f}ms p99={idle_p99:.1f}ms")
+    print(f"/next durante refresh:  n={len(busy)} p50={statistics.median(busy):.1f}ms p99={busy_p99:.1f}ms")
+    print(f"duración del refresh:   {refresh_time['s']:.2f}s")
+
+    if busy_p99 > idle_p99 * args.max_ratio + args.slack_ms:
+        print("FALLO: el p99 de /next sube durante /update-events")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
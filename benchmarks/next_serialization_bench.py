@@ -0,0 +1,92 @@
+"""
+Micro-benchmark de serialización de /next: validación pydantic por fila + response_model
+(versión anterior) vs la ruta directa de serialize_events (datos ya validados al guardar).
+
+Ambas rutas se montan en apps FastAPI mínimas con las mismas filas en memoria y se miden
+peticiones/segundo con un cliente ASGI en el mismo proceso (sin red ni BD).
+
+Uso:
+    python -m benchmarks.next_serialization_bench --sizes 50 500 5000 --seconds 3
+"""
+import argparse
+import asyncio
+import time
+from types import SimpleNamespace
+from typing import List
+
+import httpx
+from fastapi import FastAPI, Response
+
+from benchmarks.stubs import bench_env
+
+
+def make_rows(count: int) -> list:
+    rows = []
+    for i in range(count):
+        rows.append(SimpleNamespace(event_data={
+            "idEvent": str(2070000 + i),
+            "strEvent": f"Local {i} vs Visita {i}",
+            "strHomeTeam": f"Local {i}",
+            "strAwayTeam": f"Visita {i}",
+            "idHomeTeam": str(133000 + i),
+            "idAwayTeam": str(134000 + i),
+            "dateEvent": "2024-12-02",
+            "strTime": "20:00:00",
+            "strHomeTeamBadge": "https://www.thesportsdb.com/images/media/team/badge/vpsqqx1473502977.png",
+            "strAwayTeamBadge": "https://www.thesportsdb.com/images/media/team/badge/rvspvt1473502960.png",
+            "idLeague": "4335",
+            "idVenue": "18689",
+            "strVenue": "Ramón Sánchez Pizjuán",
+            "clima": {"temperature": 14.2, "wind_speed": 3.1, "description": "nubes dispersas"},
+            "pronostico": "Partido parejo; el viento moderado favorece el juego por bandas. " * 3,
+        }))
+    return rows
+
+
+def build_apps(rows: list):
+    from app.routes.events import serialize_events
+    from app.schemas import Event
+
+    legacy = FastAPI()
+
+    @legacy.get("/next", response_model=List[Event])
+    def legacy_next():
+        return [Event(**row.event_data) for row in rows]
+
+    fast = FastAPI()
+
+    @fast.get("/next", response_model=List[Event])
+    def fast_next():
+        return Response(serialize_events(rows), media_type="application/json")
+
+    return legacy, fast
+
+
+async def requests_per_second(app, seconds: float) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        (await client.get("/next")).raise_for_status()
+        count = 0
+        start = time.perf_counter()
+        while time.perf_counter() - start < seconds:
+            (await client.get("/next")).raise_for_status()
+            count += 1
+        return count / (time.perf_counter() - start)
+
+
+async def main(sizes: list, seconds: float):
+    print(f"{'eventos':>8} {'pydantic req/s':>15} {'directo req/s':>14} {'mejora':>7}")
+    for size in sizes:
+        legacy, fast = build_apps(make_rows(size))
+        legacy_rps = await requests_per_second(legacy, seconds)
+        fast_rps = await requests_per_second(fast, seconds)
+        print(f"{size:>8} {legacy_rps:>15.1f} {fast_rps:>14.1f} {fast_rps / legacy_rps:>6.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 500, 5000])
+    parser.add_argument("--seconds", type=float, default=3.0)
+    args = parser.parse_args()
+    bench_env()
+    asyncio.run(main(args.sizes, args.seconds))
@@ -0,0 +1,104 @@
+"""
+Limitador de tasa adaptativo contra un thesportsdb simulado con cuota por API key: por encima de
+--quota peticiones/s el stub responde 429 con Retry-After. Se compara sin limitador (los 429 se
+pierden, como antes) con el limitador partiendo de una tasa muy baja y de una muy alta, para ver
+que converge a la cuota sin ajustarlo a mano.
+
+Uso:
+    python -m benchmarks.rate_limit_bench --calls 600 --quota 60
+"""
+import argparse
+import asyncio
+import time
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+from benchmarks.stubs import ServerThread, bench_env
+
+
+def quota_stub(quota: float, burst: int, retry_after: float) -> FastAPI:
+    app = FastAPI()
+    bucket = {"tokens": float(burst), "updated": time.monotonic()}
+
+    @app.get("/lookupvenue.php")
+    async def lookup_venue():
+        now = time.monotonic()
+        bucket["tokens"] = min(burst, bucket["tokens"] + (now - bucket["updated"]) * quota)
+        bucket["updated"] = now
+        if bucket["tokens"] < 1:
+            return JSONResponse({"error": "rate limited"}, status_code=429, headers={"Retry-After": str(retry_after)})
+        bucket["tokens"] -= 1
+        await asyncio.sleep(0.01)
+        return {"venues": [{"idVenue": "1", "strMap": "40°27′11″N 3°41′18″O"}]}
+
+    return app
+
+
+async def run_calls(upstream, client, url: str, calls: int, concurrency: int) -> tuple:
+    from app.utils.resilience import UPSTREAM_ERRORS
+
+    semaphore = asyncio.Semaphore(concurrency)
+    failed = 0
+
+    async def one():
+        nonlocal failed
+        async with semaphore:
+            try:
+                await upstream.get(client, url, "lookupvenue")
+            except UPSTREAM_ERRORS:
+                failed += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(calls)))
+    return time.perf_counter() - start, failed
+
+
+async def run(args, url: str):
+    import httpx
+    from app.utils.ratelimit import AdaptiveRateLimiter
+    from app.utils.resilience import CircuitBreaker, Upstream
+
+    scenarios = (
+        ("sin limitador", None),
+        (f"limitador desde {args.low_rate:g}/s", args.low_rate),
+        (f"limitador desde {args.high_rate:g}/s", args.high_rate),
+    )
+    print(f"{args.calls} consultas, cuota del servicio {args.quota:g}/s, concurrencia {args.concurrency}")
+    async with httpx.AsyncClient() as client:
+        for label, rate in scenarios:
+            await asyncio.sleep(args.retry_after)  # el stub recupera su cuota entre escenarios
+            limiter = AdaptiveRateLimiter("sports", rate, args.burst) if rate else None
+            upstream = Upstream("sports", 30.0, CircuitBreaker(1.1, 10**9, 30.0, 60.0), limiter=limiter,
+                                retries=args.retries, max_retry_wait=30.0)
+            elapsed, failed = await run_calls(upstream, client, url, args.calls, args.concurrency)
+            ok = args.calls - failed
+            extra = (
+                f"  429 {limiter.throttled:4d}  tasa final {limiter.rate:6.1f}/s  espera total {limiter.wait_seconds:6.1f}s"
+                if limiter else ""
+            )
+            print(f"  {label:<24} {elapsed:6.2f}s  correctas {ok:4d} ({ok / elapsed:6.1f}/s)  perdidas {failed:4d}{extra}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=600)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--quota", type=float, default=60.0, help="peticiones/s que acepta el stub")
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--low-rate", type=float, default=5.0)
+    parser.add_argument("--high-rate", type=float, default=500.0)
+    parser.add_argument("--burst", type=int, default=10)
+    parser.add_argument("--retries", type=int, default=3)
+    args = parser.parse_args()
+
+    bench_env()
+    server = ServerThread(quota_stub(args.quota, args.burst, args.retry_after)).start()
+    try:
+        asyncio.run(run(args, f"{server.url}/lookupvenue.php"))
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Lecturas con réplicas: una réplica sana (copia de la BD primaria tomada al arrancar, es decir,
+atrasada para todo lo que se escriba después) y una caída (ruta inexistente). Mide cuántas
+lecturas de /next van a cada destino y comprueba read-your-writes: un usuario registrado después
+de la copia tiene que poder hacer login enseguida con la cookie, sin ella (clave en el proceso) y
+una vez vencida la ventana (la réplica no lo tiene y el login lo confirma en el primario).
+Termina con código 1 si algún login falla o si las lecturas no se reparten como se espera.
+
+Uso:
+    python -m benchmarks.read_replica_bench --requests 200 --window 1
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.login_storm import seed_events
+from benchmarks.stubs import ServerThread, bench_env, create_tables
+
+USERS = "/kingtide/api/users"
+EVENTS = "/kingtide/api/events"
+
+
+def reads_by_target() -> dict:
+    from app.database import db_reads
+
+    return {key[0]: int(value) for key, value in db_reads.values().items()}
+
+
+def diff(after: dict, before: dict) -> dict:
+    return {target: count - before.get(target, 0) for target, count in after.items() if count - before.get(target, 0)}
+
+
+async def next_load(url: str, requests: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+    async with httpx.AsyncClient(base_url=url, timeout=30) as client:
+        async def one(i: int):
+            async with semaphore:
+                response = await client.get(f"{EVENTS}/next", params={"limit": 20, "team": str(i % 10)})
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(requests)))
+        return time.perf_counter() - start
+
+
+async def login(client: httpx.AsyncClient, email: str) -> tuple:
+    before = reads_by_target()
+    response = await client.post(f"{USERS}/login", json={"email": email, "password": "contraseña-de-prueba"})
+    return response.status_code, diff(reads_by_target(), before)
+
+
+async def read_your_writes(url: str, window: float) -> list:
+    checks = []
+    async with httpx.AsyncClient(base_url=url, timeout=30) as client:
+        email = "recien-con-cookie@example.com"
+        response = await client.post(f"{USERS}/register", json={"email": email, "password": "contraseña-de-prueba"})
+        response.raise_for_status()
+        checks.append(("registro + login con cookie", *await login(client, email)))
+
+    email = "recien-sin-cookie@example.com"
+    async with httpx.AsyncClient(base_url=url, timeout=30) as client:
+        (await client.post(f"{USERS}/register", json={"email": email, "password": "contraseña-de-prueba"})).raise_for_status()
+    async with httpx.AsyncClient(base_url=url, timeout=30) as client:
+        checks.append(("registro + login sin cookie", *await login(client, email)))
+
+    await asyncio.sleep(window + 0.1)
+    async with httpx.AsyncClient(base_url=url, timeout=30) as client:
+        checks.append(("login con la ventana vencida", *await login(client, email)))
+    return checks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--events", type=int, default=500)
+    parser.add_argument("--window", type=float, default=1.0, help="DB_READ_YOUR_WRITES_SECONDS")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    primary = os.path.join(directory, "primary.db")
+    replica = os.path.join(directory, "replica.db")
+    bench_env(database_url=f"sqlite:///{primary}")
+    os.environ["DB_REPLICA_URLS"] = json.dumps([f"sqlite:///{replica}", "sqlite:////no-existe/replica.db"])
+    os.environ["DB_READ_YOUR_WRITES_SECONDS"] = str(args.window)
+    os.environ.setdefault("BCRYPT_ROUNDS", "4")
+    create_tables()
+    seed_events(args.events)
+    shutil.copyfile(primary, replica)  # la réplica queda congelada en este punto
+
+    from app.database import read_replicas
+    from app.main import app
+
+    server = ServerThread(app).start()
+    failures = []
+    try:
+        for name, stats in read_replicas.stats().items():
+            state = "sana" if stats["healthy"] else f"caída ({stats['error']})"
+            print(f"{name}  {stats['url']:<60} {state}")
+        if [replica.healthy for replica in read_replicas.replicas] != [True, False]:
+            failures.append("estado de las réplicas")
+
+        before = reads_by_target()
+        elapsed = asyncio.run(next_load(server.url, args.requests, args.concurrency))
+        reads = diff(reads_by_target(), before)
+        print(f"/next filtrado  {args.requests} peticiones en {elapsed:.2f}s ({args.requests / elapsed:.0f} req/s)"
+              f"  lecturas por destino: {reads}")
+        if reads.get("replica0", 0) != args.requests:
+            failures.append("lecturas de /next fuera de la réplica")
+
+        for label, status, targets in asyncio.run(read_your_writes(server.url, args.window)):
+            print(f"{label:<30} HTTP {status}  lecturas: {targets}")
+            if status != 200:
+                failures.append(label)
+    finally:
+        server.stop()
+        shutil.rmtree(directory, ignore_errors=True)
+
+    if failures:
+        print(f"FALLÓ: {', '.join(failures)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Efecto de la política de resiliencia de app.utils.resilience contra un api_clima simulado:
+
+1. Cola lenta: una fracción de las respuestas tarda mucho más que el resto. Se compara p50/p99
+   sin hedge vs con hedge al p95.
+2. Caída: el servicio deja de responder (cada petición se cuelga hasta el plazo). Se compara el
+   tiempo total de una tanda de consultas con el circuit breaker desactivado vs activo.
+
+Uso:
+    python -m benchmarks.resilience_bench --calls 400 --slow-fraction 0.03 --slow-latency 0.5
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from fastapi import FastAPI
+
+from benchmarks.stubs import ServerThread, bench_env, percentile
+
+
+def flaky_weather_stub(latency: float, slow_fraction: float, slow_latency: float, seed: int = 0) -> FastAPI:
+    app = FastAPI()
+    app.state.down = False
+    rng = random.Random(seed)
+
+    @app.get("/clima")
+    async def clima():
+        if app.state.down:
+            await asyncio.sleep(3600)
+        await asyncio.sleep(slow_latency if rng.random() < slow_fraction else latency)
+        return {"main": {"temp": 18.5}, "wind": {"speed": 3.2}, "weather": [{"description": "cielo claro"}]}
+
+    return app
+
+
+async def tail_latency(upstream, client, url: str, calls: int, concurrency: int) -> list:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            await upstream.get(client, url, "clima", hedge=True)
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one() for _ in range(calls)))
+    return latencies
+
+
+async def outage(upstream, client, url: str, calls: int, concurrency: int) -> tuple:
+    from app.utils.resilience import UPSTREAM_ERRORS
+
+    semaphore = asyncio.Semaphore(concurrency)
+    failed = 0
+
+    async def one():
+        nonlocal failed
+        async with semaphore:
+            try:
+                await upstream.get(client, url, "clima")
+            except UPSTREAM_ERRORS:
+                failed += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(calls)))
+    return time.perf_counter() - start, failed
+
+
+async def run(args, stub_app, url: str):
+    import httpx
+    from app.utils.resilience import CircuitBreaker, Upstream
+
+    def breaker(enabled: bool) -> CircuitBreaker:
+        # min_calls inalcanzable = breaker desactivado
+        return CircuitBreaker(0.5, 10 if enabled else 10**9, 30.0, 60.0)
+
+    async with httpx.AsyncClient(limits=httpx.Limits(max_connections=200)) as client:
+        print(f"Cola lenta: {args.calls} consultas, {args.slow_fraction:.0%} tardan {args.slow_latency}s")
+        for label, hedge in (("sin hedge", False), ("hedge al p95", True)):
+            upstream = Upstream("weather", args.timeout, breaker(True), hedge=hedge)
+            await tail_latency(upstream, client, url, 50, args.concurrency)  # muestras para el p95
+            latencies = await tail_latency(upstream, client, url, args.calls, args.concurrency)
+            print(
+                f"  {label:<14} p50 {statistics.median(latencies) * 1000:7.1f}ms"
+                f"  p99 {percentile(latencies, 0.99) * 1000:7.1f}ms"
+                f"  hedges {upstream.hedges:4d} (ganaron {upstream.hedge_wins})"
+            )
+
+        stub_app.state.down = True
+        calls = args.outage_calls
+        print(f"Caída: {calls} consultas con plazo de {args.timeout}s")
+        for label, enabled in (("sin breaker", False), ("con breaker", True)):
+            upstream = Upstream("weather", args.timeout, breaker(enabled))
+            elapsed, failed = await outage(upstream, client, url, calls, args.concurrency)
+            print(
+                f"  {label:<14} {elapsed:7.2f}s  fallidas {failed}"
+                f"  rechazadas sin llamar {upstream.breaker.rejected}  timeouts {upstream.timeouts}"
+            )
+        stub_app.state.down = False
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--slow-fraction", type=float, default=0.03)
+    parser.add_argument("--slow-latency", type=float, default=0.5)
+    parser.add_argument("--timeout", type=float, default=1.0, help="plazo por llamada (WEATHER_TIMEOUT)")
+    parser.add_argument("--outage-calls", type=int, default=100)
+    args = parser.parse_args()
+
+    bench_env()
+    stub_app = flaky_weather_stub(args.latency, args.slow_fraction, args.slow_latency)
+    server = ServerThread(stub_app).start()
+    try:
+        asyncio.run(run(args, stub_app, f"{server.url}/clima"))
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
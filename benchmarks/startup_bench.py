@@ -0,0 +1,121 @@
+"""
+Tiempo de importación y de arranque en frío de la API.
+
+- Importación: segundos de `import app.main` en un proceso nuevo (mediana de --repeats) y qué
+  dependencias pesadas quedaron cargadas (openai, jose, passlib se importan en el primer uso).
+- Arranque en frío: desde lanzar el proceso hasta que GET / responde, la primera petición a
+  /next y lo que tarda en salir tras SIGTERM, con uvicorn en un proceso y con `python -m app.server`
+  (gunicorn con --workers workers y preload). Incluye el calentamiento de BD y clientes HTTP
+  contra stubs locales.
+
+Uso:
+    python -m benchmarks.startup_bench --repeats 5 --workers 2 --output startup.json
+"""
+import argparse
+import json
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.stubs import ServerThread, bench_env, create_tables, llm_stub, sports_stub, weather_stub
+
+HEAVY_MODULES = ("openai", "jose", "passlib", "bcrypt", "httpx", "sqlalchemy", "fastapi")
+
+IMPORT_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - start
+print(json.dumps({"seconds": elapsed, "loaded": [m for m in %r if m in sys.modules]}))
+""" % (HEAVY_MODULES,)
+
+
+def measure_import(repeats: int) -> dict:
+    """Importa app.main en `repeats` procesos nuevos; usa las variables de entorno actuales."""
+    runs = []
+    for _ in range(repeats):
+        output = subprocess.run([sys.executable, "-c", IMPORT_SCRIPT], capture_output=True, text=True, check=True)
+        runs.append(json.loads(output.stdout.strip().splitlines()[-1]))
+    return {
+        "seconds": round(statistics.median(run["seconds"] for run in runs), 3),
+        "min_seconds": round(min(run["seconds"] for run in runs), 3),
+        "loaded": runs[-1]["loaded"],
+    }
+
+
+def cold_start(command: list, port: int, timeout: float = 60.0) -> dict:
+    url = f"http://127.0.0.1:{port}"
+    start = time.perf_counter()
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+    try:
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"{' '.join(command)} terminó con código {process.returncode}")
+            try:
+                if httpx.get(f"{url}/", timeout=1).status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            if time.perf_counter() - start > timeout:
+                raise RuntimeError(f"{' '.join(command)} no respondió en {timeout}s")
+            time.sleep(0.02)
+        ready = time.perf_counter() - start
+
+        request_start = time.perf_counter()
+        httpx.get(f"{url}/kingtide/api/events/next", timeout=30).raise_for_status()
+        first_next = time.perf_counter() - request_start
+    finally:
+        stop_start = time.perf_counter()
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait(timeout=60)
+        shutdown = time.perf_counter() - stop_start
+    return {
+        "ready_seconds": round(ready, 3),
+        "first_next_ms": round(first_next * 1000, 1),
+        "shutdown_seconds": round(shutdown, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--output", default=None, help="archivo JSON de resultados")
+    args = parser.parse_args()
+
+    stubs = [ServerThread(app).start() for app in (sports_stub(0.0), weather_stub(0.0), llm_stub(0.0))]
+    bench_env(*(stub.url for stub in stubs), f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'startup.db')}")
+    os.environ["WARMUP_HTTP"] = "true"  # los stubs reciben el HEAD del calentamiento
+    create_tables()
+
+    results = {"import": measure_import(args.repeats)}
+    print(f"import app.main       {results['import']['seconds']:.3f}s (mín. {results['import']['min_seconds']:.3f}s)"
+          f"  cargados: {', '.join(results['import']['loaded'])}")
+
+    commands = {
+        "uvicorn": [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port), "--log-level", "warning"],
+        "app.server": [sys.executable, "-m", "app.server", "--workers", str(args.workers), "--port", str(args.port)],
+    }
+    for name, command in commands.items():
+        results[name] = cold_start(command, args.port)
+        data = results[name]
+        print(f"{name:<20}  listo en {data['ready_seconds']:.3f}s  primer /next {data['first_next_ms']:.1f}ms"
+              f"  apagado {data['shutdown_seconds']:.3f}s")
+
+    for stub in stubs:
+        stub.stop()
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=1)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+"""
+Servidores locales que reemplazan a thesportsdb, api_clima y OpenAI en los benchmarks.
+
+Cada stub es una app FastAPI con latencia configurable que corre con uvicorn en un hilo.
+`replay_stub` responde desde un fixture grabado (ver benchmarks/fixtures.py) con latencia y
+tasa de errores inyectadas, y `recording_stub` reenvía al servicio real y graba las respuestas.
+`bench_env()` configura las variables de entorno para que la API apunte a los stubs y a
+una BD SQLite; debe llamarse antes de importar cualquier módulo de `app`.
+`percentile()`/`p99()` y `load()`/`run_load()` son las medidas comunes a todos los benchmarks, para
+que sus números se puedan comparar entre sí.
+"""
+import asyncio
+import json
+import math
+import os
+import random
+import re
+import statistics
+import threading
+import time
+from collections import Counter
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from benchmarks.fixtures import endpoint_of, fixture_key
+
+
+def sports_stub(latency: float = 0.05, leagues: dict = None, events_per_league: int = 10) -> FastAPI:
+    app = FastAPI()
+    leagues = leagues or {}
+
+    def _events(id_league: str) -> list:
+        if id_league in leagues:
+            return leagues[id_league]
+        return [
+            {
+                "idEvent": f"{id_league}{i:04d}",
+                "strEvent": f"Local {i} vs Visita {i}",
+                "strHomeTeam": f"Local {i}",
+                "strAwayTeam": f"Visita {i}",
+                "idHomeTeam": f"{id_league}1{i:03d}",
+                "idAwayTeam": f"{id_league}2{i:03d}",
+                "dateEvent": f"2024-12-{i % 28 + 1:02d}",
+                "strTime": "20:00:00",
+                "idLeague": id_league,
+                "idVenue": f"{id_league}9{i:03d}",
+                "strVenue": f"Estadio {i}",
+                "strCountry": "Spain",
+            }
+            for i in range(events_per_league)
+        ]
+
+    @app.get("/{key}/eventsnextleague.php")
+    async def events_next_league(key: str, id: str):
+        await asyncio.sleep(latency)
+        return {"events": _events(id)}
+
+    @app.get("/{key}/lookupvenue.php")
+    async def lookup_venue(key: str, id: str):
+        await asyncio.sleep(latency)
+        return {"venues": [{"idVenue": id, "strMap": "40°27′11″N 3°41′18″O" if int(id[-1]) % 2 else None}]}
+
+    @app.get("/{key}/lookupteam.php")
+    async def lookup_team(key: str, id: str):
+        await asyncio.sleep(latency)
+        return {"teams": [{"idTeam": id, "strLocation": "Madrid"}]}
+
+    return app
+
+
+def weather_stub(latency: float = 0.05) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/clima")
+    async def clima(request: Request):
+        await asyncio.sleep(latency)
+        return {"main": {"temp": 18.5}, "wind": {"speed": 3.2}, "weather": [{"description": "cielo claro"}]}
+
+    return app
+
+
+def replay_stub(fixture: dict, latency: float = 0.05, error_rate: float = 0.0, seed: int = 0) -> FastAPI:
+    """
+    Responde cada GET con la respuesta grabada para su ruta y query (o el default del endpoint,
+    o 404). Una fracción `error_rate` de las peticiones responde 503. `app.state.calls` cuenta
+    las peticiones por endpoint.
+    """
+    app = FastAPI()
+    app.state.calls = Counter()
+    rng = random.Random(seed)
+    responses = fixture.get("responses", {})
+    defaults = fixture.get("defaults", {})
+
+    @app.get("/{path:path}")
+    async def replay(path: str, request: Request):
+        key = fixture_key(path, request.url.query)
+        endpoint = endpoint_of(key)
+        app.state.calls[endpoint] += 1
+        await asyncio.sleep(latency)
+        if error_rate and rng.random() < error_rate:
+            return JSONResponse({"error": "error inyectado"}, status_code=503)
+        recorded = responses.get(key) or defaults.get(endpoint)
+        if recorded is None:
+            return JSONResponse({"error": f"sin respuesta grabada para {key}"}, status_code=404)
+        return JSONResponse(recorded["body"], status_code=recorded["status"])
+
+    return app
+
+
+def recording_stub(upstream_url: str, fixture: dict) -> FastAPI:
+    """Reenvía cada GET a `upstream_url` y guarda la respuesta en `fixture["responses"]`."""
+    app = FastAPI()
+    app.state.calls = Counter()
+    client = httpx.AsyncClient(base_url=upstream_url.rstrip("/"), timeout=30)
+
+    @app.get("/{path:path}")
+    async def record(path: str, request: Request):
+        key = fixture_key(path, request.url.query)
+        app.state.calls[endpoint_of(key)] += 1
+        response = await client.get(f"/{path}", params=request.query_params)
+        try:
+            body = response.json()
+        except ValueError:
+            body = {"error": response.text}
+        fixture["responses"][key] = {"status": response.status_code, "body": body}
+        return JSONResponse(body, status_code=response.status_code)
+
+    return app
+
+
+def llm_stub(latency: float = 1.0, error_rate: float = 0.0, seed: int = 0) -> FastAPI:
+    """
+    Imita POST /v1/chat/completions de OpenAI. Con response_format json_object responde
+    un pronóstico por cada idEvent que aparezca en el prompt (modo por lote). Una fracción
+    `error_rate` de las peticiones responde 500.
+    """
+    app = FastAPI()
+    app.state.calls = 0
+    rng = random.Random(seed)
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        app.state.calls += 1
+        await asyncio.sleep(latency)
+        if error_rate and rng.random() < error_rate:
+            return JSONResponse({"error": {"message": "error inyectado", "type": "server_error"}}, status_code=500)
+        content = "Pronóstico de prueba: partido parejo."
+        if (body.get("response_format") or {}).get("type") == "json_object":
+            prompt = body["messages"][-1]["content"]
+            ids = re.findall(r'"idEvent": "([^"]+)"', prompt)
+            content = json.dumps({"predictions": [{"idEvent": id_event, "pronostico": content} for id_event in ids]})
+        return {
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 50, "completion_tokens": 10, "total_tokens": 60},
+        }
+
+    return app
+
+
+class ServerThread:
+    """Corre una app ASGI con uvicorn en un hilo, en un puerto libre."""
+
+    def __init__(self, app, port: int = 0):
+        config = uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", lifespan="on")
+        self.server = uvicorn.Server(config)
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    def start(self) -> "ServerThread":
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+        return self
+
+    @property
+    def url(self) -> str:
+        port = self.server.servers[0].sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}"
+
+    def stop(self):
+        self.server.should_exit = True
+        self.thread.join(timeout=5)
+
+
+def bench_env(sports_url: str = None, weather_url: str = None, llm_url: str = None, database_url: str = None):
+    """Variables de entorno para que la API use los stubs; llamar antes de importar `app`."""
+    for var in ("DB_USER", "DB_PASS", "DB_HOST", "DB_NAME", "SECRET_KEY",
+                "OPENAI_KEY", "WEATHER_KEY", "SPORTS_KEY"):
+        os.environ.setdefault(var, "bench")
+    os.environ.setdefault("DB_PORT", "5432")
+    os.environ.setdefault("ALGORITHM", "HS256")
+    os.environ.setdefault("REFRESH_INTERVAL_SECONDS", "0")  # las actualizaciones las dispara el benchmark
+    os.environ.setdefault("EVENTS_REQUIRE_AUTH", "false")
+    os.environ.setdefault("WARMUP_HTTP", "false")  # sin HEAD a los servicios reales al arrancar la API
+    if sports_url:
+        os.environ["SPORTS_BASE_URL"] = sports_url
+    if weather_url:
+        os.environ["WEATHER_BASE_URL"] = weather_url
+    if llm_url:
+        os.environ["OPENAI_BASE_URL"] = f"{llm_url}/v1"
+    if database_url:
+        os.environ["DATABASE_URL"] = database_url
+
+
+def create_tables():
+    from app.database import Base, engine
+    import app.models  # noqa: F401  registra los modelos en Base
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+
+def percentile(values: list, fraction: float) -> float:
+    """Percentil por rango más cercano: el menor valor con al menos `fraction` de las muestras por debajo o igual."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(len(ordered) * fraction) - 1)]
+
+
+def p99(values: list) -> float:
+    return percentile(values, 0.99)
+
+
+async def load(url: str, request, concurrency: int, requests: int = None, seconds: float = None) -> dict:
+    """
+    Carga con `concurrency` clientes sobre un httpx.AsyncClient compartido hasta completar `requests`
+    peticiones o hasta que pasen `seconds`. `request(client, worker, i)` hace una petición (worker es
+    el número de cliente e i su petición) y devuelve la respuesta; se cuentan por código de estado y
+    las >= 400 como errores. Latencias en milisegundos. Para run_load en otro proceso `request` tiene que poder
+    serializarse con pickle: una función de módulo o un functools.partial, no una lambda.
+    """
+    latencies = []
+    statuses = Counter()
+    pending = iter(range(requests)) if requests is not None else None
+    deadline = time.perf_counter() + seconds if seconds is not None else None
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        async def worker(n: int):
+            i = 0
+            while deadline is None or time.perf_counter() < deadline:
+                if pending is not None and next(pending, None) is None:
+                    break
+                start = time.perf_counter()
+                response = await request(client, n, i)
+                latencies.append((time.perf_counter() - start) * 1000)
+                statuses[response.status_code] += 1
+                i += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(n) for n in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return {
+        "requests": len(latencies),
+        "errors": sum(count for status, count in statuses.items() if status >= 400),
+        "statuses": dict(statuses),
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies), 2) if latencies else None,
+        "p99_ms": round(p99(latencies), 2) if latencies else None,
+    }
+
+
+def run_load(url: str, request, concurrency: int, requests: int = None, seconds: float = None) -> dict:
+    """`load()` en un event loop propio (ej. dentro de un ProcessPoolExecutor, lejos del de la API)."""
+    return asyncio.run(load(url, request, concurrency, requests, seconds))
@@ -0,0 +1,54 @@
+"""
+Micro-benchmark de validación de tokens: jwt.decode en cada llamada (versión anterior de
+/validate-token) vs TokenValidator con la caché de tokens verificados.
+
+Valida `--tokens` tokens distintos en ronda, `--calls` veces en total; con la caché solo la
+primera validación de cada token hace jwt.decode.
+
+Uso:
+    python -m benchmarks.token_validation_bench --tokens 100 --calls 20000
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from benchmarks.stubs import bench_env, create_tables
+
+
+async def main(tokens: int, calls: int):
+    from jose import jwt
+
+    from app.auth import ALGORITHM, SECRET_KEY, create_access_token
+    from app.database import async_engine
+    from app.tokens import TokenValidator
+
+    create_tables()
+    issued = [create_access_token({"sub": f"usuario{i}@example.com"}) for i in range(tokens)]
+
+    start = time.perf_counter()
+    for i in range(calls):
+        jwt.decode(issued[i % tokens], SECRET_KEY, algorithms=[ALGORITHM])
+    decode_us = (time.perf_counter() - start) / calls * 1e6
+
+    validator = TokenValidator(maxsize=tokens * 2, revocation_refresh=60.0)
+    await validator.validate(issued[0])  # carga la lista de revocación fuera de la medición
+    start = time.perf_counter()
+    for i in range(calls):
+        await validator.validate(issued[i % tokens])
+    cached_us = (time.perf_counter() - start) / calls * 1e6
+
+    print(f"jwt.decode:       {decode_us:8.2f}µs por validación")
+    print(f"TokenValidator:   {cached_us:8.2f}µs por validación ({validator.stats()})")
+    print(f"mejora:           {decode_us / cached_us:8.1f}x")
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tokens", type=int, default=100)
+    parser.add_argument("--calls", type=int, default=20_000)
+    args = parser.parse_args()
+    bench_env(database_url=f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}")
+    asyncio.run(main(args.tokens, args.calls))
@@ -0,0 +1,88 @@
+"""
+Tiempo al primer byte y al primer evento de POST /update-events?stream=ndjson según la cantidad
+de partidos por liga, comparado con la respuesta de `wait=true` (que llega al final).
+
+Levanta los stubs de thesportsdb, api_clima y OpenAI y la API sobre SQLite. Con streaming el
+primer byte sale de inmediato y el primer evento llega cuando termina la primera liga; cada
+línea del stream es un solo evento, así que el cliente no acumula la respuesta completa.
+`wait=true` corre primero y deja calientes las cachés de ubicación y clima para ambos modos.
+
+Uso:
+    python -m benchmarks.update_stream_bench --events 10 100 500 --leagues 4
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.stubs import ServerThread, bench_env, create_tables, llm_stub, sports_stub, weather_stub
+
+PREFIX = "/kingtide/api/events"
+
+
+def streamed(url: str) -> dict:
+    start = time.perf_counter()
+    timings = {"events": 0, "max_line": 0}
+    with httpx.stream("POST", f"{url}{PREFIX}/update-events?stream=ndjson&force_predictions=true", timeout=600) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            timings.setdefault("first_byte", time.perf_counter() - start)
+            timings["max_line"] = max(timings["max_line"], len(line))
+            record = json.loads(line)
+            if record["type"] == "event":
+                timings.setdefault("first_event", time.perf_counter() - start)
+                timings["events"] += 1
+    timings["total"] = time.perf_counter() - start
+    return timings
+
+
+def waited(url: str) -> float:
+    start = time.perf_counter()
+    httpx.post(f"{url}{PREFIX}/update-events?wait=true&force_predictions=true", timeout=600).raise_for_status()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, nargs="+", default=[10, 100, 500], help="partidos por liga")
+    parser.add_argument("--leagues", type=int, default=4)
+    parser.add_argument("--llm-latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    weather = ServerThread(weather_stub(latency=0.01)).start()
+    llm = ServerThread(llm_stub(latency=args.llm_latency)).start()
+    bench_env(weather_url=weather.url, llm_url=llm.url,
+              database_url=f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}")
+    os.environ["EVENT_CONCURRENCY"] = "32"
+    os.environ["LLM_CONCURRENCY"] = "32"
+
+    import app.routes.events as events_module
+    from app.main import app
+
+    events_module.LEAGUE_IDS[:] = [str(5000 + i) for i in range(args.leagues)]
+    create_tables()
+    api = ServerThread(app).start()
+
+    print(f"{'partidos/liga':>13} {'1er byte':>9} {'1er evento':>11} {'total':>7} {'wait=true':>10} {'eventos':>8} {'línea máx':>10}")
+    for per_league in args.events:
+        sports = ServerThread(sports_stub(latency=0.01, events_per_league=per_league)).start()
+        events_module.SPORTS_URL = sports.url
+
+        blocking = waited(api.url)
+        timings = streamed(api.url)
+        sports.stop()
+
+        print(
+            f"{per_league:>13} {timings['first_byte'] * 1000:>7.1f}ms {timings['first_event']:>10.2f}s "
+            f"{timings['total']:>6.2f}s {blocking:>9.2f}s {timings['events']:>8} {timings['max_line']:>9}B"
+        )
+
+    for server in (api, llm, weather):
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+-- Esquema inicial (users y events) para una base de datos vacía. Todas las migraciones se pueden
+-- volver a correr: las que ya se aplicaron no cambian nada.
+--   for f in migrations/*.sql; do psql "postgresql://$DB_USER:$DB_PASS@$DB_HOST:$DB_PORT/$DB_NAME" -v ON_ERROR_STOP=1 -f "$f"; done
+
+CREATE TABLE IF NOT EXISTS users (
+	id SERIAL NOT NULL,
+	email VARCHAR NOT NULL,
+	password VARCHAR NOT NULL,
+	is_active BOOLEAN,
+	PRIMARY KEY (id)
+);
+CREATE UNIQUE INDEX IF NOT EXISTS ix_users_email ON users (email);
+CREATE INDEX IF NOT EXISTS ix_users_id ON users (id);
+
+CREATE TABLE IF NOT EXISTS events (
+	id SERIAL NOT NULL,
+	id_event VARCHAR NOT NULL,
+	id_league VARCHAR NOT NULL,
+	date_event VARCHAR NOT NULL,
+	event_data JSON NOT NULL,
+	created_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+	updated_at TIMESTAMP WITH TIME ZONE,
+	PRIMARY KEY (id),
+	UNIQUE (id_event)
+);
+CREATE INDEX IF NOT EXISTS ix_events_id ON events (id);
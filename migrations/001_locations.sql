@@ -0,0 +1,15 @@
+-- Ubicaciones de estadios (lookupvenue.php) y equipos (lookupteam.php): segundo nivel de LocationCache
+
+CREATE TABLE IF NOT EXISTS locations (
+	id SERIAL NOT NULL,
+	kind VARCHAR NOT NULL,
+	ref_id VARCHAR NOT NULL,
+	location VARCHAR,
+	updated_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+	PRIMARY KEY (id),
+	CONSTRAINT uq_locations_kind_ref_id UNIQUE (kind, ref_id)
+);
+CREATE INDEX IF NOT EXISTS ix_locations_id ON locations (id);
+
+-- Una versión anterior del modelo guardaba también las coordenadas convertidas
+ALTER TABLE locations DROP COLUMN IF EXISTS latitude, DROP COLUMN IF EXISTS longitude;
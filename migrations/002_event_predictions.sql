@@ -0,0 +1,5 @@
+-- Pronóstico guardado reutilizable: hash de las entradas del prompt y fecha del pronóstico
+
+ALTER TABLE events
+	ADD COLUMN IF NOT EXISTS prediction_hash VARCHAR,
+	ADD COLUMN IF NOT EXISTS predicted_at TIMESTAMP WITH TIME ZONE;
@@ -0,0 +1,21 @@
+-- /next con filtros y paginación por cursor: date_event pasa de texto a DATE, event_data a JSONB
+-- (para los filtros por equipo con @>) y se agregan los índices de las consultas filtradas
+
+DO $$
+BEGIN
+	IF (SELECT data_type FROM information_schema.columns
+	    WHERE table_name = 'events' AND column_name = 'date_event') <> 'date' THEN
+		-- Filas sin dateEvent válido: la actualización ya no las guarda y se vuelven a traer completas
+		DELETE FROM events WHERE date_event !~ '^\d{4}-\d{2}-\d{2}$';
+		ALTER TABLE events ALTER COLUMN date_event TYPE DATE USING date_event::date;
+	END IF;
+	IF (SELECT data_type FROM information_schema.columns
+	    WHERE table_name = 'events' AND column_name = 'event_data') <> 'jsonb' THEN
+		ALTER TABLE events ALTER COLUMN event_data TYPE JSONB USING event_data::jsonb;
+	END IF;
+END
+$$;
+
+CREATE INDEX IF NOT EXISTS ix_events_league_date ON events (id_league, date_event, id_event);
+CREATE INDEX IF NOT EXISTS ix_events_date_id ON events (date_event, id_event);
+CREATE INDEX IF NOT EXISTS ix_events_event_data_gin ON events USING gin (event_data jsonb_path_ops);
@@ -0,0 +1,9 @@
+-- Tokens revocados antes de su expiración (jti del token o sha256 de los tokens sin jti)
+
+CREATE TABLE IF NOT EXISTS revoked_tokens (
+	jti VARCHAR NOT NULL,
+	expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
+	revoked_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+	PRIMARY KEY (jti)
+);
+CREATE INDEX IF NOT EXISTS ix_revoked_tokens_expires_at ON revoked_tokens (expires_at);
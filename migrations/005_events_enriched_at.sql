@@ -0,0 +1,3 @@
+-- Última vez que se obtuvieron clima y pronóstico de cada evento (actualización incremental)
+
+ALTER TABLE events ADD COLUMN IF NOT EXISTS enriched_at TIMESTAMP WITH TIME ZONE;
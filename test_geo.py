@@ -0,0 +1,99 @@
+"""
+Pruebas del parser de coordenadas de app/utils/geo.py: ejemplos y propiedades con coordenadas al
+azar (semilla fija) escritas en cada formato soportado.
+"""
+import random
+
+import pytest
+
+from app.utils.geo import looks_like_coordinates, parse_coordinates, parse_coordinates_many
+
+CASES = 2000
+
+
+def dms(value: float, positive: str, negative: str, ascii_marks: bool = False) -> str:
+    direction = positive if value >= 0 else negative
+    # Se redondea el total de segundos para que nunca se escriba 60″
+    total = round(abs(value) * 3600, 4)
+    degrees, rest = divmod(total, 3600)
+    minutes, seconds = divmod(rest, 60)
+    degrees, minutes = int(degrees), int(minutes)
+    if ascii_marks:
+        return f"{degrees}°{minutes}'{seconds:.4f}\"{direction}"
+    return f"{degrees}°{minutes}′{seconds:.4f}″{direction}"
+
+
+def decimal_minutes(value: float, positive: str, negative: str) -> str:
+    direction = positive if value >= 0 else negative
+    degrees = int(abs(value))
+    return f"{degrees}°{(abs(value) - degrees) * 60:.6f}′{direction}"
+
+
+FORMATS = {
+    "dms": lambda lat, lon: f"{dms(lat, 'N', 'S')} {dms(lon, 'E', 'W')}",
+    "dms oeste": lambda lat, lon: f"{dms(lat, 'N', 'S')} {dms(lon, 'E', 'O')}",
+    "dms ascii": lambda lat, lon: f"{dms(lat, 'N', 'S', True)} {dms(lon, 'E', 'W', True)}",
+    "dms invertido": lambda lat, lon: f"{dms(lon, 'E', 'W')} {dms(lat, 'N', 'S')}",
+    "minutos decimales": lambda lat, lon: f"{decimal_minutes(lat, 'N', 'S')} {decimal_minutes(lon, 'E', 'W')}",
+    "decimal con dirección": lambda lat, lon: (
+        f"{abs(lat):.6f}°{'N' if lat >= 0 else 'S'} {abs(lon):.6f}°{'E' if lon >= 0 else 'W'}"
+    ),
+    "decimal con signo": lambda lat, lon: f"{lat:.6f}, {lon:.6f}",
+}
+
+INVALID = [
+    "", "Madrid", "Estadio Santiago Bernabéu", "95°00′00″N 3°41′18″O", "40°75′11″N 3°41′18″O",
+    "40°27′11″N 41°27′11″S", "40°27′11″N", "40.5", "91.0, 10.0", "10.0, 181.0",
+]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("40°27′11″N 3°41′18″O", (40.453056, -3.688333)),
+    ("42.2118°N 8.7397°W", (42.2118, -8.7397)),
+    ("3°41′18″O 40°27′11″N", (40.453056, -3.688333)),
+    ("-34.6037, -58.3816", (-34.6037, -58.3816)),
+])
+def test_examples(text, expected):
+    assert parse_coordinates(text) == pytest.approx(expected, abs=1e-6)
+
+
+@pytest.mark.parametrize("name", FORMATS)
+def test_round_trip(name):
+    rng = random.Random(name)
+    for _ in range(CASES):
+        lat, lon = rng.uniform(-89.99, 89.99), rng.uniform(-179.99, 179.99)
+        text = FORMATS[name](lat, lon)
+        parsed = parse_coordinates(text)
+        assert parsed is not None, text
+        assert parsed == pytest.approx((lat, lon), abs=1e-5), text
+
+
+@pytest.mark.parametrize("text", INVALID)
+def test_invalid_is_rejected(text):
+    assert parse_coordinates(text) is None
+
+
+def test_random_text_is_in_range():
+    rng = random.Random(0)
+    alphabet = "0123456789°′″'\".,-+ NSEWOabc"
+    for _ in range(CASES):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 30)))
+        parsed = parse_coordinates(text)
+        if parsed is not None:
+            assert -90 <= parsed.latitude <= 90 and -180 <= parsed.longitude <= 180, text
+
+
+def test_batch_matches_single():
+    rng = random.Random(0)
+    texts = [rng.choice(["40°27′11″N 3°41′18″O", "42.2118°N 8.7397°W", "Madrid", "-34.6, -58.38"]) for _ in range(100)]
+    assert parse_coordinates_many(texts) == [parse_coordinates(text) for text in texts]
+
+
+@pytest.mark.parametrize("text", ["40°27′11″N", "95°00′00″N 3°41′18″O", "91.0, 10.0", "40.4168 -3.7038"])
+def test_looks_like_coordinates(text):
+    assert looks_like_coordinates(text)
+
+
+@pytest.mark.parametrize("text", ["", "Madrid", "3 de Febrero", "9 de Julio, Buenos Aires", "1860 München"])
+def test_places_do_not_look_like_coordinates(text):
+    assert not looks_like_coordinates(text)
@@ -0,0 +1,84 @@
+"""
+Pruebas de app/llm.py: reintentos de complete() contra un AsyncOpenAI sobre httpx.MockTransport.
+"""
+import asyncio
+import json
+import os
+
+import httpx
+import openai
+import pytest
+
+for name in ("DB_USER", "DB_PASS", "DB_HOST", "DB_PORT", "DB_NAME", "SECRET_KEY", "ALGORITHM",
+             "OPENAI_KEY", "WEATHER_KEY", "SPORTS_KEY"):
+    os.environ.setdefault(name, "test")
+
+from app import llm  # noqa: E402
+
+
+def completion(content: str = "Gana el local") -> httpx.Response:
+    return httpx.Response(200, json={
+        "id": "chatcmpl-test",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "gpt-3.5-turbo",
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+    })
+
+
+def error(status: int) -> httpx.Response:
+    return httpx.Response(status, json={"error": {"message": f"HTTP {status}", "type": "test"}})
+
+
+@pytest.fixture
+def responses(monkeypatch):
+    """Lista de respuestas que el proveedor devuelve en orden; `calls` cuenta las peticiones recibidas."""
+    queue = []
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(json.loads(request.content))
+        return queue.pop(0)
+
+    http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    client = openai.AsyncOpenAI(api_key="test", base_url="http://llm.test/v1", max_retries=0, http_client=http_client)
+    monkeypatch.setattr(llm, "get_llm_client", lambda: client)
+    monkeypatch.setattr(llm.settings, "llm_max_retries", 2)
+    monkeypatch.setattr(llm.settings, "llm_backoff_base", 0.001)
+    monkeypatch.setattr(llm.settings, "llm_backoff_max", 0.01)
+    yield queue, calls
+    asyncio.run(http_client.aclose())
+
+
+def test_retries_after_server_error(responses):
+    queue, calls = responses
+    queue.extend([error(500), completion()])
+    assert asyncio.run(llm.complete("¿Quién gana?", max_tokens=10)) == "Gana el local"
+    assert len(calls) == 2
+
+
+def test_transient_failure_then_success(responses):
+    queue, calls = responses
+    queue.extend([error(429), completion("Empate")])
+    assert asyncio.run(llm.complete("¿Quién gana?", max_tokens=10)) == "Empate"
+    assert len(calls) == 2
+
+
+def test_exhausted_retries_raise_llm_error(responses, monkeypatch):
+    queue, calls = responses
+    queue.extend([error(503)] * 3)
+    # Jitter completo: cada espera se sortea entre 0 y el backoff exponencial del intento
+    bounds = []
+    monkeypatch.setattr(llm.random, "uniform", lambda low, high: bounds.append((low, high)) or 0)
+    with pytest.raises(llm.LLMError):
+        asyncio.run(llm.complete("¿Quién gana?", max_tokens=10))
+    assert len(calls) == 3
+    assert bounds == [(0, 0.001), (0, 0.002)]
+
+
+def test_bad_request_is_not_retried(responses):
+    queue, calls = responses
+    queue.extend([error(400), completion()])
+    with pytest.raises(llm.LLMError):
+        asyncio.run(llm.complete("¿Quién gana?", max_tokens=10))
+    assert len(calls) == 1